@@ -0,0 +1,381 @@
+# A local stand-in for the Ollama HTTP API with controllable timing and faults.
+#
+# It implements the parts of the API the add-on uses (/api/generate, /api/chat, /api/tags,
+# /api/ps) and streams NDJSON like the real server. The "translation" is the input text
+# upper-cased, which keeps lengths and line structure intact so results can be checked.
+# Requests with "format": "json" get the values of the JSON object in the prompt translated.
+# Like llama.cpp, the server remembers the last few prompts with their output and only evaluates the
+# part of a new prompt that does not extend one of them (reported in prompt_eval_count).
+# The OpenAI-compatible /v1/chat/completions (server-sent events) and /v1/models are served as well,
+# with llama.cpp's timings; there, like llama.cpp servers where cache_prompt defaults to off, prompts
+# are only reused when the request asks for it with "cache_prompt": true.
+
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeOllamaConfig(object):
+    def __init__(self, token_delay=0.01, chars_per_token=4, load_delay=0.5, prompt_eval_rate=2000.0,
+                 fail_rate=0.0, stall_rate=0.0, stall_seconds=60.0, models=("llama3:latest",), seed=1,
+                 json_break_rate=0.0, prompt_cache_slots=4, loop_rate=0.0, model_delays=None):
+        # token_delay: seconds per generated token
+        # load_delay: seconds to load a model that is not resident yet
+        # prompt_eval_rate: prompt tokens evaluated per second before the first token
+        # fail_rate / stall_rate: probability that a generation fails with HTTP 500 / stalls mid-stream
+        # json_break_rate: probability that a JSON reply drops one of the keys
+        # prompt_cache_slots: number of evaluated prompts kept for prefix reuse, 0 disables it
+        # loop_rate: probability that a generation keeps repeating itself until num_predict (or 20x the output)
+        # model_delays: {model: token_delay} for models faster or slower than token_delay; they are added to models
+        self.token_delay = token_delay
+        self.chars_per_token = chars_per_token
+        self.load_delay = load_delay
+        self.prompt_eval_rate = prompt_eval_rate
+        self.fail_rate = fail_rate
+        self.stall_rate = stall_rate
+        self.stall_seconds = stall_seconds
+        self.json_break_rate = json_break_rate
+        self.prompt_cache_slots = prompt_cache_slots
+        self.loop_rate = loop_rate
+        self.model_delays = dict(model_delays or {})
+        self.models = list(models) + [m for m in self.model_delays if m not in models]
+        self.random = random.Random(seed)
+
+
+class FakeOllamaStats(object):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.generations = 0
+        self.failures = 0
+        self.stalls = 0
+        self.cancelled = 0
+        self.reloads = 0
+        self.loops = 0
+        self.active = 0
+        self.peak_active = 0
+        self.prompt_tokens = 0
+        self.cached_prompt_tokens = 0
+        self.output_tokens = 0
+        self.connections = 0
+
+    def enter(self):
+        with self._lock:
+            self.generations += 1
+            self.active += 1
+            self.peak_active = max(self.peak_active, self.active)
+
+    def leave(self):
+        with self._lock:
+            self.active -= 1
+
+    def add(self, name, amount=1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def asDict(self):
+        with self._lock:
+            return {key: value for key, value in self.__dict__.items() if not key.startswith("_")}
+
+
+def fakeTranslate(text):
+    return text.upper()
+
+
+def extractText(prompt, marker="Text: "):
+    # The add-on's prompts end with "Text: <source>" ("JSON: <object>" when packed); anything else is translated whole
+    index = prompt.rfind(marker)
+    return prompt[index + len(marker):] if index >= 0 else prompt
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "FakeOllama/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        self.server.stats.add("connections")
+
+    @property
+    def config(self):
+        return self.server.config
+
+    def _sendJson(self, status, obj):
+        body = json.dumps(obj).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _writeChunk(self, obj):
+        data = (json.dumps(obj) + "\n").encode("utf-8")
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def _writeEvent(self, obj):
+        data = ("data: %s\n\n" % (obj if isinstance(obj, str) else json.dumps(obj))).encode("utf-8")
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def do_GET(self):
+        self.server.stats.add("requests")
+        if self.path.startswith("/api/tags"):
+            self._sendJson(200, {"models": [{"name": name, "model": name} for name in self.config.models]})
+        elif self.path.startswith("/v1/models"):
+            self._sendJson(200, {"object": "list", "data": [{"id": name, "object": "model"} for name in self.config.models]})
+        elif self.path.startswith("/api/ps"):
+            with self.server.lock:
+                loaded = sorted(self.server.loaded)
+            self._sendJson(200, {"models": [{"name": name, "model": name} for name in loaded]})
+        elif self.path in ("/", "/api/version"):
+            self._sendJson(200, {"version": "0.0.0-fake"})
+        else:
+            self._sendJson(404, {"error": "not found"})
+
+    def do_POST(self):
+        self.server.stats.add("requests")
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._sendJson(400, {"error": "invalid JSON"})
+            return
+        if self.path.startswith("/api/generate"):
+            prompt = request.get("prompt", "")
+            system = request.get("system", "")
+            sequence = "<system>%s<user>%s" % (system, prompt)
+        elif self.path.startswith("/api/chat") or self.path.startswith("/v1/chat/completions"):
+            messages = request.get("messages", [])
+            prompt = messages[-1]["content"] if messages else ""
+            system = "".join(m["content"] for m in messages[:-1])
+            sequence = "".join("<%s>%s" % (m.get("role"), m.get("content")) for m in messages)
+        else:
+            self._sendJson(404, {"error": "not found"})
+            return
+        model = self.server.resolveModel(request.get("model", ""))
+        if model is None:
+            self._sendJson(404, {"error": f"model '{request.get('model')}' not found"})
+            return
+
+        if self.path.startswith("/v1/"):
+            # OpenAI-compatible servers load their model when they start
+            load_duration = 0.0
+        else:
+            load_duration = self.server.ensureLoaded(model, (request.get("options") or {}).get("num_ctx"))
+        if not prompt:
+            # A request without a prompt only loads the model
+            self._sendJson(200, {"model": model, "response": "", "done": True, "done_reason": "load",
+                                 "load_duration": int(load_duration * 1e9)})
+            return
+
+        if self.config.random.random() < self.config.fail_rate:
+            self.server.stats.add("failures")
+            self._sendJson(500, {"error": "simulated failure"})
+            return
+
+        self.server.stats.enter()
+        try:
+            self._generate(request, model, sequence, self._output(request, prompt), load_duration)
+        except (BrokenPipeError, ConnectionResetError):
+            self.server.stats.add("cancelled")
+        finally:
+            self.server.stats.leave()
+
+    def _output(self, request, prompt):
+        if request.get("format") == "json" or (request.get("response_format") or {}).get("type") == "json_object":
+            try:
+                items = json.loads(extractText(prompt, "JSON: "))
+            except ValueError:
+                return "{}"
+            reply = {key: fakeTranslate(value) for key, value in items.items()}
+            if reply and self.config.random.random() < self.config.json_break_rate:
+                reply.pop(next(iter(reply)))
+            return json.dumps(reply, ensure_ascii=False)
+        return fakeTranslate(extractText(prompt))
+
+    def _generate(self, request, model, prompt, output, load_duration):
+        config = self.config
+        started = time.perf_counter()
+        openai = self.path.startswith("/v1/")
+        cached = self.server.cachedPrefix(model, prompt) if not openai or request.get("cache_prompt") else 0
+        prompt_tokens = max(1, (len(prompt) - cached) // config.chars_per_token)
+        self.server.stats.add("prompt_tokens", prompt_tokens)
+        self.server.stats.add("cached_prompt_tokens", cached // config.chars_per_token)
+        prompt_eval = prompt_tokens / config.prompt_eval_rate if config.prompt_eval_rate else 0.0
+        time.sleep(prompt_eval)
+        chat = self.path.startswith("/api/chat")
+        stream = request.get("stream", True)
+        if openai and not stream:
+            self._sendJson(400, {"error": {"message": "only streamed completions are supported"}})
+            return
+        if stream:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream" if openai else "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+        limit = request.get("max_tokens") if openai else (request.get("options") or {}).get("num_predict")
+        if config.random.random() < config.loop_rate:
+            self.server.stats.add("loops")
+            output = (output + " ") * 20
+        tokens = [output[i:i + config.chars_per_token] for i in range(0, len(output), config.chars_per_token)]
+        if limit and limit > 0:
+            tokens = tokens[:limit]
+        stall_at = len(tokens) // 2 if config.random.random() < config.stall_rate else None
+        eval_started = time.perf_counter()
+        for index, token in enumerate(tokens):
+            if index == stall_at:
+                self.server.stats.add("stalls")
+                time.sleep(config.stall_seconds)
+            time.sleep(config.model_delays.get(model, config.token_delay))
+            if openai:
+                self._writeEvent(self._event(model, {"content": token}, None))
+            elif stream:
+                self._writeChunk(self._line(model, token, chat, False))
+        self.server.stats.add("output_tokens", len(tokens))
+        self.server.rememberPrompt(model, prompt + "<assistant>" + "".join(tokens))
+        done_reason = "stop" if limit is None or len(tokens) < limit else "length"
+        if openai:
+            self._writeEvent(self._event(model, {}, done_reason))
+            if (request.get("stream_options") or {}).get("include_usage"):
+                usage = self._event(model, None, None)
+                usage["usage"] = {"prompt_tokens": len(prompt) // config.chars_per_token, "completion_tokens": len(tokens),
+                                  "total_tokens": len(prompt) // config.chars_per_token + len(tokens)}
+                eval_seconds = time.perf_counter() - eval_started
+                usage["timings"] = {"cache_n": cached // config.chars_per_token, "prompt_n": prompt_tokens,
+                                    "prompt_ms": prompt_eval * 1000, "predicted_n": len(tokens), "predicted_ms": eval_seconds * 1000,
+                                    "predicted_per_second": len(tokens) / eval_seconds if eval_seconds else 0.0}
+                self._writeEvent(usage)
+            self._writeEvent("[DONE]")
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+            return
+        final = self._line(model, "" if stream else "".join(tokens), chat, True)
+        final.update({
+            "done_reason": done_reason,
+            "total_duration": int((time.perf_counter() - started + load_duration) * 1e9),
+            "load_duration": int(load_duration * 1e9),
+            "prompt_eval_count": prompt_tokens,
+            "prompt_eval_duration": int(prompt_eval * 1e9),
+            "eval_count": len(tokens),
+            "eval_duration": int((time.perf_counter() - eval_started) * 1e9),
+        })
+        if not chat:
+            final["context"] = [1, 2, 3]
+        if stream:
+            self._writeChunk(final)
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+        else:
+            self._sendJson(200, final)
+
+    @staticmethod
+    def _event(model, delta, finish_reason):
+        event = {"id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": int(time.time()), "model": model}
+        event["choices"] = [] if delta is None else [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+        return event
+
+    @staticmethod
+    def _line(model, token, chat, done):
+        line = {"model": model, "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ"), "done": done}
+        if chat:
+            line["message"] = {"role": "assistant", "content": token}
+        else:
+            line["response"] = token
+        return line
+
+
+class FakeOllamaServer(ThreadingHTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, config=None, host="127.0.0.1", port=0):
+        super().__init__((host, port), _Handler)
+        self.config = config or FakeOllamaConfig()
+        self.stats = FakeOllamaStats()
+        self.lock = threading.Lock()
+        self.loaded = {}
+        self.prompt_cache = {}
+        self._thread = None
+
+    @property
+    def url(self):
+        return "http://%s:%d" % self.server_address[:2]
+
+    @property
+    def generateUrl(self):
+        return self.url + "/api/generate"
+
+    def resolveModel(self, name):
+        for model in self.config.models:
+            if name == model or name + ":latest" == model:
+                return model
+        return None
+
+    def ensureLoaded(self, model, num_ctx=None):
+        # Loading is serialized like on a single GPU; returns the time spent loading. As in Ollama, a
+        # request for a different context window reloads the model and drops its prompt cache.
+        with self.lock:
+            if model in self.loaded and (num_ctx is None or self.loaded[model] == num_ctx):
+                return 0.0
+            if model in self.loaded:
+                self.stats.add("reloads")
+                self.prompt_cache.pop(model, None)
+            time.sleep(self.config.load_delay)
+            self.loaded[model] = num_ctx or self.loaded.get(model) or 2048
+            return self.config.load_delay
+
+    def cachedPrefix(self, model, prompt):
+        # Length of the longest remembered sequence that the prompt starts with
+        with self.lock:
+            remembered = list(self.prompt_cache.get(model, ()))
+        return max((len(os.path.commonprefix([sequence, prompt])) for sequence in remembered), default=0)
+
+    def rememberPrompt(self, model, sequence):
+        if not self.config.prompt_cache_slots:
+            return
+        with self.lock:
+            slots = self.prompt_cache.setdefault(model, [])
+            slots.append(sequence)
+            del slots[:-self.config.prompt_cache_slots]
+
+    def unloadAll(self):
+        with self.lock:
+            self.loaded.clear()
+            self.prompt_cache.clear()
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name="FakeOllama", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run a fake Ollama server for manual testing.")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--token-delay", type=float, default=0.02)
+    parser.add_argument("--load-delay", type=float, default=2.0)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--stall-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    server = FakeOllamaServer(FakeOllamaConfig(
+        token_delay=args.token_delay, load_delay=args.load_delay,
+        fail_rate=args.fail_rate, stall_rate=args.stall_rate
+    ), port=args.port)
+    print(f"Fake Ollama listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,525 @@
+# Minimal stand-ins for the NVDA and wxPython modules used by the add-on, so that
+# globalPlugins/ollama_translator.py can be imported and driven on a plain Python install.
+#
+# Call install() before importing the add-on. The stubs record everything the add-on
+# says or shows so benchmarks can wait for a translation to be delivered.
+
+import logging
+import os
+import queue
+import sys
+import tempfile
+import threading
+import time
+import types
+
+ADDON_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "globalPlugins")
+
+POSITION_ALL = "all"
+POSITION_SELECTION = "selection"
+POSITION_CARET = "caret"
+POSITION_FIRST = "first"
+POSITION_LAST = "last"
+UNIT_CHARACTER = "character"
+UNIT_WORD = "word"
+UNIT_LINE = "line"
+UNIT_PARAGRAPH = "paragraph"
+UNIT_STORY = "story"
+
+
+class GuiLoop(object):
+    # Runs wx.CallAfter/CallLater callbacks on a single thread, like the wx main loop would.
+    def __init__(self):
+        self._queue = queue.Queue()
+        self.calls = 0
+        self.thread = threading.Thread(target=self._run, name="FakeGUI", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while True:
+            func, args, kwargs = self._queue.get()
+            self.calls += 1
+            try:
+                func(*args, **kwargs)
+            except Exception:
+                logging.getLogger("nvda").exception("Exception in GUI callback")
+
+    def callAfter(self, func, *args, **kwargs):
+        self._queue.put((func, args, kwargs))
+
+    def isGuiThread(self):
+        return threading.current_thread() is self.thread
+
+    def flush(self, timeout=5.0):
+        # Wait until everything queued so far has run
+        done = threading.Event()
+        self.callAfter(done.set)
+        return done.wait(timeout)
+
+
+class UiRecorder(object):
+    # Collects ui.message and ui.browseableMessage calls with timestamps
+    def __init__(self):
+        self._cond = threading.Condition()
+        self.events = []
+
+    def add(self, kind, text):
+        with self._cond:
+            self.events.append((time.perf_counter(), kind, text))
+            self._cond.notify_all()
+
+    def clear(self):
+        with self._cond:
+            self.events = []
+
+    def waitFor(self, predicate, timeout=60.0):
+        # Returns the first matching event, or None on timeout
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                for event in self.events:
+                    if predicate(event):
+                        return event
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+
+    def browsed(self):
+        with self._cond:
+            return [event for event in self.events if event[1] == "browse"]
+
+
+class _CallLater(object):
+    def __init__(self, ms, func, *args, **kwargs):
+        self._ms = ms
+        self._func = func
+        self._args = args
+        self._kwargs = kwargs
+        self._timer = None
+        self.Start()
+
+    def Start(self, ms=None, *args, **kwargs):
+        if ms is not None:
+            self._ms = ms
+        if args or kwargs:
+            self._args, self._kwargs = args, kwargs
+        self.Stop()
+        self._timer = threading.Timer(self._ms / 1000.0, gui_loop.callAfter, (self._func,) + tuple(self._args), self._kwargs)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def Restart(self, ms=None, *args, **kwargs):
+        self.Start(ms, *args, **kwargs)
+
+    def Stop(self):
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+
+    def IsRunning(self):
+        return self._timer is not None and self._timer.is_alive()
+
+
+class _Widget(object):
+    # Generic wx window/sizer/control: remembers a value and ignores everything else
+    def __init__(self, *args, **kwargs):
+        self._value = kwargs.get("value", "")
+        self._label = kwargs.get("label", "")
+        self._items = list(kwargs.get("choices", []))
+        self._selection = -1
+        self._enabled = True
+        self._destroyed = False
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return _Widget()
+
+    def __call__(self, *args, **kwargs):
+        return _Widget()
+
+    def __bool__(self):
+        return not self._destroyed
+
+    def Destroy(self):
+        self._destroyed = True
+
+    def GetValue(self):
+        return self._value
+
+    def SetValue(self, value):
+        self._value = value
+
+    def AppendText(self, text):
+        self._value += text
+
+    def ChangeValue(self, value):
+        self._value = value
+
+    def GetLastPosition(self):
+        return len(self._value)
+
+    @property
+    def Value(self):
+        return self._value
+
+    @Value.setter
+    def Value(self, value):
+        self._value = value
+
+    def SetLabel(self, label):
+        self._label = label
+
+    def GetLabel(self):
+        return self._label
+
+    def Enable(self, enable=True):
+        self._enabled = enable
+
+    def Disable(self):
+        self._enabled = False
+
+    def IsEnabled(self):
+        return self._enabled
+
+    def Set(self, items):
+        self._items = list(items)
+        self._selection = -1
+
+    def Append(self, item, *args):
+        if isinstance(item, str):
+            self._items.append(item)
+        return _Widget()
+
+    def GetCount(self):
+        return len(self._items)
+
+    def SetSelection(self, index):
+        self._selection = index
+
+    def GetSelection(self):
+        return self._selection
+
+    def SetStringSelection(self, value):
+        if value in self._items:
+            self._selection = self._items.index(value)
+
+    def GetStringSelection(self):
+        if 0 <= self._selection < len(self._items):
+            return self._items[self._selection]
+        return ""
+
+    def GetId(self):
+        return id(self)
+
+    def ShowModal(self):
+        return ID_NO
+
+
+ID_ANY = -1
+ID_OK = 5100
+ID_CANCEL = 5101
+ID_YES = 5103
+ID_NO = 5104
+ID_CLOSE = 5111
+
+gui_loop = None
+ui_recorder = UiRecorder()
+_installed = False
+
+
+def _module(name, **attrs):
+    module = types.ModuleType(name)
+    module.__dict__.update(attrs)
+    sys.modules[name] = module
+    return module
+
+
+def _makeWx():
+    wx = _module("wx")
+    for name in (
+        "Dialog", "Frame", "Panel", "TextCtrl", "Choice", "Button", "CheckBox", "StaticText", "BoxSizer",
+        "Menu", "MenuItem", "MessageDialog", "FileDialog", "SpinCtrl", "ListBox", "CheckListBox", "Gauge",
+        "Timer", "Window", "StaticBoxSizer"
+    ):
+        setattr(wx, name, type(name, (_Widget,), {}))
+    wx.CallAfter = lambda func, *args, **kwargs: gui_loop.callAfter(func, *args, **kwargs)
+    wx.CallLater = _CallLater
+    wx.IsMainThread = lambda: gui_loop.isGuiThread()
+    for name, value in dict(
+        ID_ANY=ID_ANY, ID_OK=ID_OK, ID_CANCEL=ID_CANCEL, ID_YES=ID_YES, ID_NO=ID_NO, ID_CLOSE=ID_CLOSE
+    ).items():
+        setattr(wx, name, value)
+    # Style flags and event binders only need to be distinct objects
+    for index, name in enumerate((
+        "VERTICAL", "HORIZONTAL", "ALL", "EXPAND", "ALIGN_CENTER", "TE_MULTILINE", "TE_READONLY", "TE_RICH2",
+        "YES_NO", "OK", "ICON_WARNING", "ICON_ERROR", "ICON_INFORMATION", "FD_SAVE", "FD_OVERWRITE_PROMPT",
+        "EVT_BUTTON", "EVT_MENU", "EVT_TEXT", "EVT_CLOSE", "EVT_CHECKBOX", "EVT_TIMER", "EVT_CHOICE",
+        "DEFAULT_DIALOG_STYLE", "RESIZE_BORDER", "LEFT", "RIGHT", "TOP", "BOTTOM"
+    )):
+        setattr(wx, name, 1 << index)
+    return wx
+
+
+class _Action(object):
+    # extensionPoints.Action: handlers called in registration order
+    def __init__(self):
+        self._handlers = []
+
+    def register(self, handler):
+        self._handlers.append(handler)
+
+    def unregister(self, handler):
+        if handler in self._handlers:
+            self._handlers.remove(handler)
+
+    def notify(self, **kwargs):
+        for handler in list(self._handlers):
+            handler(**kwargs)
+
+
+class _SpeechCommand(object):
+    pass
+
+
+class _IndexCommand(_SpeechCommand):
+    def __init__(self, index):
+        self.index = index
+
+
+class _CallbackCommand(_SpeechCommand):
+    def __init__(self, callback, name=None):
+        self.callback = callback
+
+
+def _makeSpeech():
+    # speech.speak records what would be said; cancelSpeech notifies speechCanceled like NVDA does.
+    # speakObject says the name and role of obj through speakObjectProperties and speak, looked up when
+    # called, as in NVDA
+    extensions = _module("speech.extensions", speechCanceled=_Action())
+    commands = _module("speech.commands", SpeechCommand=_SpeechCommand, IndexCommand=_IndexCommand,
+                       BaseCallbackCommand=_CallbackCommand, CallbackCommand=_CallbackCommand)
+
+    def speak(speechSequence, symbolLevel=None, priority=None):
+        text = " ".join(item for item in speechSequence if isinstance(item, str))
+        ui_recorder.add("speech", text)
+        for item in speechSequence:
+            if isinstance(item, _CallbackCommand):
+                item.callback()
+
+    def speakObjectProperties(obj, reason=None, priority=None, **allowedProperties):
+        inner.speak([obj.name, obj.roleText], priority=priority)
+
+    def speakObject(obj, reason=None, _prefixSpeechCommand=None, priority=None):
+        inner.speakObjectProperties(obj, reason=reason, priority=priority)
+
+    def cancelSpeech():
+        ui_recorder.add("cancel", "")
+        extensions.speechCanceled.notify()
+
+    inner = _module("speech.speech", speak=speak, speakObject=speakObject,
+                    speakObjectProperties=speakObjectProperties, cancelSpeech=cancelSpeech)
+    return _module("speech", speech=inner, extensions=extensions, commands=commands, speak=speak,
+                   speakObject=speakObject, speakObjectProperties=speakObjectProperties, cancelSpeech=cancelSpeech)
+
+
+def _makeTextInfos():
+    return _module(
+        "textInfos",
+        POSITION_ALL=POSITION_ALL, POSITION_SELECTION=POSITION_SELECTION, POSITION_CARET=POSITION_CARET,
+        POSITION_FIRST=POSITION_FIRST, POSITION_LAST=POSITION_LAST,
+        UNIT_CHARACTER=UNIT_CHARACTER, UNIT_WORD=UNIT_WORD, UNIT_LINE=UNIT_LINE,
+        UNIT_PARAGRAPH=UNIT_PARAGRAPH, UNIT_STORY=UNIT_STORY,
+        TextInfo=FakeTextInfo
+    )
+
+
+class FakeTextInfo(object):
+    # A text range over a FakeDocument. Reading .text costs FakeDocument.readCost seconds per
+    # 1000 characters to mimic a cross-process accessibility call.
+    def __init__(self, obj, start, end):
+        self.obj = obj
+        self._start = start
+        self._end = end
+
+    @property
+    def text(self):
+        self.obj.textReads += 1
+        value = self.obj.text[self._start:self._end]
+        if self.obj.readCost:
+            time.sleep(self.obj.readCost * (1 + len(value) / 1000.0))
+        return value
+
+    @property
+    def isCollapsed(self):
+        return self._start == self._end
+
+    def copy(self):
+        return FakeTextInfo(self.obj, self._start, self._end)
+
+    def compareEndPoints(self, other, which):
+        mine = self._start if which.startswith("start") else self._end
+        theirs = other._start if which.endswith("Start") else other._end
+        return (mine > theirs) - (mine < theirs)
+
+    def setEndPoint(self, other, which):
+        value = other._start if which.endswith("Start") else other._end
+        if which.startswith("start"):
+            self._start = value
+            self._end = max(self._end, value)
+        else:
+            self._end = value
+            self._start = min(self._start, value)
+
+    def collapse(self, end=False):
+        if end:
+            self._start = self._end
+        else:
+            self._end = self._start
+
+    def _paragraphBounds(self, offset):
+        text = self.obj.text
+        start = text.rfind("\n", 0, offset) + 1
+        end = text.find("\n", offset)
+        return start, (len(text) if end < 0 else end + 1)
+
+    def expand(self, unit):
+        if unit == UNIT_PARAGRAPH or unit == UNIT_LINE:
+            self._start, self._end = self._paragraphBounds(self._start)
+        elif unit == UNIT_STORY:
+            self._start, self._end = 0, len(self.obj.text)
+
+    def move(self, unit, direction, endPoint=None):
+        # Only paragraph/line movement of collapsed ranges is needed by the add-on
+        moved = 0
+        offset = self._start
+        while moved < abs(direction):
+            if direction > 0:
+                _start, end = self._paragraphBounds(offset)
+                if end >= len(self.obj.text):
+                    break
+                offset = end
+            else:
+                start, _end = self._paragraphBounds(offset)
+                if start == 0:
+                    break
+                offset = self._paragraphBounds(start - 1)[0]
+            moved += 1
+        self._start = self._end = offset
+        return moved if direction > 0 else -moved
+
+    def getTextInChunks(self, unit):
+        offset = self._start
+        while offset < self._end:
+            _start, end = self._paragraphBounds(offset)
+            end = min(end, self._end)
+            chunk = FakeTextInfo(self.obj, offset, end)
+            yield chunk.text
+            offset = end
+
+    def __eq__(self, other):
+        return isinstance(other, FakeTextInfo) and (self.obj, self._start, self._end) == (other.obj, other._start, other._end)
+
+    def __ne__(self, other):
+        return not self == other
+
+
+class FakeDocument(object):
+    # A focus object / browse mode document holding plain text
+    def __init__(self, text="", selection=None, caret=0, readCost=0.0, name="document"):
+        self.text = text
+        self.selection = selection
+        self.caret = caret
+        self.readCost = readCost
+        self.textReads = 0
+        self.treeInterceptor = None
+        self.passThrough = True
+        self.name = name
+        self.TextInfo = FakeTextInfo
+
+    def makeTextInfo(self, position):
+        if position == POSITION_ALL:
+            return FakeTextInfo(self, 0, len(self.text))
+        if position == POSITION_SELECTION:
+            start, end = self.selection or (self.caret, self.caret)
+            return FakeTextInfo(self, start, end)
+        if position == POSITION_CARET:
+            return FakeTextInfo(self, self.caret, self.caret)
+        if position == POSITION_FIRST:
+            return FakeTextInfo(self, 0, 0)
+        if position == POSITION_LAST:
+            return FakeTextInfo(self, len(self.text), len(self.text))
+        raise NotImplementedError(position)
+
+
+class _Focus(object):
+    focus = None
+    navigator = None
+
+
+def setFocus(obj):
+    _Focus.focus = obj
+    _Focus.navigator = obj
+
+
+def install(configPath=None, language="en", logLevel=logging.WARNING):
+    # Registers the stub modules and returns the directory used as NVDA's config path
+    global gui_loop, _installed
+    if _installed:
+        return sys.modules["globalVars"].appArgs.configPath
+    _installed = True
+    gui_loop = GuiLoop()
+    configPath = configPath or tempfile.mkdtemp(prefix="nvda-config-")
+
+    _module("globalVars", appArgs=types.SimpleNamespace(configPath=configPath, secure=False))
+
+    class GlobalPlugin(object):
+        def __init__(self):
+            self._gestureMap = {}
+
+        def bindGesture(self, gestureIdentifier, scriptName):
+            self._gestureMap[gestureIdentifier.lower()] = scriptName
+
+        def removeGestureBinding(self, gestureIdentifier):
+            del self._gestureMap[gestureIdentifier.lower()]
+
+        def terminate(self):
+            pass
+
+    _module("globalPluginHandler", GlobalPlugin=GlobalPlugin)
+
+    def script(**kwargs):
+        def decorator(func):
+            return func
+        return decorator
+
+    _module("scriptHandler", script=script, getLastScriptRepeatCount=lambda: 0)
+    _module(
+        "ui",
+        message=lambda text, *args, **kwargs: ui_recorder.add("message", text),
+        browseableMessage=lambda text, title=None, *args, **kwargs: ui_recorder.add("browse", text)
+    )
+    _makeWx()
+    gui = _module("gui", mainFrame=_Widget())
+    gui.settingsDialogs = _module(
+        "gui.settingsDialogs",
+        SettingsPanel=type("SettingsPanel", (_Widget,), {}),
+        NVDASettingsDialog=type("NVDASettingsDialog", (_Widget,), {"categoryClasses": []})
+    )
+    gui.guiHelper = _module("gui.guiHelper", BoxSizerHelper=_Widget)
+    gui.mainFrame.sysTrayIcon = _Widget()
+    _module(
+        "api",
+        getFocusObject=lambda: _Focus.focus,
+        getNavigatorObject=lambda: _Focus.navigator,
+        setFocusObject=setFocus
+    )
+    _makeTextInfos()
+    _makeSpeech()
+    _module("languageHandler", getLanguage=lambda: language)
+    logging.basicConfig(level=logLevel, format="%(levelname)s %(message)s")
+    _module("logHandler", log=logging.getLogger("nvda"))
+    if ADDON_DIR not in sys.path:
+        sys.path.insert(0, ADDON_DIR)
+    return configPath
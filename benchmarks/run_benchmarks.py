@@ -0,0 +1,510 @@
+# Headless benchmarks for the Ollama Translator add-on.
+#
+# Imports globalPlugins/ollama_translator.py against the NVDA stubs in nvda_stubs.py, points it at
+# a local fake Ollama server and drives the gesture scripts and translateText with scripted
+# workloads. Run from the repository root:
+#
+#     python benchmarks/run_benchmarks.py
+#     python benchmarks/run_benchmarks.py --workloads short,burst --token-delay 0.02 --json results.json
+
+import argparse
+import json
+import math
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import nvda_stubs  # noqa: E402
+from fake_ollama import FakeOllamaConfig, FakeOllamaServer, fakeTranslate  # noqa: E402
+
+WORDS = (
+    "the quick brown fox jumps over a lazy dog while the settings dialog reports that your changes "
+    "were saved and the download of the update has finished successfully"
+).split()
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def sentence(index, words=6):
+    picked = [WORDS[(index * 7 + i * 3) % len(WORDS)] for i in range(words)]
+    return "%s %s number %d." % (picked[0].capitalize(), " ".join(picked[1:]), index)
+
+
+def document(chars, seed=0):
+    paragraphs = []
+    length = 0
+    index = seed
+    while length < chars:
+        paragraph = " ".join(sentence(index + i, 8 + (index + i) % 6) for i in range(4)) + "\n"
+        paragraphs.append(paragraph)
+        length += len(paragraph)
+        index += 4
+    return "".join(paragraphs)
+
+
+class ThreadSampler(object):
+    # Samples the number of live threads in the background
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.peak = threading.active_count()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, threading.active_count())
+
+    def __enter__(self):
+        self.peak = threading.active_count()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def expected(text):
+    return fakeTranslate(text).strip()
+
+
+def pressTranslate(plugin, text):
+    # Select the whole text in a focused document and press the translate gesture
+    obj = nvda_stubs.FakeDocument(text, selection=(0, len(text)))
+    nvda_stubs.setFocus(obj)
+    started = time.perf_counter()
+    plugin.script_translate(None)
+    return started
+
+
+def waitForBrowse(text, timeout):
+    wanted = expected(text)
+    return nvda_stubs.ui_recorder.waitFor(lambda event: event[1] == "browse" and event[2] == wanted, timeout)
+
+
+def workloadShort(plugin, server, args):
+    # Short UI strings translated one after another through the gesture
+    latencies = []
+    failures = 0
+    for index in range(args.count):
+        text = sentence(index, 2 + index % 4)
+        started = pressTranslate(plugin, text)
+        event = waitForBrowse(text, args.timeout)
+        if event is None:
+            failures += 1
+            continue
+        latencies.append(event[0] - started)
+    return {"requests": args.count, "failures": failures, "latencies": latencies}
+
+
+def workloadLong(plugin, server, args):
+    # One long document translated between a start and end marker
+    text = document(args.doc_chars)
+    obj = nvda_stubs.FakeDocument(text, caret=0)
+    nvda_stubs.setFocus(obj)
+    plugin.script_markStart(None)
+    obj.caret = len(text)
+    started = time.perf_counter()
+    plugin.script_markEndAndTranslate(None)
+    event = waitForBrowse(text, args.timeout)
+    latency = None if event is None else event[0] - started
+    return {
+        "requests": 1, "failures": int(event is None), "latencies": [latency] if latency else [],
+        "chars": len(text), "text_reads": obj.textReads
+    }
+
+
+def workloadBurst(plugin, server, args):
+    # Repeated presses in quick succession; only the last one really matters to the user
+    texts = [sentence(1000 + index, 10) for index in range(args.burst)]
+    presses = []
+    for text in texts:
+        presses.append(pressTranslate(plugin, text))
+        time.sleep(args.burst_interval)
+    event = waitForBrowse(texts[-1], args.timeout)
+    # Give superseded requests a moment to finish so the delivered count is stable
+    time.sleep(0.2)
+    delivered = [event for event in nvda_stubs.ui_recorder.browsed() if event[2] in set(map(expected, texts))]
+    return {
+        "requests": len(texts), "failures": int(event is None),
+        "latencies": [] if event is None else [event[0] - presses[-1]],
+        "delivered": len(delivered)
+    }
+
+
+def workloadList(plugin, server, args):
+    # A selected list of short rows, like a menu or a table column
+    rows = ["Row %d: %s" % (index, " ".join(WORDS[(index * 5 + i) % len(WORDS)] for i in range(2 + index % 3)))
+            for index in range(args.rows)]
+    text = "\n".join(rows)
+    started = pressTranslate(plugin, text)
+    event = waitForBrowse(text, args.timeout)
+    return {
+        "requests": 1, "failures": int(event is None), "latencies": [] if event is None else [event[0] - started],
+        "rows": len(rows)
+    }
+
+
+def workloadDialog(plugin, server, args):
+    # Several translation dialogs translating at the same time
+    import ollama_translator
+    results = []
+    firstText = []
+    lock = threading.Lock()
+
+    def run(index):
+        # Drives the real dialog; its translation field is polled until the whole translation is shown
+        text = " ".join(sentence(2000 + index * args.dialog_sentences + i) for i in range(args.dialog_sentences))
+        wanted = expected(text)
+        dialog = ollama_translator.TranslationDialog(None)
+        dialog.sourceText.SetValue(text)
+        started = time.perf_counter()
+        nvda_stubs.gui_loop.callAfter(dialog.onTranslate, None)
+        deadline = time.monotonic() + args.timeout
+        ok = False
+        shown = None
+        while time.monotonic() < deadline:
+            value = dialog.targetText.GetValue().strip()
+            if shown is None and value and value != ollama_translator._("translating"):
+                shown = time.perf_counter()
+            if value == wanted:
+                ok = True
+                break
+            time.sleep(0.002)
+        finished = time.perf_counter()
+        nvda_stubs.gui_loop.callAfter(dialog.onClose, None)
+        with lock:
+            results.append(finished - started if ok else None)
+            if shown is not None:
+                firstText.append(shown - started)
+
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(args.dialogs)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    latencies = [latency for latency in results if latency is not None]
+    return {
+        "requests": args.dialogs, "failures": len(results) - len(latencies), "latencies": latencies,
+        "first_text_p50": percentile(firstText, 0.5)
+    }
+
+
+def workloadTargets(plugin, server, args):
+    # The long document in several languages: each language on its own, then all of them at once
+    targets = [name.strip() for name in args.targets.split(",") if name.strip()]
+    text = document(args.doc_chars)
+    primary = plugin.config.get("target_lang")
+    # Every run must reach the server, so nothing is answered from the translation memory
+    memory = plugin.config.get("memory_enabled")
+    plugin.config["memory_enabled"] = False
+    single = []
+    failures = 0
+
+    def translate(wanted):
+        obj = nvda_stubs.FakeDocument(text, caret=0)
+        nvda_stubs.setFocus(obj)
+        plugin.script_markStart(None)
+        obj.caret = len(text)
+        nvda_stubs.ui_recorder.clear()
+        started = time.perf_counter()
+        plugin.script_markEndAndTranslate(None)
+        event = nvda_stubs.ui_recorder.waitFor(
+            lambda event: event[1] == "browse" and event[2] == wanted, args.timeout)
+        return None if event is None else event[0] - started
+
+    try:
+        for target in targets:
+            plugin.config["target_lang"] = target
+            latency = translate(expected(text))
+            failures += latency is None
+            single.append(latency or 0.0)
+        plugin.config["target_lang"] = targets[0]
+        plugin.config["extra_target_langs"] = targets[1:]
+        translated = fakeTranslate(text).strip()
+        together = translate("\n\n".join("%s:\n%s" % (target, translated) for target in targets))
+        failures += together is None
+    finally:
+        plugin.config["target_lang"] = primary
+        plugin.config["extra_target_langs"] = []
+        plugin.config["memory_enabled"] = memory
+    return {
+        "requests": len(targets) + 1, "failures": failures, "latencies": [together] if together else [],
+        "languages": len(targets), "single_max": max(single), "single_total": sum(single)
+    }
+
+
+def workloadSpeech(plugin, server, args):
+    # Automatic translation of speech while tabbing through --labels controls, --focus-moves times
+    import speech
+    labels = [sentence(3000 + index, 2 + index % 3).rstrip(".") for index in range(args.labels)]
+    plugin.config["auto_translate"] = True
+    plugin.configureSpeech()
+    moves = []
+    try:
+        for move in range(args.focus_moves):
+            label = labels[move % len(labels)]
+            speech.cancelSpeech()
+            moves.append((time.perf_counter(), label))
+            speech.speakObject(types.SimpleNamespace(name=label, roleText="button"))
+            time.sleep(args.focus_interval)
+        time.sleep(plugin.config.get("auto_budget", 0.8) + 0.5)
+    finally:
+        plugin.config["auto_translate"] = False
+        plugin.configureSpeech()
+    spoken = nvda_stubs.ui_recorder.events
+    latencies = []
+    translated = 0
+    for started, label in moves:
+        wanted = {label + " button": False, fakeTranslate(label) + " " + fakeTranslate("button"): True}
+        for at, kind, text in spoken:
+            if kind == "speech" and started <= at < started + 2.0 and text in wanted:
+                latencies.append(at - started)
+                translated += wanted[text]
+                break
+    stats = plugin.speechTranslator.stats()
+    return {
+        "requests": len(moves), "failures": 0, "latencies": latencies, "spoken": len(latencies),
+        "translated": translated, "reused": stats.get("reused", 0), "in_time": stats.get("in_time", 0),
+        "missed": stats.get("missed", 0), "late": stats.get("late", 0), "dropped": stats.get("dropped", 0),
+        "abandoned": stats.get("abandoned", 0), "passed": stats.get("passed", 0),
+        "peak_depth": stats["peak_depth"]
+    }
+
+
+def workloadClipboard(plugin, server, args):
+    # Copies paragraphs with a burst of quick changes in between, pauses --copy-pause seconds each time,
+    # then asks for the translation; also measures the watcher's CPU use while nothing changes
+    clipboard = {"sequence": 0, "text": ""}
+
+    def copy(text):
+        clipboard["sequence"] += 1
+        clipboard["text"] = text
+
+    def cpu(seconds=2.0):
+        started = time.process_time()
+        time.sleep(seconds)
+        return (time.process_time() - started) / seconds * 100
+
+    watcher = plugin.clipboard
+    watcher.sequence = lambda: clipboard["sequence"]
+    watcher.read = lambda max_chars: clipboard["text"] if len(clipboard["text"]) <= max_chars else None
+    idle_off = cpu()
+    plugin.config["clipboard_watch"] = True
+    plugin.configureClipboard()
+    latencies = []
+    failures = 0
+    try:
+        idle = cpu()
+        for index in range(args.copies):
+            text = " ".join(sentence(4000 + index * 10 + i) for i in range(8))
+            # Selecting and copying several times in a row: only the last copy is translated
+            for burst in range(3):
+                copy(sentence(5000 + index * 10 + burst))
+                time.sleep(0.05)
+            copy(text)
+            time.sleep(args.copy_pause)
+            nvda_stubs.ui_recorder.clear()
+            started = time.perf_counter()
+            nvda_stubs.gui_loop.callAfter(plugin.script_translateClipboard, None)
+            event = waitForBrowse(text, args.timeout)
+            if event is None:
+                failures += 1
+            else:
+                latencies.append(event[0] - started)
+    finally:
+        plugin.config["clipboard_watch"] = False
+        plugin.configureClipboard()
+    return dict(
+        requests=args.copies, failures=failures, latencies=latencies, idle_cpu_percent_off=idle_off, idle_cpu_percent=idle,
+        **{"watcher_" + key: value for key, value in watcher.counts.items()}
+    )
+
+
+WORKLOADS = {
+    "short": workloadShort,
+    "long": workloadLong,
+    "burst": workloadBurst,
+    "list": workloadList,
+    "dialog": workloadDialog,
+    "targets": workloadTargets,
+    "speech": workloadSpeech,
+    "clipboard": workloadClipboard,
+}
+
+
+def runWorkload(name, plugin, server, args):
+    nvda_stubs.ui_recorder.clear()
+    before = server.stats.asDict()
+    pool_before = plugin.connections.stats()
+    gui_before = nvda_stubs.gui_loop.calls
+    tracemalloc.start()
+    started = time.perf_counter()
+    with ThreadSampler() as sampler:
+        result = WORKLOADS[name](plugin, server, args)
+    elapsed = time.perf_counter() - started
+    _current, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    after = server.stats.asDict()
+    pool_after = plugin.connections.stats()
+    latencies = result.pop("latencies")
+    result.update({
+        "workload": name,
+        "elapsed": elapsed,
+        "throughput": result["requests"] / elapsed if elapsed else None,
+        "p50": percentile(latencies, 0.5),
+        "p95": percentile(latencies, 0.95),
+        "max": max(latencies) if latencies else None,
+        "peak_threads": sampler.peak,
+        "peak_memory_kb": peak_memory / 1024.0,
+        "gui_calls": nvda_stubs.gui_loop.calls - gui_before,
+        "server_generations": after["generations"] - before["generations"],
+        "server_peak_active": after["peak_active"],
+        "server_cancelled": after["cancelled"] - before["cancelled"],
+        "server_prompt_tokens": after["prompt_tokens"] - before["prompt_tokens"],
+        "server_cached_prompt_tokens": after["cached_prompt_tokens"] - before["cached_prompt_tokens"],
+        "server_output_tokens": after["output_tokens"] - before["output_tokens"],
+        "server_reloads": after["reloads"] - before["reloads"],
+        "server_loops": after["loops"] - before["loops"],
+        "new_connections": pool_after["created"] - pool_before["created"],
+        "reused_connections": pool_after["reused"] - pool_before["reused"],
+    })
+    server.stats.peak_active = server.stats.active
+    return result
+
+
+def formatValue(value):
+    if value is None:
+        return "-"
+    if isinstance(value, float):
+        return "%.3f" % value
+    return str(value)
+
+
+def printReport(results):
+    columns = [
+        "workload", "requests", "failures", "elapsed", "throughput", "p50", "p95", "max", "peak_threads",
+        "peak_memory_kb", "gui_calls", "server_generations", "server_peak_active", "new_connections",
+        "reused_connections"
+    ]
+    rows = [[formatValue(result.get(column)) for column in columns] for result in results]
+    widths = [max(len(column), *(len(row[i]) for row in rows)) for i, column in enumerate(columns)]
+    print("  ".join(column.rjust(width) for column, width in zip(columns, widths)))
+    for row in rows:
+        print("  ".join(value.rjust(width) for value, width in zip(row, widths)))
+    for result in results:
+        extra = {key: value for key, value in result.items() if key not in columns}
+        if extra:
+            print("%s: %s" % (result["workload"], ", ".join("%s=%s" % (k, formatValue(v)) for k, v in extra.items())))
+
+
+def parseOverrides(values):
+    overrides = {}
+    for value in values or []:
+        key, _sep, raw = value.partition("=")
+        try:
+            overrides[key] = json.loads(raw)
+        except ValueError:
+            overrides[key] = raw
+    return overrides
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Ollama Translator add-on against a fake Ollama server.")
+    parser.add_argument("--workloads", default="short,long,burst,list,dialog",
+                        help="comma separated list of: " + ", ".join(WORKLOADS))
+    parser.add_argument("--count", type=int, default=30, help="number of short strings")
+    parser.add_argument("--doc-chars", type=int, default=50000, help="size of the long document")
+    parser.add_argument("--burst", type=int, default=10, help="number of presses in the burst workload")
+    parser.add_argument("--burst-interval", type=float, default=0.02, help="seconds between burst presses")
+    parser.add_argument("--dialogs", type=int, default=4, help="number of concurrent dialog translations")
+    parser.add_argument("--targets", default="German,French,Spanish",
+                        help="languages of the targets workload, translated one by one and then together")
+    parser.add_argument("--dialog-sentences", type=int, default=5, help="sentences in each dialog translation")
+    parser.add_argument("--labels", type=int, default=20, help="distinct controls in the speech workload")
+    parser.add_argument("--focus-moves", type=int, default=60, help="focus changes in the speech workload")
+    parser.add_argument("--focus-interval", type=float, default=0.3, help="seconds between focus changes")
+    parser.add_argument("--copies", type=int, default=5, help="texts copied in the clipboard workload")
+    parser.add_argument("--copy-pause", type=float, default=3.0, help="seconds between copying and asking")
+    parser.add_argument("--rows", type=int, default=200, help="number of rows in the list workload")
+    parser.add_argument("--timeout", type=float, default=120.0, help="seconds to wait for each result")
+    parser.add_argument("--token-delay", type=float, default=0.005)
+    parser.add_argument("--load-delay", type=float, default=1.0)
+    parser.add_argument("--prompt-eval-rate", type=float, default=4000.0)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--stall-rate", type=float, default=0.0)
+    parser.add_argument("--stall-seconds", type=float, default=60.0)
+    parser.add_argument("--json-break-rate", type=float, default=0.0)
+    parser.add_argument("--loop-rate", type=float, default=0.0, help="probability that a generation loops")
+    parser.add_argument("--model", action="append", metavar="NAME=TOKEN_DELAY",
+                        help="serve another model with its own per-token delay, e.g. for model_tiers")
+    parser.add_argument("--cold", action="store_true", help="don't wait for the model to be preloaded")
+    parser.add_argument("--cache", action="store_true", help="leave the translation cache enabled")
+    parser.add_argument("--set", action="append", metavar="KEY=VALUE",
+                        help="override an add-on setting, VALUE is parsed as JSON when possible")
+    parser.add_argument("--json", metavar="PATH", help="also write the results to a JSON file")
+    parser.add_argument("--verbose", action="store_true", help="show the add-on's log output")
+    args = parser.parse_args(argv)
+
+    import logging
+    configPath = nvda_stubs.install(logLevel=logging.INFO if args.verbose else logging.CRITICAL)
+    server = FakeOllamaServer(FakeOllamaConfig(
+        token_delay=args.token_delay, load_delay=args.load_delay, prompt_eval_rate=args.prompt_eval_rate,
+        fail_rate=args.fail_rate, stall_rate=args.stall_rate, stall_seconds=args.stall_seconds,
+        json_break_rate=args.json_break_rate, loop_rate=args.loop_rate,
+        model_delays={name: float(delay) for name, delay in (item.split("=", 1) for item in args.model or [])}
+    )).start()
+
+    # The workloads are English text, so translate into another language or it would all be skipped
+    settings = {"ollama_url": server.generateUrl, "model": "llama3", "target_lang": "Turkish", "cache_enabled": args.cache}
+    settings.update(parseOverrides(args.set))
+    with open(os.path.join(configPath, "ollamaTranslator.json"), "w") as f:
+        json.dump(settings, f)
+
+    started = time.perf_counter()
+    import ollama_translator
+    imported = time.perf_counter()
+    plugin = ollama_translator.GlobalPlugin()
+    loaded = time.perf_counter()
+    # Deferred initialization runs on a background thread started from the GUI loop
+    plugin._ready.wait(args.timeout)
+    startup = {"import_ms": (imported - started) * 1000, "load_ms": (loaded - imported) * 1000,
+               "ready_ms": (time.perf_counter() - loaded) * 1000}
+    if not args.cold:
+        deadline = time.monotonic() + args.timeout
+        while plugin.warmer.state != "loaded" and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    results = []
+    try:
+        for name in [name.strip() for name in args.workloads.split(",") if name.strip()]:
+            if name not in WORKLOADS:
+                parser.error("unknown workload: " + name)
+            results.append(runWorkload(name, plugin, server, args))
+    finally:
+        plugin.terminate()
+        server.stop()
+
+    printReport(results)
+    print("startup: " + ", ".join("%s=%s" % (k, formatValue(v)) for k, v in startup.items()))
+    summary = plugin.telemetry.summary()
+    print("telemetry: " + ", ".join("%s=%s" % (k, formatValue(v)) for k, v in summary.items()))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"settings": settings, "startup": startup, "results": results, "telemetry": summary}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
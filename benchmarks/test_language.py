@@ -0,0 +1,73 @@
+# Checks the local language identification that decides whether text is skipped as already translated.
+#
+# Drives identifyLanguage and isNonLinguistic directly against the NVDA stubs; no server is needed. Run
+# from the repository root:
+#
+#     python -m pytest benchmarks/test_language.py
+#     python benchmarks/test_language.py
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import nvda_stubs  # noqa: E402
+
+nvda_stubs.install()
+
+import ollama_translator as addon  # noqa: E402
+
+
+class LanguageTest(unittest.TestCase):
+    def assertCertain(self, text, language):
+        self.assertEqual(addon.identifyLanguage(text), (language, True), text)
+
+    def assertNotCertain(self, text, language=None):
+        # language is what may still be named in the prompt
+        self.assertEqual(addon.identifyLanguage(text), (language, False), text)
+
+    def testShortInterfaceStrings(self):
+        for text in ("Cancel", "Open file", "Your changes were saved.", "Save as...", "3 items selected", "New folder"):
+            self.assertCertain(text, "English")
+        self.assertCertain("Datei öffnen", "German")
+        self.assertCertain("İptal", "Turkish")
+        self.assertCertain("Ouvrir le fichier", "French")
+        self.assertCertain("Отмена", "Russian")
+
+    def testSharedShortWordsAreNotCertain(self):
+        # "File" is also Italian and "OK" is in no word list
+        self.assertNotCertain("File")
+        self.assertNotCertain("OK")
+
+    def testNonLinguistic(self):
+        for text in ("12:45 PM", "3.5 MB", "https://example.com/a?b=c", "user@example.com", "C:\\Users\\a.txt", "42 %", "--"):
+            self.assertTrue(addon.isNonLinguistic(text), text)
+        self.assertFalse(addon.isNonLinguistic("Meeting at 12:45 PM"))
+
+    def testSentences(self):
+        self.assertCertain("This is the first paragraph of the document that you want to translate.", "English")
+        self.assertCertain("Bu belgenin ilk paragrafı ve bunu çevirmek için çok çalıştık.", "Turkish")
+        self.assertCertain("Das ist der erste Absatz, und er wird nicht übersetzt.", "German")
+        self.assertCertain("Это первый абзац документа, который мы хотим перевести.", "Russian")
+        self.assertCertain("Αυτή είναι η πρώτη παράγραφος του εγγράφου και θέλουμε να τη μεταφράσουμε.", "Greek")
+        self.assertCertain("هذا هو الفقرة الأولى من الوثيقة التي نريد أن نترجمها في هذا اليوم.", "Arabic")
+        self.assertCertain("यह दस्तावेज़ का पहला अनुच्छेद है और हम इसका अनुवाद करना चाहते हैं।", "Hindi")
+        self.assertCertain("これは文書の最初の段落です。", "Japanese")
+        self.assertCertain("이것은 문서의 첫 번째 단락입니다.", "Korean")
+
+    def testScriptNeighboursAreNeverCertain(self):
+        # Same script as an offered language: never skipped as that language
+        self.assertNotCertain("Це перший абзац документа, який ми хочемо перекласти.")
+        self.assertNotCertain("Скасувати")
+        self.assertNotCertain("این اولین پاراگراف سند است که ما می خواهیم آن را ترجمه کنیم.")
+        self.assertNotCertain("हा दस्तऐवजाचा पहिला परिच्छेद आहे आणि आम्हाला त्याचे भाषांतर करायचे आहे.")
+        self.assertNotCertain("Bu sənədin ilk paraqrafıdır və biz onu tərcümə etmək istəyirik.")
+
+    def testScriptAloneIsOnlyAHint(self):
+        self.assertNotCertain("Файлы проекта", "Russian")
+        self.assertNotCertain("東京都", "Chinese")
+
+
+if __name__ == "__main__":
+    unittest.main()
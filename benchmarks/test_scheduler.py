@@ -0,0 +1,86 @@
+# Checks that background (speculative) jobs cannot hold up interactive translations.
+#
+# Drives TranslationScheduler directly against the NVDA stubs; no server is needed. Run from the
+# repository root:
+#
+#     python -m pytest benchmarks/test_scheduler.py
+#     python benchmarks/test_scheduler.py
+
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import nvda_stubs  # noqa: E402
+
+nvda_stubs.install()
+
+import ollama_translator as addon  # noqa: E402
+
+GENERATION = 2.0
+
+
+class SchedulerTest(unittest.TestCase):
+    def setUp(self):
+        self.scheduler = addon.TranslationScheduler(workers=2, queue_size=16, max_in_flight=2, max_background=1)
+
+    def tearDown(self):
+        self.scheduler.shutdown()
+
+    def generate(self, started=None):
+        # Stands in for a streamed generation: waits for a backend slot, then holds it
+        job = addon.currentJob()
+        if started is not None:
+            started.append(time.monotonic())
+        with self.scheduler.slot("server", job):
+            deadline = time.monotonic() + GENERATION
+            while time.monotonic() < deadline:
+                job.check()
+                time.sleep(0.01)
+
+    def interactiveWait(self, background):
+        # Seconds between submitting an interactive job and it starting, with `background` jobs running
+        for _ in range(background):
+            self.scheduler.submit(self.generate, (), addon.PRIORITY_BACKGROUND)
+        time.sleep(0.1)
+        started = []
+        submitted = time.monotonic()
+        self.scheduler.submit(self.generate, (started,), addon.PRIORITY_INTERACTIVE)
+        deadline = submitted + 2 * GENERATION
+        while not started and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertTrue(started, "interactive job never started")
+        return started[0] - submitted
+
+    def testInteractiveStartsUnderBackgroundLoad(self):
+        # A prefetch job and a clipboard job at once must not take both workers
+        self.assertLess(self.interactiveWait(2), 0.5)
+
+    def testInteractiveStartsUnderBackgroundBacklog(self):
+        self.assertLess(self.interactiveWait(6), 0.5)
+
+    def testBackgroundJobsStillRun(self):
+        done = threading.Event()
+        count = []
+
+        def job():
+            count.append(1)
+            if len(count) == 3:
+                done.set()
+
+        for _ in range(3):
+            self.scheduler.submit(job, (), addon.PRIORITY_BACKGROUND)
+        self.assertTrue(done.wait(2))
+
+    def testSingleWorkerRunsBackground(self):
+        self.scheduler.configure(1, 16, 2, 1)
+        done = threading.Event()
+        self.scheduler.submit(done.set, (), addon.PRIORITY_BACKGROUND)
+        self.assertTrue(done.wait(2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,6 @@
+import time
+# Import time is reported with the other startup phases
+_importStarted = time.perf_counter()
 import os
 import socket
 import globalVars
@@ -7,21 +10,53 @@ import ui
 import wx
 import gui.settingsDialogs
 import json
-import urllib.request
+import urllib.parse
+import http.client
+import select
 import threading
+import math
+import random
+import hashlib
+import collections
+import heapq
+import itertools
+import contextlib
+import re
+import concurrent.futures
+import ctypes
 import api
 import textInfos
 import languageHandler
+import speech
 from logHandler import log
+try:
+    from speech.extensions import speechCanceled
+except ImportError:
+    # Without it stale utterances are only bounded by the queue size
+    speechCanceled = None
+try:
+    from speech.commands import BaseCallbackCommand, IndexCommand
+    SPEECH_SYNC_COMMANDS = (BaseCallbackCommand, IndexCommand)
+except ImportError:
+    # Older NVDA: a sequence with any command in it is left alone
+    SPEECH_SYNC_COMMANDS = (object,)
+_importsDone = time.perf_counter()
 
 # Localization
 TRANS = {
     "en": {
         "title": "Ollama Translator",
-        "ollama_url": "Ollama URL:",
+        "ollama_url": "Server URL:",
+        "backend": "Server type:",
+        "backend_ollama": "Ollama",
+        "backend_openai": "OpenAI-compatible (vLLM, LM Studio)",
+        "backend_llamacpp": "llama.cpp server",
         "model": "Model:",
         "source_lang": "Source Language:",
         "target_lang": "Target Language:",
+        "extra_target_langs": "Also translate into:",
+        "target_heading": "{}:",
+        "target_done": "{} ready.",
         "shortcut": "Translate Shortcut:",
         "shortcut_start": "Start Marker Shortcut:",
         "shortcut_end": "End Marker & Translate Shortcut:",
@@ -29,6 +64,7 @@ TRANS = {
         "translation": "Translation:",
         "translate": "Translate",
         "close": "Close",
+        "stop": "Stop",
         "translating": "Translating...",
         "no_text": "No text found to translate.",
         "success": "Translation successful.",
@@ -48,15 +84,64 @@ TRANS = {
         "marker_error": "Error creating text range. Markers must be in the same object.",
         "timeout_title": "Timeout Error",
         "timeout_message": "Translation timed out. Do you want to retry?",
+        "server_unavailable": "Ollama is not responding. Translations are paused for {} seconds.",
         "progress_started": "Translation started...",
-        "progress_update": "Translating... ({} chars)"
+        "cache_enabled": "Cache translations",
+        "cache_clear": "Clear translation cache",
+        "cache_cleared": "Translation cache cleared.",
+        "cache_stats": "Cache: {} entries, {} hits, {} misses",
+        "memory_enabled": "Reuse translations of repeated sentences (translation memory)",
+        "prefetch_enabled": "Translate the following paragraphs in the background (prefetch)",
+        "prefetch_paragraphs": "Paragraphs to translate ahead:",
+        "memory_stats": "Translation memory: {} of {} sentences reused, {} requests with similar examples",
+        "memory_hit_rate": "Sentences reused from translation memory: {}.",
+        "skipped_summary": "{} requests did not need the model (already in the target language or no words).",
+        "model_summary": "{}: {} requests, median {} seconds.",
+        "auto_translate": "Translate speech automatically",
+        "shortcut_auto": "Automatic Translation On/Off Shortcut:",
+        "auto_on": "Automatic translation on.",
+        "auto_off": "Automatic translation off.",
+        "auto_summary": "Automatic translation: {} utterances, {} reused, {} translated in time, {} spoken untranslated, {} dropped, at most {} waiting.",
+        "shortcut_clipboard": "Translate Clipboard Shortcut:",
+        "shortcut_clipboard_watch": "Clipboard Watching On/Off Shortcut:",
+        "clipboard_watch": "Watch the clipboard and translate copied text in the background",
+        "clipboard_speak": "Speak clipboard translations when they are ready",
+        "clipboard_on": "Watching the clipboard.",
+        "clipboard_off": "Stopped watching the clipboard.",
+        "clipboard_empty": "No text on the clipboard, or it is too long.",
+        "detect_language": "Detect the source language locally and skip text that needs no translation",
+        "progress_segments": "Translated {} of {} segments...",
+        "segments_failed": "{} of {} segments could not be translated and were left in the original language.",
+        "text_too_long": "Text too long to translate (limit {} chars). Please select a smaller chunk.",
+        "stream_speech": "Speak translation sentence by sentence while it is generated",
+        "keep_warm": "Keep the model loaded in memory",
+        "refresh_models": "Refresh model list",
+        "shortcut_stats": "Speak Statistics Shortcut:",
+        "export_stats": "Export statistics...",
+        "export_stats_desc": "Export translation performance statistics to JSON or CSV",
+        "stats_exported": "Statistics exported to {}",
+        "stats_empty": "No translations recorded yet.",
+        "stats_summary": "{} requests, {} errors. Median {} seconds, 95th percentile {} seconds, first token after {} seconds. {} tokens per second. Cache hit rate {}.",
+        "not_available": "not available",
+        "busy": "Too many translations are waiting. Please try again in a moment.",
+        "model_state": "Model status: {}",
+        "state_cold": "cold",
+        "state_loading": "loading",
+        "state_loaded": "loaded"
     },
     "tr": {
         "title": "Ollama Çevirici",
-        "ollama_url": "Ollama URL:",
+        "ollama_url": "Sunucu URL'si:",
+        "backend": "Sunucu türü:",
+        "backend_ollama": "Ollama",
+        "backend_openai": "OpenAI uyumlu (vLLM, LM Studio)",
+        "backend_llamacpp": "llama.cpp sunucusu",
         "model": "Model:",
         "source_lang": "Kaynak Dil:",
         "target_lang": "Hedef Dil:",
+        "extra_target_langs": "Ayrıca şu dillere çevir:",
+        "target_heading": "{}:",
+        "target_done": "{} hazır.",
         "shortcut": "Çeviri Kısayolu:",
         "shortcut_start": "Başlangıç İşaretçisi Kısayolu:",
         "shortcut_end": "Bitiş İşaretçisi ve Çevir Kısayolu:",
@@ -64,6 +149,7 @@ TRANS = {
         "translation": "Çeviri:",
         "translate": "Çevir",
         "close": "Kapat",
+        "stop": "Durdur",
         "translating": "Çevriliyor...",
         "no_text": "Çevrilecek metin bulunamadı.",
         "success": "Çeviri başarılı.",
@@ -83,8 +169,50 @@ TRANS = {
         "marker_error": "Metin aralığı oluşturulurken hata. İşaretçiler aynı nesne üzerinde olmalıdır.",
         "timeout_title": "Zaman Aşımı Hatası",
         "timeout_message": "Çeviri zaman aşımına uğradı. Tekrar denemek ister misiniz?",
+        "server_unavailable": "Ollama yanıt vermiyor. Çeviriler {} saniye duraklatıldı.",
         "progress_started": "Çeviri başladı...",
-        "progress_update": "Çevriliyor... ({} karakter)"
+        "cache_enabled": "Çevirileri önbelleğe al",
+        "cache_clear": "Çeviri önbelleğini temizle",
+        "cache_cleared": "Çeviri önbelleği temizlendi.",
+        "cache_stats": "Önbellek: {} kayıt, {} isabet, {} ıskalama",
+        "memory_enabled": "Tekrarlanan cümlelerin çevirilerini yeniden kullan (çeviri belleği)",
+        "prefetch_enabled": "Sonraki paragrafları arka planda çevir (önceden çeviri)",
+        "prefetch_paragraphs": "Önceden çevrilecek paragraf sayısı:",
+        "memory_stats": "Çeviri belleği: {} / {} cümle yeniden kullanıldı, {} istekte benzer örnekler verildi",
+        "memory_hit_rate": "Çeviri belleğinden yeniden kullanılan cümleler: {}.",
+        "skipped_summary": "{} istek modele gönderilmedi (zaten hedef dilde ya da sözcük içermiyor).",
+        "model_summary": "{}: {} istek, ortanca {} saniye.",
+        "auto_translate": "Konuşmayı otomatik çevir",
+        "shortcut_auto": "Otomatik Çeviriyi Açma/Kapatma Kısayolu:",
+        "auto_on": "Otomatik çeviri açık.",
+        "auto_off": "Otomatik çeviri kapalı.",
+        "auto_summary": "Otomatik çeviri: {} konuşma, {} yeniden kullanıldı, {} zamanında çevrildi, {} çevrilmeden seslendirildi, {} atlandı, en çok {} bekleyen.",
+        "shortcut_clipboard": "Panoyu Çevirme Kısayolu:",
+        "shortcut_clipboard_watch": "Pano İzlemeyi Açma/Kapatma Kısayolu:",
+        "clipboard_watch": "Panoyu izle ve kopyalanan metni arka planda çevir",
+        "clipboard_speak": "Pano çevirilerini hazır olduklarında seslendir",
+        "clipboard_on": "Pano izleniyor.",
+        "clipboard_off": "Pano izleme durduruldu.",
+        "clipboard_empty": "Panoda metin yok ya da metin çok uzun.",
+        "detect_language": "Kaynak dili yerel olarak algıla ve çeviri gerektirmeyen metni atla",
+        "progress_segments": "{} / {} bölüm çevrildi...",
+        "segments_failed": "{} / {} bölüm çevrilemedi ve özgün dilinde bırakıldı.",
+        "text_too_long": "Metin çevrilemeyecek kadar uzun (sınır {} karakter). Lütfen daha küçük bir bölüm seçin.",
+        "stream_speech": "Çeviriyi üretilirken cümle cümle seslendir",
+        "keep_warm": "Modeli bellekte yüklü tut",
+        "refresh_models": "Model listesini yenile",
+        "shortcut_stats": "İstatistikleri Seslendirme Kısayolu:",
+        "export_stats": "İstatistikleri dışa aktar...",
+        "export_stats_desc": "Çeviri performans istatistiklerini JSON veya CSV olarak dışa aktar",
+        "stats_exported": "İstatistikler {} konumuna aktarıldı",
+        "stats_empty": "Henüz kaydedilmiş çeviri yok.",
+        "stats_summary": "{} istek, {} hata. Ortanca {} saniye, yüzde 95'lik dilim {} saniye, ilk sözcük {} saniye sonra. Saniyede {} sözcük. Önbellek isabet oranı {}.",
+        "not_available": "yok",
+        "busy": "Bekleyen çok fazla çeviri var. Lütfen birazdan tekrar deneyin.",
+        "model_state": "Model durumu: {}",
+        "state_cold": "yüklü değil",
+        "state_loading": "yükleniyor",
+        "state_loaded": "yüklü"
     }
 }
 
@@ -97,15 +225,90 @@ def _(key):
 # Configuration defaults
 DEFAULT_CONFIG = {
     "ollama_url": "http://localhost:11434/api/generate",
+    "backend": "ollama",
     "model": "llama3",
     "source_lang": "Auto",
     "target_lang": "English",
+    "extra_target_langs": [],
     "shortcut": "kb:NVDA+shift+t",
     "shortcut_start": "kb:NVDA+shift+k",
-    "shortcut_end": "kb:NVDA+shift+l"
+    "shortcut_end": "kb:NVDA+shift+l",
+    "shortcut_stats": "kb:NVDA+shift+j",
+    "shortcut_auto": "kb:NVDA+shift+y",
+    "shortcut_clipboard": "kb:NVDA+shift+c",
+    "shortcut_clipboard_watch": "kb:NVDA+shift+w",
+    "cache_enabled": True,
+    "cache_memory_entries": 256,
+    "cache_max_entries": 5000,
+    "cache_max_age_days": 30,
+    "memory_enabled": True,
+    "memory_max_entries": 20000,
+    "memory_hint_threshold": 0.6,
+    "max_text_chars": 100000,
+    "segment_chars": 1500,
+    "max_parallel_segments": 3,
+    "stream_speech": False,
+    "render_interval": 0.1,
+    "keep_alive": "30m",
+    "keep_warm": False,
+    "keep_warm_interval": 240,
+    "worker_threads": 2,
+    "queue_size": 16,
+    "max_in_flight": 3,
+    "adaptive_options": True,
+    "chars_per_token": 3,
+    "predict_ratio": 2.0,
+    "predict_min": 64,
+    "context_min": 2048,
+    "context_max": 16384,
+    "generation_options": {"temperature": 0},
+    "model_options": {},
+    "model_tiers": [],
+    "health_interval": 15,
+    "connect_timeout": 3,
+    "first_token_timeout": 120,
+    "inter_token_timeout": 15,
+    "request_deadline": 180,
+    "max_retries": 3,
+    "retry_backoff": 0.5,
+    "breaker_threshold": 3,
+    "breaker_cooldown": 15,
+    "detect_language": True,
+    "document_sessions": True,
+    "session_max_chars": 4000,
+    "session_ttl": 600,
+    "max_sessions": 8,
+    "batch_enabled": True,
+    "batch_item_chars": 120,
+    "batch_max_items": 100,
+    "batch_max_chars": 3000,
+    "auto_translate": False,
+    "auto_budget": 0.8,
+    "auto_queue": 4,
+    "auto_recent_entries": 2000,
+    "clipboard_watch": False,
+    "clipboard_speak": False,
+    "clipboard_interval": 0.5,
+    "clipboard_debounce": 0.6,
+    "clipboard_max_chars": 5000,
+    "prefetch_enabled": False,
+    "prefetch_paragraphs": 3,
+    "prefetch_max_chars": 4000,
+    "prefetch_in_flight": 1
 }
 
 CONFIG_FILE = os.path.join(globalVars.appArgs.configPath, "ollamaTranslator.json")
+CACHE_FILE = os.path.join(globalVars.appArgs.configPath, "ollamaTranslatorCache.json")
+MEMORY_FILE = os.path.join(globalVars.appArgs.configPath, "ollamaTranslatorMemory.json")
+
+PROMPT_TEMPLATE = "Translate the following text from {source} to {target}. Only output the translation, nothing else. Text: {text}"
+# System prompt of document sessions (/api/chat); it stays the same for every segment so the server
+# can reuse its cached prompt, and earlier segments follow as conversation turns
+SYSTEM_PROMPT_TEMPLATE = "Translate every message from {source} to {target}. Only output the translation, nothing else."
+# Many short items (list rows, menu labels, table cells) are sent together as one JSON object
+PACKED_PROMPT_TEMPLATE = "Translate the values of the following JSON object from {source} to {target}. Reply with a JSON object that has exactly the same keys and the translated values, nothing else. JSON: {text}"
+# Prepended to the prompt when the translation memory knows similar sentences
+HINT_TEMPLATE = "Earlier translations of similar sentences, keep the wording consistent with them:\n{}\n\n"
 
 # Supported Languages
 LANGUAGES = [
@@ -115,27 +318,2805 @@ LANGUAGES = [
     "Swedish", "Norwegian", "Danish", "Finnish", "Greek"
 ]
 
+def normalizeText(text):
+    # Collapse whitespace so re-reading the same text with different line breaks hits the cache
+    return " ".join(text.split())
+
+class TranslationError(Exception):
+    # Raised for failures that should be reported to the user as-is
+    pass
+
+class ServerError(TranslationError):
+    # HTTP 5xx from Ollama (overloaded, runner crashed); worth retrying, unlike a 4xx
+    pass
+
+class ServerUnavailable(TranslationError):
+    # Every server is cut off by its circuit breaker
+    pass
+
+# Sentence ends: Latin/Greek/Cyrillic punctuation followed by whitespace, Devanagari danda,
+# Arabic question mark, CJK full stops which are not followed by spaces, and line breaks.
+SENTENCE_BOUNDARY_RE = re.compile(r"(?<=[.!?\u2026\u037e\u0964\u061f])\s+|(?<=[\u3002\uff01\uff1f])|\n\s*")
+# Pieces ending in an initial, a list number or a common abbreviation are not sentence ends
+ABBREVIATION_RE = re.compile(r"(?:\b\w|\b(?:Mr|Mrs|Ms|Dr|Prof|St|vs|etc|Nr|No|Inc|Ltd|Jr|Sr|bzw|usw|vb|Sn))\.[ \t]*$", re.IGNORECASE)
+
+def splitSentences(text):
+    sentences = []
+    start = 0
+    for match in SENTENCE_BOUNDARY_RE.finditer(text):
+        if match.end() > start:
+            sentences.append(text[start:match.end()])
+            start = match.end()
+    if start < len(text):
+        sentences.append(text[start:])
+    merged = []
+    for sentence in sentences:
+        if merged and ABBREVIATION_RE.search(merged[-1]):
+            merged[-1] += sentence
+        else:
+            merged.append(sentence)
+    return merged
+
+def isSentenceComplete(piece):
+    # True when a piece returned by splitSentences is known to end its sentence, even if more text follows
+    if ABBREVIATION_RE.search(piece):
+        return False
+    return any(match.end() == len(piece) for match in SENTENCE_BOUNDARY_RE.finditer(piece))
+
+class SentenceStreamer(object):
+    # Collects streamed text and hands out complete sentences as soon as they are finished
+    def __init__(self, onSentence):
+        self.onSentence = onSentence
+        self._buffer = ""
+        self.received = False
+
+    def feed(self, chunk):
+        if not chunk:
+            return
+        self.received = True
+        self._buffer += chunk
+        sentences = splitSentences(self._buffer)
+        self._buffer = ""
+        if sentences and not isSentenceComplete(sentences[-1]):
+            self._buffer = sentences.pop()
+        for sentence in sentences:
+            self._emit(sentence)
+
+    def finish(self, text=None):
+        # Flush the remainder; text is used when nothing was streamed (e.g. a cache hit)
+        if not self.received and text:
+            self.feed(text)
+        remainder, self._buffer = self._buffer, ""
+        self._emit(remainder)
+
+    def _emit(self, sentence):
+        sentence = sentence.strip()
+        if sentence:
+            self.onSentence(sentence)
+
+class TextRenderer(object):
+    # Shows streamed text in a read-only text control. Chunks from worker threads are collected and
+    # appended at most once per interval with one GUI call, so the GUI thread's work doesn't grow with the token rate.
+    def __init__(self, control, interval=0.1):
+        self.control = control
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._pending = []
+        self._scheduled = False
+        self._stopped = False
+        self._lastFlush = 0.0
+        # True while the control shows a status message that streamed text replaces
+        self._replace = True
+
+    def feed(self, chunk):
+        # Any thread
+        if not chunk:
+            return
+        with self._lock:
+            if self._stopped:
+                return
+            self._pending.append(chunk)
+            if self._scheduled:
+                return
+            self._scheduled = True
+            delay = self._lastFlush + self.interval - time.monotonic()
+        if delay > 0:
+            wx.CallAfter(wx.CallLater, int(delay * 1000) + 1, self._flush)
+        else:
+            wx.CallAfter(self._flush)
+
+    def _take(self):
+        with self._lock:
+            text = "".join(self._pending)
+            self._pending = []
+            self._scheduled = False
+            self._lastFlush = time.monotonic()
+        return text
+
+    def _flush(self):
+        # GUI thread
+        text = self._take()
+        if not text or not self.control:
+            return
+        if self._replace:
+            self.control.SetValue(text)
+            self._replace = False
+        else:
+            self.control.AppendText(text)
+
+    def show(self, text):
+        # GUI thread: status messages, errors and the final translation. The final text is usually what
+        # was already streamed, and is then left alone so the reading position is kept.
+        pending = self._take()
+        if self._stopped or not self.control:
+            return
+        rendered = pending if self._replace else self.control.GetValue() + pending
+        if not self._replace and rendered.strip() == text.strip():
+            if pending:
+                self.control.AppendText(pending)
+            return
+        self.control.SetValue(text)
+        self._replace = True
+
+    def stop(self):
+        # GUI thread: show what has arrived and ignore the rest
+        with self._lock:
+            self._stopped = True
+        self._flush()
+
+def _splitLong(text, max_chars):
+    # Split an oversized paragraph at sentence boundaries, then at whitespace as a last resort
+    pieces = []
+    for sentence in splitSentences(text):
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(" ", 0, max_chars)
+            if cut <= 0:
+                cut = max_chars
+            pieces.append(sentence[:cut + 1] if sentence[cut:cut + 1] == " " else sentence[:cut])
+            sentence = sentence[len(pieces[-1]):]
+        if sentence:
+            pieces.append(sentence)
+    return pieces
+
+def splitSegments(paragraphs, max_chars):
+    # Group paragraphs (e.g. from getTextInChunks(UNIT_PARAGRAPH)) into segments of at most max_chars.
+    # Joining the returned segments gives back the original text.
+    if isinstance(paragraphs, str):
+        paragraphs = paragraphs.splitlines(True)
+    pieces = []
+    for paragraph in paragraphs:
+        if len(paragraph) <= max_chars:
+            pieces.append(paragraph)
+        else:
+            pieces.extend(_splitLong(paragraph, max_chars))
+    segments = []
+    current = []
+    length = 0
+    for piece in pieces:
+        if current and length + len(piece) > max_chars:
+            segments.append("".join(current))
+            current = []
+            length = 0
+        current.append(piece)
+        length += len(piece)
+    if current:
+        segments.append("".join(current))
+    return segments
+
+# Local language identification. Non-Latin scripts suggest the language directly; Latin script text
+# is scored on frequent function words and letters that only some languages use. Only confident
+# results are returned, so short or ambiguous text still goes to the model with "Auto".
+LANGUAGE_SCRIPTS = [
+    ("Greek", "\u0370", "\u03ff"), ("Russian", "\u0400", "\u04ff"), ("Arabic", "\u0600", "\u06ff"),
+    ("Hindi", "\u0900", "\u097f"), ("Japanese", "\u3040", "\u30ff"), ("Korean", "\uac00", "\ud7af"),
+    ("Korean", "\u1100", "\u11ff"), ("Chinese", "\u4e00", "\u9fff")
+]
+LANGUAGE_WORDS = {
+    "English": "the and of to is in that it you for with this are was on be have not your from will can has or by at what",
+    "Turkish": "ve bir bu için ile çok daha gibi olarak ama değil var yok mı mi sonra kadar olan her ben şu veya ise",
+    "Spanish": "el la los las de que y en un una es por con para no se del al lo como más pero está su",
+    "French": "le la les de des et est un une du en que qui pas pour dans sur au avec ce il vous nous je ne sont été sera cette mais très aux ces votre avez êtes",
+    "German": "der die das und ist nicht ein eine zu den mit von sich auf für im dem es sie ich auch wird oder wir wurde wurden bitte kann haben sind nur noch werden einen einer",
+    "Italian": "il di che e la le un una per non sono con del della è gli si da ma anche questo come più nel",
+    "Portuguese": "o a os as de que e do da em um uma para com não por se na no mais dos das ao como é você",
+    "Dutch": "de het een en van is dat niet op te in zijn met voor er ook je wat aan maar dit bij wordt naar geen worden bent kunt deze uw",
+    "Polish": "i w z na się nie jest to że do o jak co ale po od za tak czy przez dla są",
+    "Swedish": "och att det är som en på för av med den till inte har jag om ett de var kan vi men så eller",
+    "Norwegian": "og i det er som på en til av for med at ikke har den de jeg om et var kan vi men så eller seg hva etter",
+    "Danish": "og i det er at som på en til af for med ikke har den de jeg om et var kan vi men så eller sig hvad efter",
+    "Finnish": "ja on ei se että oli ovat mutta tai kun tämä niin ole myös joka hän kuin jos vain sen mitä",
+    "Russian": "и что это как он она они его её был была было были все также только если или когда который которые чтобы мы вы нет уже ещё может",
+    "Greek": "και το η της του την να στο με για από που είναι σε τα οι δεν θα ένα μια των στην",
+    "Arabic": "في من على إلى أن هذا التي الذي عن مع كان هذه لا هو قد ذلك بين كل أو لم ما",
+    "Hindi": "है और के की में से को का एक यह पर हैं भी नहीं तो कि लिए था इस हो गया या"
+}
+# Languages not offered in the settings that share a script with one that is. They only compete in the
+# scoring, so Ukrainian is not taken for Russian, Persian for Arabic or Marathi for Hindi.
+NEIGHBOUR_WORDS = {
+    "Ukrainian": "і й що це як та але від він вона вони ми ви його її був була було були також тільки якщо або коли який які щоб ні вже ще може",
+    "Bulgarian": "че това като са ще което които този тази беше бяха няма",
+    "Persian": "و در به از که این را با است می آن برای یک تا شد هم نیز",
+    "Urdu": "کے کی ہے میں اور سے کو کا یہ نہیں ہیں پر بھی",
+    "Marathi": "आणि आहे हे या व ते त्या आहेत होते मी तर पण नाही केले",
+    "Nepali": "र छ यो पनि छन् गर्न भएको थियो हुन्छ मेरो तर गरेको को मा"
+}
+# Letters a neighbour uses but the language itself does not; any of them rules the language out
+NEIGHBOUR_LETTERS = {
+    "Russian": set("іїєґўјљњћџѓќѕ"), "Arabic": set("پچژگکیٹڈڑںے"), "Hindi": set("ळ"), "Turkish": set("ə")
+}
+# Words of interface text: short labels, buttons and messages are the most common thing to translate and
+# rarely contain function words. Text of up to SHORT_TEXT_WORDS words is identified when all of its words
+# belong to exactly one language in common.
+LANGUAGE_UI_WORDS = {
+    "English": "cancel open file files save as close settings help edit view delete new folder print exit yes back next "
+        "finish apply copy paste cut undo redo search replace select selected items item loading download downloads "
+        "complete completed changes saved were been error warning size add remove update install installed restart "
+        "play continue retry refresh sign log account password user home window tools about share show hide done "
+        "successfully failed please wait",
+    "Turkish": "iptal tamam aç kaydet kapat ayarlar seçenekler yardım düzenle görünüm sil yeni klasör yazdır çıkış evet "
+        "hayır geri ileri bitir uygula kopyala yapıştır kes al yinele ara bul değiştir seç tümünü seçili öğe öğeler "
+        "yükleniyor indir indirme tamamlandı değişiklikler kaydedildi hata uyarı ad boyut tarih tür ekle kaldır "
+        "güncelle yükle yeniden başlat durdur oynat duraklat devam dosya dosyalar pencere araçlar hakkında sürüm "
+        "gönder paylaş göster gizle liste bitti lütfen bekleyin",
+    "German": "abbrechen öffnen datei dateien speichern unter schließen einstellungen optionen hilfe bearbeiten ansicht "
+        "löschen neu neuer ordner drucken beenden ja nein zurück weiter fertig übernehmen kopieren einfügen ausschneiden "
+        "rückgängig suchen ersetzen auswählen alle ausgewählt elemente element lädt herunterladen abgeschlossen "
+        "änderungen gespeichert fehler warnung größe datum typ hinzufügen entfernen aktualisieren installieren neustart "
+        "starten anhalten fortsetzen wiederholen konto passwort benutzer startseite seite fenster extras über senden "
+        "teilen mehr weniger anzeigen ausblenden liste name erfolgreich warten",
+    "French": "annuler ouvrir fichier fichiers enregistrer sous fermer paramètres aide modifier affichage supprimer nouveau "
+        "nouvelle dossier imprimer quitter oui non retour suivant terminer appliquer copier coller couper rechercher "
+        "remplacer sélectionner tout sélectionnés éléments élément chargement télécharger terminé modifications "
+        "enregistrées erreur avertissement nom taille ajouter mettre jour installer redémarrer démarrer arrêter lecture "
+        "continuer réessayer actualiser compte mot passe utilisateur accueil fenêtre outils propos envoyer partager "
+        "plus moins afficher masquer liste succès patienter",
+    "Spanish": "cancelar abrir archivo archivos guardar como cerrar configuración opciones ayuda editar ver eliminar nuevo "
+        "nueva carpeta imprimir salir sí atrás siguiente finalizar aplicar copiar pegar cortar deshacer buscar reemplazar "
+        "seleccionar todo seleccionados elementos elemento cargando descargar completado cambios guardados advertencia "
+        "nombre tamaño fecha tipo agregar añadir quitar actualizar instalar reiniciar iniciar detener reproducir "
+        "continuar reintentar cuenta contraseña usuario inicio página ventana herramientas acerca versión enviar "
+        "compartir menos mostrar ocultar lista correctamente espere",
+    "Italian": "annulla apri file salva con nome chiudi impostazioni opzioni aiuto modifica visualizza elimina nuovo nuova "
+        "cartella stampa esci sì indietro avanti fine applica copia incolla taglia cerca sostituisci seleziona tutto "
+        "selezionati elementi elemento caricamento scarica completato modifiche salvate errore avviso dimensione data "
+        "tipo aggiungi rimuovi aggiorna installa riavvia avvia interrompi riproduci continua riprova account password "
+        "utente home pagina finestra strumenti informazioni versione invia condividi mostra nascondi elenco successo "
+        "attendere",
+    "Portuguese": "cancelar abrir arquivo arquivos ficheiro salvar guardar como fechar configurações opções ajuda editar "
+        "exibir excluir eliminar novo nova pasta imprimir sair sim voltar próximo concluir aplicar copiar colar recortar "
+        "desfazer pesquisar procurar substituir selecionar tudo selecionados itens item carregando baixar transferir "
+        "concluído alterações salvas erro aviso nome tamanho data tipo adicionar remover atualizar instalar reiniciar "
+        "iniciar parar reproduzir continuar conta senha usuário utilizador início página janela ferramentas sobre versão "
+        "enviar compartilhar partilhar menos mostrar ocultar lista sucesso aguarde",
+    "Dutch": "annuleren openen bestand bestanden opslaan als sluiten instellingen opties help bewerken beeld verwijderen "
+        "nieuw nieuwe map afdrukken afsluiten ja nee terug volgende voltooien toepassen kopiëren plakken knippen "
+        "ongedaan zoeken vervangen selecteren alles geselecteerd items item laden downloaden voltooid wijzigingen "
+        "opgeslagen fout waarschuwing naam grootte datum type toevoegen bijwerken installeren herstarten starten "
+        "stoppen afspelen pauzeren doorgaan opnieuw account wachtwoord gebruiker startpagina pagina venster extra "
+        "over versie verzenden delen meer minder weergeven verbergen lijst geslaagd wachten",
+    "Polish": "anuluj otwórz plik pliki zapisz jako zamknij ustawienia opcje pomoc edytuj widok usuń nowy nowa nowy folder "
+        "drukuj zakończ tak wstecz dalej zastosuj kopiuj wklej wytnij cofnij szukaj znajdź zamień zaznacz wszystko "
+        "zaznaczone elementy element ładowanie pobierz pobieranie ukończono zmiany zapisane błąd ostrzeżenie nazwa "
+        "rozmiar data typ dodaj aktualizuj zainstaluj uruchom zatrzymaj odtwórz wstrzymaj kontynuuj ponów konto hasło "
+        "użytkownik strona okno narzędzia wersja wyślij udostępnij więcej mniej pokaż ukryj lista pomyślnie czekaj",
+    "Swedish": "avbryt öppna fil filer spara som stäng inställningar alternativ hjälp redigera visa ta bort ny nytt mapp "
+        "skriv ut avsluta ja nej tillbaka nästa slutför verkställ kopiera klistra klipp ångra sök ersätt markera alla "
+        "markerade objekt laddar ladda ner klar ändringar sparade fel varning namn storlek datum typ lägg uppdatera "
+        "installera starta stoppa spela pausa fortsätt försök igen konto lösenord användare startsida sida fönster "
+        "verktyg version skicka dela mer mindre dölj lista vänta",
+    "Norwegian": "avbryt åpne fil filer lagre som lukk innstillinger alternativer hjelp rediger vis slett ny nytt mappe skriv "
+        "ut avslutt ja nei tilbake neste fullfør bruk kopier lim klipp angre søk erstatt merk alle valgt elementer "
+        "laster last ned fullført endringer lagret feil advarsel navn størrelse dato type legg fjern oppdater "
+        "installer start nytt stopp spill pause fortsett prøv igjen konto passord bruker hjem side vindu verktøy "
+        "versjon send del mer mindre skjul liste vent",
+    "Danish": "annuller åbn fil filer gem som luk indstillinger muligheder hjælp rediger vis slet ny nyt mappe udskriv afslut "
+        "ja nej tilbage næste udfør anvend kopier indsæt klip fortryd søg find erstat vælg alle valgte elementer "
+        "indlæser hent fuldført ændringer gemt fejl advarsel navn størrelse dato type tilføj fjern opdater installer "
+        "genstart stop afspil pause fortsæt prøv igen konto adgangskode bruger hjem side vindue værktøjer version "
+        "send del mere mindre skjul liste vent",
+    "Finnish": "peruuta avaa tiedosto tiedostot tallenna nimellä sulje asetukset valinnat ohje muokkaa näytä poista uusi "
+        "kansio tulosta lopeta kyllä takaisin seuraava valmis käytä kopioi liitä leikkaa kumoa etsi hae korvaa valitse "
+        "kaikki valitut kohteet kohde ladataan lataa muutokset tallennettu virhe varoitus nimi koko päivämäärä tyyppi "
+        "lisää päivitä asenna käynnistä uudelleen pysäytä toista tauko jatka yritä tili salasana käyttäjä koti sivu "
+        "ikkuna työkalut tietoja versio lähetä jaa enemmän vähemmän piilota luettelo odota",
+    "Russian": "отмена открыть файл файлы сохранить закрыть настройки параметры справка изменить вид удалить новый новая "
+        "папка печать выход да назад далее готово применить копировать вставить вырезать отменить поиск найти заменить "
+        "выделить выбрать выбрано элементы элемент загрузка скачать завершено изменения сохранены ошибка "
+        "предупреждение имя размер дата тип добавить обновить установить перезапустить запустить остановить "
+        "воспроизвести пауза продолжить повторить пароль пользователь главная страница окно инструменты программе "
+        "версия отправить поделиться больше меньше показать скрыть список меню подождите успешно",
+    "Greek": "ακύρωση άνοιγμα αρχείο αρχεία αποθήκευση κλείσιμο ρυθμίσεις επιλογές βοήθεια επεξεργασία προβολή διαγραφή "
+        "νέο νέος φάκελος εκτύπωση έξοδος ναι όχι πίσω επόμενο τέλος εφαρμογή αντιγραφή επικόλληση αποκοπή αναίρεση "
+        "αναζήτηση εύρεση αντικατάσταση επιλογή όλα επιλεγμένα στοιχεία φόρτωση λήψη ολοκληρώθηκε αλλαγές "
+        "αποθηκεύτηκαν σφάλμα προειδοποίηση όνομα μέγεθος ημερομηνία τύπος προσθήκη κατάργηση ενημέρωση εγκατάσταση "
+        "επανεκκίνηση έναρξη διακοπή αναπαραγωγή παύση συνέχεια λογαριασμός κωδικός χρήστης αρχική σελίδα παράθυρο "
+        "εργαλεία σχετικά έκδοση αποστολή κοινή χρήση περισσότερα λιγότερα εμφάνιση απόκρυψη λίστα μενού περιμένετε",
+    "Arabic": "إلغاء فتح ملف الملفات حفظ إغلاق الإعدادات خيارات مساعدة تحرير عرض حذف جديد مجلد طباعة خروج نعم رجوع "
+        "التالي إنهاء تطبيق نسخ لصق قص تراجع بحث استبدال تحديد الكل المحدد العناصر عنصر جار التحميل تنزيل اكتمل "
+        "التغييرات خطأ تحذير الاسم الحجم التاريخ النوع إضافة إزالة تحديث تثبيت إعادة تشغيل إيقاف متابعة الحساب "
+        "كلمة المرور المستخدم الرئيسية الصفحة نافذة أدوات حول الإصدار إرسال مشاركة المزيد إظهار إخفاء قائمة الانتظار",
+    "Hindi": "रद्द खोलें फ़ाइल फाइल सहेजें बंद सेटिंग्स विकल्प सहायता संपादित देखें हटाएं हटाएँ नया फ़ोल्डर प्रिंट बाहर हाँ वापस "
+        "अगला समाप्त लागू कॉपी पेस्ट काटें खोजें बदलें चुनें सभी चयनित आइटम लोड डाउनलोड पूर्ण परिवर्तन सहेजे त्रुटि चेतावनी "
+        "नाम आकार दिनांक प्रकार जोड़ें अपडेट इंस्टॉल पुनः प्रारंभ रोकें चलाएं जारी खाता पासवर्ड उपयोगकर्ता होम पृष्ठ "
+        "विंडो उपकरण बारे संस्करण भेजें साझा अधिक कम दिखाएं छिपाएं सूची मेनू प्रतीक्षा करें"
+}
+NEIGHBOUR_UI_WORDS = {
+    "Ukrainian": "скасувати відкрити файл зберегти закрити налаштування параметри довідка змінити вигляд видалити новий "
+        "нова папка друк вихід так назад далі готово застосувати копіювати вставити пошук знайти замінити вибрати "
+        "вибрано елементи завантаження помилка попередження розмір дата тип додати оновити встановити пароль "
+        "користувач сторінка вікно інструменти версія надіслати показати приховати список меню зачекайте",
+    "Bulgarian": "отказ отвори файл запази затвори настройки помощ редактирай изглед изтрий нов нова папка печат изход да "
+        "назад напред готово приложи копирай постави търси намери замени избери всички избрани грешка "
+        "предупреждение име размер дата тип добави обнови инсталирай парола потребител страница прозорец "
+        "инструменти версия изпрати покажи скрий списък меню",
+    "Persian": "لغو باز کردن پرونده فایل ذخیره بستن تنظیمات راهنما ویرایش حذف جدید پوشه چاپ خروج بله خیر بازگشت بعدی",
+    "Marathi": "रद्द करा उघडा फाइल जतन बंद सेटिंग्ज मदत संपादित हटवा नवीन फोल्डर बाहेर होय मागे पुढील लागू शोधा निवडा "
+        "सर्व त्रुटी चेतावणी नाव आकार"
+}
+SHORT_TEXT_WORDS = 4
+# Simplified and traditional characters that Japanese does not use, standing in for words in Chinese text;
+# the simplified forms of common interface words are among them
+CHINESE_MARKERS = set("这這们們个吗嗎呢么麼没沒说还过开关设删编确载页览击选项")
+def wordLanguages(*tables):
+    # Each word maps to the languages using it; shared words count for less. Built in one pass, since it runs at import.
+    words = collections.defaultdict(set)
+    for table in tables:
+        for language, text in table.items():
+            words[language].update(text.split())
+    languages = {}
+    for language, vocabulary in words.items():
+        for word in vocabulary:
+            languages[word] = languages.get(word, ()) + (language,)
+    return languages
+LANGUAGE_WORDS = wordLanguages(LANGUAGE_WORDS, LANGUAGE_UI_WORDS, NEIGHBOUR_WORDS, NEIGHBOUR_UI_WORDS)
+LANGUAGE_LETTERS = {
+    "ğ": ("Turkish",), "ı": ("Turkish",), "ş": ("Turkish",), "ñ": ("Spanish",), "¿": ("Spanish",), "¡": ("Spanish",),
+    "ß": ("German",), "œ": ("French",), "ã": ("Portuguese",), "õ": ("Portuguese",),
+    "ą": ("Polish",), "ę": ("Polish",), "ł": ("Polish",), "ń": ("Polish",), "ś": ("Polish",), "ź": ("Polish",),
+    "ż": ("Polish",), "ć": ("Polish",), "æ": ("Norwegian", "Danish"), "ø": ("Norwegian", "Danish"),
+    "å": ("Swedish", "Norwegian", "Danish"),
+    "ê": ("French", "Portuguese"), "è": ("French", "Italian"), "ç": ("French", "Portuguese", "Turkish"),
+    "ï": ("French", "Dutch"), "ü": ("German", "Turkish"), "ä": ("German", "Swedish", "Finnish"),
+    "ö": ("German", "Turkish", "Swedish", "Finnish")
+}
+# URLs, e-mail addresses, paths, times of day ("12:45 PM") and sizes ("3.5 MB")
+NON_LINGUISTIC_RE = re.compile(
+    r"(?:https?://|www\.)\S+|\S+@\S+\.\w+|[A-Za-z]:\\\S*"
+    r"|\b\d{1,2}[:.]\d{2}(?:[:.]\d{2})?(?:\s*[AaPp]\.?[Mm]\b\.?)?|\b\d+(?:[.,]\d+)?\s*(?:[KMGT]i?B|kB)\b"
+)
+# Letters plus the combining vowel signs and marks that Devanagari and Arabic words are written with
+WORD_RE = re.compile(r"(?:[^\W\d_]|[\u064b-\u065f\u0670\u0900-\u0903\u093a-\u094f\u0951-\u0957\u0962\u0963])+")
+LANGUAGE_SAMPLE_CHARS = 1000
+
+def isNonLinguistic(text):
+    # Numbers, punctuation, URLs, e-mail addresses, paths, times and sizes: nothing a model could translate
+    return not any(c.isalpha() for c in NON_LINGUISTIC_RE.sub("", text[:LANGUAGE_SAMPLE_CHARS]))
+
+def leads(scores, language):
+    # True when language scores at least 2 and twice any other language
+    score = scores.get(language, 0)
+    return score >= 2 and score >= 2 * max((v for k, v in scores.items() if k != language), default=0)
+
+def identifyLanguage(text):
+    # Returns (language, certain). language is one of LANGUAGES, or None when unsure, and is good enough to
+    # name in the prompt. certain is only True when that language's own words (or a script no other
+    # language writes) back it, so text can be skipped as already translated without asking the model.
+    sample = NON_LINGUISTIC_RE.sub("", text[:LANGUAGE_SAMPLE_CHARS])
+    letters = 0
+    scripts = collections.Counter()
+    kana = False
+    for c in sample:
+        if not c.isalpha():
+            continue
+        letters += 1
+        if c < "\u0370":
+            continue
+        for language, low, high in LANGUAGE_SCRIPTS:
+            if low <= c <= high:
+                scripts[language] += 1
+                kana = kana or language == "Japanese"
+                break
+    if not letters:
+        return None, False
+    # Turkish dotted capital I would otherwise lower to i and a combining dot, splitting the word
+    lowered = sample.replace("\u0130", "i").lower()
+    candidate = None
+    if scripts:
+        candidate, count = scripts.most_common(1)[0]
+        if count * 2 <= letters:
+            return None, False
+        if candidate == "Chinese" and kana:
+            # Japanese text mixes kana with Chinese characters
+            return "Japanese", True
+        if candidate in ("Japanese", "Korean"):
+            return candidate, True
+        if candidate == "Chinese":
+            return candidate, sum(1 for c in sample if c in CHINESE_MARKERS) >= (1 if letters <= 8 else 2)
+    tokens = WORD_RE.findall(lowered)
+    unanimous = None
+    if tokens and len(tokens) <= SHORT_TEXT_WORDS:
+        # Too short to score: identified only when every word is known and exactly one language uses them all
+        common = set(LANGUAGE_WORDS.get(tokens[0], ()))
+        for word in tokens[1:]:
+            common &= set(LANGUAGE_WORDS.get(word, ()))
+        if len(common) == 1:
+            unanimous = common.pop()
+    words = collections.Counter()
+    scores = collections.Counter()
+    for word in tokens:
+        languages = LANGUAGE_WORDS.get(word, ())
+        for language in languages:
+            words[language] += 1.0 / len(languages)
+        for letter in set(word) & LANGUAGE_LETTERS.keys():
+            for language in LANGUAGE_LETTERS[letter]:
+                scores[language] += 1.0 / len(LANGUAGE_LETTERS[letter])
+    scores.update(words)
+    if candidate is None:
+        ranked = scores.most_common(2)
+        if ranked:
+            best, score = ranked[0]
+            runner_up = ranked[1][1] if len(ranked) > 1 else 0
+            if score >= 2 and score >= 2 * runner_up:
+                candidate = best
+    if words:
+        # Clear word evidence outweighs the script or letters, which neighbours share
+        leader = words.most_common(1)[0][0]
+        if leader != candidate and leads(words, leader):
+            candidate = leader
+    candidate = unanimous or candidate
+    if candidate not in LANGUAGES or NEIGHBOUR_LETTERS.get(candidate, set()) & set(lowered):
+        return None, False
+    return candidate, candidate == unanimous or leads(words, candidate)
+
+def isShortList(lines, max_item_chars):
+    # True for text made of several short lines that are separate items rather than one paragraph
+    # wrapped over several lines, which would be mistranslated line by line
+    items = [line.strip() for line in lines if line.strip()]
+    if len(items) < 3 or any(len(item) > max_item_chars for item in items):
+        return False
+    # A line ending without punctuation followed by one starting in lower case is a wrapped sentence
+    wrapped = sum(1 for a, b in zip(items, items[1:]) if a[-1].isalnum() and b[0].islower())
+    return wrapped * 4 < len(items)
+
+def packBatches(items, max_items, max_chars):
+    # Group items into batches of at most max_items and roughly max_chars characters
+    batch = []
+    length = 0
+    for item in items:
+        if batch and (len(batch) >= max_items or length + len(item) > max_chars):
+            yield batch
+            batch = []
+            length = 0
+        batch.append(item)
+        length += len(item)
+    if batch:
+        yield batch
+
+# Tokenizers split Greek, Cyrillic, Hebrew and Arabic about twice as finely as Latin script, and Indic
+# scripts, Thai and CJK into about one token per character
+NARROW_SCRIPT_RE = re.compile(r"[\u0370-\u06ff]")
+WIDE_SCRIPT_RE = re.compile(r"[\u0900-\u0e7f\u2e80-\U0010ffff]")
+# A letter of the target language's script, for languages whose translations are about as long in
+# characters as the source text. CJK translations are much shorter, so the source estimate covers them.
+TARGET_SCRIPT_LETTERS = {"Russian": "я", "Greek": "α", "Arabic": "ب", "Hindi": "क"}
+
+def estimateTokens(text, chars_per_token=3):
+    # Rough token count
+    wide = len(WIDE_SCRIPT_RE.findall(text))
+    narrow = len(NARROW_SCRIPT_RE.findall(text))
+    return wide + (len(text) - wide + narrow) // chars_per_token + 1
+
+# A translation cut off by num_predict is asked for once more with this many times the budget, unless it
+# was repeating itself: sampling is deterministic, so a looping model would only loop for longer
+PREDICT_EXPAND = 1.5
+LOOP_MIN_REPEATS = 2
+LOOP_MIN_CHARS = 24
+
+def isRepetitive(text):
+    # True when the end of text is one piece repeated LOOP_MIN_REPEATS times or more (and over at least
+    # LOOP_MIN_CHARS, so a closing "..." doesn't count), as a model stuck in a loop produces. The piece may
+    # be cut off anywhere, so the tail is compared with itself one period back.
+    text = text.rstrip()
+    for period in range(1, len(text) // LOOP_MIN_REPEATS + 1):
+        repeats = max(LOOP_MIN_REPEATS, -(-LOOP_MIN_CHARS // period))
+        if repeats * period > len(text):
+            continue
+        if text[-(repeats - 1) * period:] == text[-repeats * period:-period]:
+            return True
+    return False
+
+def estimateOutputTokens(text, target, chars_per_token=3):
+    # Rough token count of a translation of text into target, which may be written in a script that
+    # takes more tokens than the source
+    letter = TARGET_SCRIPT_LETTERS.get(target)
+    tokens = estimateTokens(text, chars_per_token)
+    if letter:
+        tokens = max(tokens, estimateTokens(letter * len(text), chars_per_token))
+    return tokens
+
+def fitContext(tokens, min_ctx, max_ctx):
+    # Smallest power-of-two context window from min_ctx up that holds tokens, at most max_ctx
+    num_ctx = min_ctx
+    while num_ctx < tokens and num_ctx < max_ctx:
+        num_ctx *= 2
+    return min(num_ctx, max_ctx)
+
+def extractText(info, max_chars):
+    # Read a text range paragraph by paragraph and stop as soon as max_chars is exceeded, so a huge
+    # document is never pulled across the accessibility boundary in full. Each paragraph is read once.
+    # Returns (paragraphs, truncated); joining the paragraphs gives the text read.
+    paragraphs = []
+    length = 0
+    try:
+        for chunk in info.getTextInChunks(textInfos.UNIT_PARAGRAPH):
+            if length + len(chunk) > max_chars:
+                paragraphs.append(chunk[:max_chars - length])
+                return paragraphs, True
+            paragraphs.append(chunk)
+            length += len(chunk)
+    except Exception as e:
+        # Fallback to simple .text if chunks fail
+        log.warning(f"Ollama Translator: getTextInChunks failed, falling back to .text: {e}")
+        text = info.text
+        return [text[:max_chars]], len(text) > max_chars
+    return paragraphs, False
+
+# Scheduler priorities, lower runs first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_DIALOG = 1
+PRIORITY_BACKGROUND = 2
+
+class TranslationCancelled(Exception):
+    # Raised inside a job that was cancelled or superseded; never reported to the user
+    pass
+
+class QueueFullError(Exception):
+    pass
+
+_jobContext = threading.local()
+
+def currentJob():
+    # The scheduler job running on this thread (also set on the engine's segment threads)
+    return getattr(_jobContext, "job", None)
+
+@contextlib.contextmanager
+def jobContext(job):
+    previous = currentJob()
+    _jobContext.job = job
+    try:
+        yield
+    finally:
+        _jobContext.job = previous
+
+class Job(object):
+    # A unit of work queued on the scheduler. Cancelling it aborts any HTTP stream it has open,
+    # which makes Ollama stop generating.
+    def __init__(self, func, args, priority, supersede):
+        self.func = func
+        self.args = args
+        self.priority = priority
+        self.supersede = supersede
+        self.submitted = time.monotonic()
+        self.cancelled = False
+        self._lock = threading.Lock()
+        self._responses = set()
+        self._cancelEvent = threading.Event()
+
+    def cancel(self):
+        with self._lock:
+            self.cancelled = True
+            responses = list(self._responses)
+        self._cancelEvent.set()
+        for response in responses:
+            response.abort()
+
+    def check(self):
+        if self.cancelled:
+            raise TranslationCancelled()
+
+    def wait(self, seconds):
+        # Sleep that ends early, with TranslationCancelled, when the job is cancelled
+        self._cancelEvent.wait(seconds)
+        self.check()
+
+    def attach(self, response):
+        with self._lock:
+            if not self.cancelled:
+                self._responses.add(response)
+                return
+        response.abort()
+
+    def detach(self, response):
+        with self._lock:
+            self._responses.discard(response)
+
+class TranslationScheduler(object):
+    # Fixed pool of worker threads fed from a bounded priority queue, plus a per-backend limit on
+    # concurrent generations. Submitting with a supersede key cancels older jobs with the same key.
+    def __init__(self, workers=2, queue_size=16, max_in_flight=2, max_background=1):
+        self._cond = threading.Condition()
+        self._slotCond = threading.Condition()
+        self._queue = []
+        self._seq = itertools.count()
+        self._threads = []
+        self._running = set()
+        self._slots = {}
+        self._stopped = False
+        self.dropped = 0
+        self.superseded = 0
+        self.configure(workers, queue_size, max_in_flight, max_background)
+
+    def configure(self, workers, queue_size, max_in_flight, max_background=1):
+        with self._cond:
+            self.workers = max(1, int(workers))
+            self.queue_size = max(1, int(queue_size))
+            self._cond.notify_all()
+        with self._slotCond:
+            self.max_in_flight = max(1, int(max_in_flight))
+            self.max_background = max(1, min(self.max_in_flight, int(max_background)))
+            self._slotCond.notify_all()
+
+    def submit(self, func, args=(), priority=PRIORITY_BACKGROUND, supersede=None):
+        job = Job(func, args, priority, supersede)
+        with self._cond:
+            if self._stopped:
+                raise QueueFullError()
+            if supersede is not None:
+                self._cancelWhere(lambda other: other.supersede == supersede)
+            if len(self._queue) >= self.queue_size:
+                # Backpressure: make room only by dropping queued work that matters less
+                worst = max(self._queue)
+                if worst[0] <= priority:
+                    raise QueueFullError()
+                self._queue.remove(worst)
+                heapq.heapify(self._queue)
+                worst[2].cancel()
+                self.dropped += 1
+            heapq.heappush(self._queue, (priority, next(self._seq), job))
+            if len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._worker, name="OllamaTranslatorWorker", daemon=True)
+                self._threads.append(thread)
+                thread.start()
+            self._cond.notify()
+        return job
+
+    def _cancelWhere(self, predicate):
+        # Called with self._cond held
+        queued = [entry for entry in self._queue if predicate(entry[2])]
+        if queued:
+            self._queue = [entry for entry in self._queue if not predicate(entry[2])]
+            heapq.heapify(self._queue)
+        jobs = [entry[2] for entry in queued] + [job for job in self._running if predicate(job)]
+        for job in jobs:
+            job.cancel()
+        self.superseded += len(jobs)
+
+    def cancel(self, supersede):
+        with self._cond:
+            self._cancelWhere(lambda job: job.supersede == supersede)
+
+    def _worker(self):
+        me = threading.current_thread()
+        while True:
+            with self._cond:
+                while not self._runnable() and not self._stopped and len(self._threads) <= self.workers:
+                    self._cond.wait()
+                if self._stopped or len(self._threads) > self.workers:
+                    self._threads.remove(me)
+                    return
+                job = heapq.heappop(self._queue)[2]
+                if job.cancelled:
+                    continue
+                self._running.add(job)
+            try:
+                with jobContext(job):
+                    job.func(*job.args)
+            except TranslationCancelled:
+                pass
+            except Exception as e:
+                log.error(f"Ollama Translator: Background job failed: {e}")
+            finally:
+                with self._cond:
+                    self._running.discard(job)
+                    # A finished background job may let a queued one start on another worker
+                    self._cond.notify_all()
+
+    def _runnable(self):
+        # Called with self._cond held. Background jobs may occupy at most workers - 1 threads, so
+        # a worker is always free to pick up interactive work instead of queueing behind speculation.
+        if not self._queue:
+            return False
+        if self._queue[0][0] < PRIORITY_BACKGROUND:
+            return True
+        background = sum(1 for job in self._running if job.priority >= PRIORITY_BACKGROUND)
+        return background < max(1, self.workers - 1)
+
+    def _limit(self, job):
+        # Background (speculative) jobs are held to a smaller share of the backend's slots
+        if job and job.priority >= PRIORITY_BACKGROUND:
+            return self.max_background
+        return self.max_in_flight
+
+    @contextlib.contextmanager
+    def slot(self, backend, job=None):
+        # Limits concurrent generations per backend; waiting jobs are admitted by priority
+        ticket = (job.priority if job else PRIORITY_BACKGROUND, next(self._seq))
+        with self._slotCond:
+            state = self._slots.setdefault(backend, {"active": 0, "waiting": []})
+            heapq.heappush(state["waiting"], ticket)
+            try:
+                while state["active"] >= self._limit(job) or state["waiting"][0] != ticket:
+                    if job:
+                        job.check()
+                    # Wake up periodically so cancellation is noticed while waiting
+                    self._slotCond.wait(0.1)
+            except BaseException:
+                state["waiting"].remove(ticket)
+                heapq.heapify(state["waiting"])
+                self._slotCond.notify_all()
+                raise
+            heapq.heappop(state["waiting"])
+            state["active"] += 1
+        try:
+            yield
+        finally:
+            with self._slotCond:
+                state["active"] -= 1
+                self._slotCond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "queued": len(self._queue), "running": len(self._running), "workers": len(self._threads),
+                "dropped": self.dropped, "superseded": self.superseded
+            }
+
+    def shutdown(self):
+        with self._cond:
+            self._stopped = True
+            self._cancelWhere(lambda job: True)
+            self._cond.notify_all()
+
+class TranslationEngine(object):
+    # Translates segments concurrently and reassembles the results in source order.
+    def __init__(self, max_workers=3):
+        self._lock = threading.Lock()
+        self._executor = None
+        self.max_workers = max_workers
+
+    def configure(self, max_workers):
+        max_workers = max(1, int(max_workers))
+        with self._lock:
+            if max_workers != self.max_workers and self._executor:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+            self.max_workers = max_workers
+
+    def _getExecutor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="OllamaTranslatorSegment")
+            return self._executor
+
+    def translate(self, segments, translateSegment, onSegmentDone=None):
+        # translateSegment is called as translateSegment(index, segment).
+        # Returns (translation, failures) where failures is a list of (index, exception).
+        # Failed segments keep their source text so the rest of the document is still usable.
+        results = [None] * len(segments)
+        failures = []
+        futures = {}
+        executor = self._getExecutor()
+        job = currentJob()
+
+        def run(index, segment):
+            # Segment threads belong to the submitting job so cancelling it stops them too
+            with jobContext(job):
+                if job:
+                    job.check()
+                return translateSegment(index, segment)
+
+        for index, segment in enumerate(segments):
+            if segment.strip():
+                futures[executor.submit(run, index, segment)] = index
+            else:
+                results[index] = segment
+        total = len(futures)
+        done = 0
+        for future in concurrent.futures.as_completed(futures):
+            index = futures[future]
+            segment = segments[index]
+            trailing = segment[len(segment.rstrip()):]
+            try:
+                results[index] = future.result() + trailing
+            except Exception as e:
+                failures.append((index, e))
+                results[index] = segment
+            done += 1
+            if job and job.cancelled:
+                continue
+            if onSegmentDone:
+                onSegmentDone(index, done, total, results)
+        if job:
+            job.check()
+        return "".join(results), failures
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+class DocumentSessions(object):
+    # Recent exchanges per document (a browse mode document, focus object or dialog), so follow-on
+    # segments go out as one growing conversation whose prefix the server has already evaluated.
+    # Bounded in number (LRU), age and size; when a conversation gets too long it starts over.
+    def __init__(self, max_sessions=8, ttl=600, max_chars=4000):
+        self._lock = threading.Lock()
+        self._sessions = collections.OrderedDict()
+        self.configure(max_sessions, ttl, max_chars)
+
+    def configure(self, max_sessions, ttl, max_chars):
+        with self._lock:
+            self.max_sessions = max(1, int(max_sessions))
+            self.ttl = max(1, float(ttl))
+            self.max_chars = max(0, int(max_chars))
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def begin(self, key, scope):
+        # Earlier (source, translation) pairs of the session, or None while another segment of the
+        # same session is in flight: parallel segments cannot extend one conversation, so they go
+        # out without history and are not recorded. Scope changes (model or languages) start over.
+        now = time.monotonic()
+        with self._lock:
+            for old in [k for k, session in self._sessions.items() if now - session["updated"] > self.ttl and not session["busy"]]:
+                del self._sessions[old]
+            session = self._sessions.get(key)
+            if session is None or session["scope"] != scope:
+                session = self._sessions[key] = {"scope": scope, "updated": now, "turns": [], "busy": False}
+            self._sessions.move_to_end(key)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+            if session["busy"]:
+                return None
+            session["busy"] = True
+            return list(session["turns"])
+
+    def end(self, key, scope, exchanges=()):
+        # Releases the session taken by begin(); the exchanges sent after the history (memory hints
+        # and the translated text) become its next turns so the conversation keeps the same prefix
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None or session["scope"] != scope:
+                return
+            session["busy"] = False
+            session["updated"] = time.monotonic()
+            session["turns"].extend(exchanges)
+            if sum(len(a) + len(b) for a, b in session["turns"]) > self.max_chars:
+                # Dropping only the oldest turns would change the prefix the server has cached
+                session["turns"] = []
+
+    def clear(self, key=None):
+        # Also drops the per-language sessions ("key:language") of a multi-language translation
+        with self._lock:
+            if key is None:
+                self._sessions.clear()
+            else:
+                for name in [k for k in self._sessions if k == key or k.startswith(key + ":")]:
+                    del self._sessions[name]
+
+class Prefetcher(object):
+    # Speculatively translates the paragraphs after the one just translated so the next press finds
+    # them in the cache. One background job works through the queue; a newer request replaces the
+    # queue, and a request for the paragraph being prefetched waits for it instead of generating it twice.
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queue = collections.deque()
+        self._job = None
+        self._current = None
+        self.document = None
+        self.prefetched = 0
+
+    def schedule(self, document, texts, translate, submit):
+        # submit(func, args) queues func on the scheduler and returns the job
+        with self._lock:
+            self.document = document
+            self._queue = collections.deque(texts)
+            if self._job is not None and not self._job.cancelled:
+                return
+            self._job = submit(self._run, (translate,))
+
+    def _run(self, translate):
+        job = currentJob()
+        while True:
+            with self._lock:
+                if (job and job.cancelled) or not self._queue:
+                    if self._job is job:
+                        self._job = None
+                    return
+                text = self._queue.popleft()
+                current = self._current = (normalizeText(text), threading.Event())
+            try:
+                translate(text)
+                self.prefetched += 1
+            except TranslationCancelled:
+                raise
+            except Exception as e:
+                # Speculation is best effort; stop rather than keep hitting a failing server
+                log.debug(f"Ollama Translator: Prefetch stopped: {e}")
+                with self._lock:
+                    self._queue.clear()
+            finally:
+                with self._lock:
+                    if self._current is current:
+                        self._current = None
+                current[1].set()
+
+    def waitFor(self, text, job=None):
+        # Blocks while the same text is being prefetched; returns True if it was
+        with self._lock:
+            current = self._current
+        if not current or current[0] != normalizeText(text):
+            return False
+        while not current[1].wait(0.1):
+            if job:
+                job.check()
+        return True
+
+    def cancel(self):
+        with self._lock:
+            self._queue.clear()
+            self.document = None
+            job, self._job = self._job, None
+        if job:
+            job.cancel()
+
+class Utterance(object):
+    # One intercepted speech sequence waiting for its translation
+    def __init__(self, sequence, args, kwargs, texts):
+        self.sequence = sequence
+        self.args = args
+        self.kwargs = kwargs
+        self.texts = texts
+        self.state = "waiting"
+        self.job = None
+        self.finished = False
+
+class SpeechTranslator(object):
+    # Replaces what NVDA says about objects (the focus, names that change) with its translation; everything
+    # else goes straight through. Utterances are spoken in order; each waits at most budget seconds and is
+    # spoken untranslated if its translation is late. When speech is cancelled,
+    # e.g. because the focus moved on, the utterances still waiting are dropped without being spoken.
+    # Their translations go on and land in the reuse table for the next visit, but at most max_queue
+    # utterances wait and at most max_queue translations run; the oldest is given up first.
+    def __init__(self, translate, submit):
+        # translate(text) returns the translation; submit(func, args) queues func and returns the job
+        self.translate = translate
+        self.submit = submit
+        self.budget = 0.8
+        self.max_queue = 4
+        self.max_recent = 2000
+        self._lock = threading.Lock()
+        self._pending = collections.deque()
+        self._running = collections.deque()
+        self._recent = collections.OrderedDict()
+        self._original = None
+        self._patches = []
+        self._local = threading.local()
+        self.counts = collections.Counter()
+        self.peak_depth = 0
+
+    def configure(self, budget, max_queue, max_recent):
+        with self._lock:
+            self.budget = max(0.0, float(budget))
+            self.max_queue = max(1, int(max_queue))
+            self.max_recent = max(0, int(max_recent))
+            while len(self._recent) > self.max_recent:
+                self._recent.popitem(last=False)
+
+    @property
+    def active(self):
+        return self._original is not None
+
+    def install(self):
+        if self._original is not None:
+            return
+        self._original = speech.speech.speak
+        self._patch("speak", self._speak)
+        for name in ("speakObject", "speakObjectProperties"):
+            original = getattr(speech.speech, name, None)
+            if original is not None:
+                self._patch(name, self._objectSpeech(original))
+        if speechCanceled is not None:
+            speechCanceled.register(self.onCancel)
+
+    def uninstall(self):
+        if self._original is None:
+            return
+        if speechCanceled is not None:
+            speechCanceled.unregister(self.onCancel)
+        for name, original, replacement in reversed(self._patches):
+            if getattr(speech.speech, name, None) == replacement:
+                setattr(speech.speech, name, original)
+            if getattr(speech, name, None) == replacement:
+                setattr(speech, name, original)
+        self._patches = []
+        self._original = None
+        self.stop()
+
+    def _patch(self, name, replacement):
+        # speech re-exports the functions of speech.speech; both names are replaced
+        original = getattr(speech.speech, name)
+        setattr(speech.speech, name, replacement)
+        if getattr(speech, name, None) is original:
+            setattr(speech, name, replacement)
+        self._patches.append((name, original, replacement))
+
+    def _objectSpeech(self, original):
+        # Marks the thread while NVDA speaks an object, so _speak knows the sequence is about one
+        def speakObject(*args, **kwargs):
+            local = self._local
+            local.objects = getattr(local, "objects", 0) + 1
+            try:
+                return original(*args, **kwargs)
+            finally:
+                local.objects -= 1
+        return speakObject
+
+    def _passes(self, sequence, texts):
+        # Messages (the add-on's own included), typed characters, spelling and say-all are not translated.
+        # Neither is a sequence with callbacks or index marks, which say-all and others wait on, nor anything
+        # said while an utterance is being spoken, in case another add-on passes it back to speak.
+        local = self._local
+        if not getattr(local, "objects", 0) or getattr(local, "speaking", False):
+            return True
+        if len("".join(texts).strip()) <= 1:
+            return True
+        return any(not isinstance(item, str) and isinstance(item, SPEECH_SYNC_COMMANDS) for item in sequence)
+
+    def clear(self):
+        # Settings that change translations (model, languages) make the reuse table stale
+        with self._lock:
+            self._recent.clear()
+
+    def _speak(self, sequence, *args, **kwargs):
+        texts = [item for item in sequence if isinstance(item, str) and item.strip()]
+        original = self._original
+        if original is None or self._passes(sequence, texts):
+            # Spoken at once, ahead of any utterance still waiting for its translation
+            with self._lock:
+                self.counts["passed"] += 1
+            return (original or speech.speech.speak)(sequence, *args, **kwargs)
+        utterance = Utterance(sequence, args, kwargs, texts)
+        with self._lock:
+            self.counts["utterances"] += 1
+            known = {text: self._recent[text] for text in texts if text in self._recent}
+            for text in known:
+                self._recent.move_to_end(text)
+            if len(known) == len(texts):
+                # Nothing new: spoken at once, or in turn if earlier utterances are still waiting
+                if texts:
+                    self.counts["reused"] += 1
+                utterance.sequence = self._replace(sequence, known)
+                utterance.state = "ready"
+            elif len(self._pending) >= self.max_queue:
+                self._drop(self._pending.popleft())
+            self._pending.append(utterance)
+            self.peak_depth = max(self.peak_depth, len(self._pending))
+        if utterance.state == "waiting":
+            with self._lock:
+                running = [other for other in self._running if not other.finished]
+                while len(running) >= self.max_queue:
+                    running.pop(0).job.cancel()
+                    self.counts["abandoned"] += 1
+                self._running = collections.deque(running)
+            try:
+                utterance.job = self.submit(self._translateUtterance, (utterance,))
+            except QueueFullError:
+                utterance.job = None
+            if utterance.job is None:
+                self._expire(utterance)
+                return
+            with self._lock:
+                self._running.append(utterance)
+            wx.CallAfter(wx.CallLater, max(1, int(self.budget * 1000)), self._expire, utterance)
+        self._release()
+
+    @staticmethod
+    def _replace(sequence, translations):
+        return [translations.get(item, item) if isinstance(item, str) else item for item in sequence]
+
+    def _translateUtterance(self, utterance):
+        translations = {}
+        try:
+            for text in utterance.texts:
+                with self._lock:
+                    known = self._recent.get(text)
+                if known is None:
+                    try:
+                        known = self.translate(text)
+                    except TranslationCancelled:
+                        raise
+                    except Exception as e:
+                        log.debug(f"Ollama Translator: Speech translation failed: {e}")
+                        known = text
+                    else:
+                        with self._lock:
+                            self._recent[text] = known
+                            while len(self._recent) > self.max_recent:
+                                self._recent.popitem(last=False)
+                translations[text] = known
+        finally:
+            utterance.finished = True
+        wx.CallAfter(self._resolve, utterance, translations)
+
+    def _resolve(self, utterance, translations):
+        with self._lock:
+            if utterance.state == "waiting":
+                utterance.sequence = self._replace(utterance.sequence, translations)
+                utterance.state = "ready"
+                self.counts["in_time"] += 1
+            elif utterance.state == "spoken":
+                self.counts["late"] += 1
+        self._release()
+
+    def _expire(self, utterance):
+        # Out of budget: the original text is spoken
+        with self._lock:
+            if utterance.state != "waiting":
+                return
+            utterance.state = "missed"
+            self.counts["missed"] += 1
+        self._release()
+
+    def _drop(self, utterance):
+        # Called with the lock held. Sequences with callbacks never wait here (see _passes), so nothing that
+        # say-all or another caller waits on is dropped.
+        if utterance.state in ("waiting", "missed", "ready"):
+            utterance.state = "dropped"
+            self.counts["dropped"] += 1
+
+    def _release(self):
+        # Speaks the utterances at the head of the queue that are ready or out of time, in order
+        while True:
+            with self._lock:
+                if not self._pending or self._pending[0].state == "waiting" or self._original is None:
+                    return
+                utterance = self._pending.popleft()
+                if utterance.state == "dropped":
+                    continue
+                utterance.state = "spoken"
+                original = self._original
+            self._local.speaking = True
+            try:
+                original(utterance.sequence, *utterance.args, **utterance.kwargs)
+            finally:
+                self._local.speaking = False
+
+    def onCancel(self, *args, **kwargs):
+        with self._lock:
+            while self._pending:
+                self._drop(self._pending.popleft())
+
+    def stop(self):
+        self.onCancel()
+        with self._lock:
+            running, self._running = list(self._running), collections.deque()
+        for utterance in running:
+            utterance.job.cancel()
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counts, depth=len(self._pending), peak_depth=self.peak_depth)
+
+CF_UNICODETEXT = 13
+_clipboardApi = None
+
+def clipboardApi():
+    # Private WinDLL instances, so setting argtypes doesn't affect NVDA's own use of user32/kernel32
+    global _clipboardApi
+    if _clipboardApi is None:
+        user32 = ctypes.WinDLL("user32")
+        kernel32 = ctypes.WinDLL("kernel32")
+        user32.GetClipboardData.restype = ctypes.c_void_p
+        user32.OpenClipboard.argtypes = [ctypes.c_void_p]
+        kernel32.GlobalSize.argtypes = [ctypes.c_void_p]
+        kernel32.GlobalSize.restype = ctypes.c_size_t
+        kernel32.GlobalLock.argtypes = [ctypes.c_void_p]
+        kernel32.GlobalLock.restype = ctypes.c_void_p
+        kernel32.GlobalUnlock.argtypes = [ctypes.c_void_p]
+        _clipboardApi = (user32, kernel32)
+    return _clipboardApi
+
+def clipboardSequence():
+    # Changes whenever the clipboard contents change; costs next to nothing to read
+    return clipboardApi()[0].GetClipboardSequenceNumber()
+
+def readClipboard(max_chars):
+    # Returns the clipboard text, or None when there is no text or it is longer than max_chars.
+    # The size is checked before anything is copied.
+    user32, kernel32 = clipboardApi()
+    if not user32.IsClipboardFormatAvailable(CF_UNICODETEXT) or not user32.OpenClipboard(None):
+        return None
+    try:
+        handle = user32.GetClipboardData(CF_UNICODETEXT)
+        if not handle:
+            return None
+        size = kernel32.GlobalSize(handle)
+        if size > (max_chars + 1) * 2:
+            log.debug(f"Ollama Translator: Clipboard text of {size // 2} chars is over the limit.")
+            return None
+        pointer = kernel32.GlobalLock(handle)
+        if not pointer:
+            return None
+        try:
+            return ctypes.wstring_at(pointer, size // 2).split("\0", 1)[0]
+        finally:
+            kernel32.GlobalUnlock(handle)
+    finally:
+        user32.CloseClipboard()
+
+class ClipboardWatcher(object):
+    # Translates copied text in the background so the translation is ready when it is asked for.
+    # A thread checks the clipboard sequence number every interval seconds, which is all it does while
+    # nothing changes. Text is read once it has stayed the same for debounce seconds; text over max_chars,
+    # and text already translated, is skipped. Each new text supersedes the one still being translated.
+    def __init__(self, translate, submit, onReady=None):
+        # translate(text) returns the translation; submit(func, args) queues func and returns the job;
+        # onReady(text, translation) is called when a translation is ready
+        self.translate = translate
+        self.submit = submit
+        self.onReady = onReady
+        self.interval = 0.5
+        self.debounce = 0.6
+        self.max_chars = 5000
+        self.sequence = clipboardSequence
+        self.read = readClipboard
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._seen = collections.OrderedDict()
+        self._results = collections.OrderedDict()
+        self._job = None
+        self._current = None
+        self.counts = collections.Counter()
+
+    def configure(self, interval, debounce, max_chars):
+        self.interval = max(0.1, float(interval))
+        self.debounce = max(0.0, float(debounce))
+        self.max_chars = max(1, int(max_chars))
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(self._stop,), name="OllamaTranslatorClipboard", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread = None
+        with self._lock:
+            job, self._job = self._job, None
+        if job:
+            job.cancel()
+
+    def _run(self, stop):
+        try:
+            last = self.sequence()
+        except Exception as e:
+            log.error(f"Ollama Translator: Clipboard watcher unavailable: {e}")
+            return
+        changedAt = None
+        while not stop.wait(self.interval):
+            try:
+                sequence = self.sequence()
+                if sequence != last:
+                    # Still changing: wait until it settles
+                    last = sequence
+                    changedAt = time.monotonic()
+                    self.counts["changes"] += 1
+                    continue
+                if changedAt is None or time.monotonic() - changedAt < self.debounce:
+                    continue
+                changedAt = None
+                self.check(self.read(self.max_chars))
+            except Exception as e:
+                log.debug(f"Ollama Translator: Clipboard check failed: {e}")
+
+    def check(self, text):
+        if not text or not text.strip():
+            self.counts["skipped"] += 1
+            return
+        key = normalizeText(text)
+        with self._lock:
+            if not self.markSeen(key):
+                self.counts["repeated"] += 1
+                return
+            previous = self._job
+        if previous:
+            previous.cancel()
+        try:
+            job = self.submit(self._translate, (text, key))
+        except QueueFullError:
+            with self._lock:
+                self._seen.pop(key, None)
+            return
+        with self._lock:
+            self._job = job
+        self.counts["queued"] += 1
+
+    def _translate(self, text, key):
+        current = self._current = (key, threading.Event())
+        try:
+            translation = self.translate(text)
+        except Exception:
+            # Cancelled or failed: tried again when it is copied again
+            with self._lock:
+                self._seen.pop(key, None)
+            raise
+        else:
+            with self._lock:
+                self._results[key] = translation
+                while len(self._results) > 16:
+                    self._results.popitem(last=False)
+        finally:
+            if self._current is current:
+                self._current = None
+            current[1].set()
+        self.counts["translated"] += 1
+        if self.onReady:
+            self.onReady(text, translation)
+
+    def markSeen(self, key):
+        # Called with the lock held. Returns False if the text was seen before
+        if key in self._seen:
+            self._seen.move_to_end(key)
+            return False
+        self._seen[key] = True
+        while len(self._seen) > 256:
+            self._seen.popitem(last=False)
+        return True
+
+    def claim(self, text):
+        # The text is being translated on request, so the watcher leaves it alone
+        with self._lock:
+            self.markSeen(normalizeText(text))
+
+    def ready(self, text):
+        # The translation of text if the watcher has it
+        with self._lock:
+            return self._results.get(normalizeText(text))
+
+    def waitFor(self, text, job=None):
+        # Blocks while the same text is being translated; returns True if it was
+        current = self._current
+        if not current or current[0] != normalizeText(text):
+            return False
+        while not current[1].wait(0.1):
+            if job:
+                job.check()
+        return True
+
+    def clear(self):
+        with self._lock:
+            self._seen.clear()
+            self._results.clear()
+
+def parseEndpoints(value):
+    # ollama_url may hold several servers separated by commas, spaces or new lines, or a JSON list
+    if isinstance(value, (list, tuple)):
+        urls = [str(url).strip() for url in value]
+    else:
+        urls = re.split(r"[\s,;]+", value or "")
+    urls = [url for url in urls if url]
+    return urls or [DEFAULT_CONFIG["ollama_url"]]
+
+def readErrorMessage(response):
+    # Ollama reports errors as {"error": "..."}, OpenAI-compatible servers as {"error": {"message": "..."}};
+    # fall back to the HTTP status
+    try:
+        error = json.loads(response.read().decode("utf-8")).get("error")
+        if isinstance(error, dict):
+            error = error.get("message")
+        return error or f"HTTP {response.status}"
+    except Exception:
+        return f"HTTP {response.status}"
+
+class OllamaBackend(object):
+    # Ollama's own API: /api/generate and /api/chat stream NDJSON, /api/tags lists the installed
+    # models and /api/ps the loaded ones. Requests are built in this shape everywhere in the add-on
+    # ({"model", "prompt" or "messages", "options", ...}); the other backends translate from it.
+    name = "ollama"
+    DEFAULT_URL = "http://localhost:11434"
+    # Whether the server can report which models are in memory and load one on request
+    listsLoaded = True
+
+    def baseUrl(self, url):
+        # The configured URL without the API path, e.g. http://host:11434/api/generate -> http://host:11434 and
+        # https://gw.example.com/ollama/api/generate -> https://gw.example.com/ollama behind a reverse proxy.
+        # With several servers configured the first one is used.
+        parts = urllib.parse.urlsplit(parseEndpoints(url)[0])
+        if not parts.netloc:
+            parts = urllib.parse.urlsplit(self.DEFAULT_URL)
+        return urllib.parse.urlunsplit((parts.scheme or "http", parts.netloc, self.basePath(parts.path), "", ""))
+
+    def basePath(self, path):
+        # Keep a proxy prefix such as /ollama but not the API path itself, native or OpenAI-compatible
+        return re.split(r"/v1(?:/|$)|/api(?:/|$)", path)[0].rstrip("/")
+
+    def apiUrl(self, url, endpoint):
+        return self.baseUrl(url) + "/api/" + endpoint
+
+    def modelsUrl(self, url):
+        return self.apiUrl(url, "tags")
+
+    def parseModels(self, data):
+        # data['models'] is a list of dicts: [{'name': 'llama3:latest', ...}, ...]
+        return [m["name"] for m in data.get("models", [])]
+
+    def loadedUrl(self, url):
+        return self.apiUrl(url, "ps")
+
+    def parseLoaded(self, data):
+        names = set()
+        for m in data.get("models", []):
+            names.add(m.get("name"))
+            names.add(m.get("model"))
+        return names
+
+    def preloadRequest(self, url, model, keep_alive, options=None):
+        # A generate request without a prompt only loads the model; None when the backend can't preload
+        data = {"model": model, "keep_alive": keep_alive, "stream": False}
+        if options:
+            data["options"] = options
+        return self.apiUrl(url, "generate"), data
+
+    def request(self, url, data):
+        # (url, body) of a streamed generation
+        return self.apiUrl(url, "chat" if "messages" in data else "generate"), data
+
+    def parseLine(self, line, metrics):
+        # One line of the response stream: returns (text, done) and adds the server's timings to metrics.
+        # /api/generate streams "response", /api/chat streams "message": {"content": ...}
+        json_line = json.loads(line.decode("utf-8"))
+        chunk = json_line.get("response") or json_line.get("message", {}).get("content", "")
+        done = json_line.get("done", False)
+        if done:
+            metrics.update(Telemetry.serverMetrics(json_line))
+        return chunk, done
+
+class OpenAIBackend(OllamaBackend):
+    # OpenAI-compatible servers (vLLM, LM Studio, llama.cpp and Ollama's own /v1): /v1/chat/completions
+    # streams server-sent events and /v1/models lists the served models. The server decides which models
+    # are loaded, so there is nothing to preload or poll. Prefix caching is the server's own (vLLM's
+    # automatic prefix caching); the fixed system prompt of document sessions keeps prefixes stable for it.
+    name = "openai"
+    DEFAULT_URL = "http://localhost:8000"
+    listsLoaded = False
+    # Ollama option -> request field; num_ctx has no equivalent (the server's context size is fixed)
+    OPTIONS = {"temperature": "temperature", "top_p": "top_p", "seed": "seed", "stop": "stop", "num_predict": "max_tokens",
+               "presence_penalty": "presence_penalty", "frequency_penalty": "frequency_penalty"}
+
+    def apiUrl(self, url, endpoint):
+        return self.baseUrl(url) + "/v1/" + endpoint
+
+    def modelsUrl(self, url):
+        return self.apiUrl(url, "models")
+
+    def parseModels(self, data):
+        # {"object": "list", "data": [{"id": "Qwen/Qwen2.5-7B-Instruct", ...}, ...]}
+        return [m["id"] for m in data.get("data", [])]
+
+    def loadedUrl(self, url):
+        return None
+
+    def preloadRequest(self, url, model, keep_alive, options=None):
+        return None
+
+    def request(self, url, data):
+        messages = data.get("messages") or [{"role": "user", "content": data.get("prompt", "")}]
+        body = {"model": data["model"], "messages": messages, "stream": True, "stream_options": {"include_usage": True}}
+        options = data.get("options") or {}
+        for key, name in self.OPTIONS.items():
+            if key in options:
+                body[name] = options[key]
+        if data.get("format") == "json":
+            body["response_format"] = {"type": "json_object"}
+        return self.apiUrl(url, "chat/completions"), body
+
+    def parseLine(self, line, metrics):
+        # Events are "data: {...}" lines separated by blank lines and end with "data: [DONE]"; the
+        # usage totals come in a last event without choices
+        line = line.decode("utf-8").strip()
+        if not line.startswith("data:"):
+            return "", False
+        payload = line[5:].strip()
+        if payload == "[DONE]":
+            return "", True
+        event = json.loads(payload)
+        chunk = ""
+        for choice in event.get("choices") or ():
+            chunk += (choice.get("delta") or {}).get("content") or ""
+            if choice.get("finish_reason"):
+                metrics["done_reason"] = choice["finish_reason"]
+        self.eventMetrics(event, metrics)
+        return chunk, False
+
+    def eventMetrics(self, event, metrics):
+        # Token counts from the usage totals; prompt tokens served from the prefix cache are not evaluated
+        usage = event.get("usage")
+        if usage:
+            cached = (usage.get("prompt_tokens_details") or {}).get("cached_tokens") or 0
+            metrics["prompt_eval_count"] = usage.get("prompt_tokens", 0) - cached
+            metrics["eval_count"] = usage.get("completion_tokens", 0)
+
+class LlamaCppBackend(OpenAIBackend):
+    # llama.cpp's server speaks the OpenAI API and also takes its own fields: cache_prompt keeps the
+    # evaluated prompt in the slot's KV cache so the next request only evaluates what does not extend it
+    # (older servers default to off), and the last event carries the server timings in milliseconds.
+    name = "llamacpp"
+    DEFAULT_URL = "http://localhost:8080"
+    OPTIONS = dict(OpenAIBackend.OPTIONS, top_k="top_k", min_p="min_p", repeat_penalty="repeat_penalty")
+
+    def request(self, url, data):
+        url, body = super(LlamaCppBackend, self).request(url, data)
+        body["cache_prompt"] = True
+        return url, body
+
+    def eventMetrics(self, event, metrics):
+        super(LlamaCppBackend, self).eventMetrics(event, metrics)
+        timings = event.get("timings")
+        if timings and "prompt_n" in timings:
+            metrics["prompt_eval_count"] = timings["prompt_n"]
+            metrics["prompt_eval_duration"] = timings.get("prompt_ms", 0) / 1000
+        if timings and "predicted_n" in timings:
+            metrics["eval_count"] = timings["predicted_n"]
+            metrics["eval_duration"] = timings.get("predicted_ms", 0) / 1000
+            if timings.get("predicted_per_second"):
+                metrics["tokens_per_sec"] = timings["predicted_per_second"]
+
+BACKENDS = {backend.name: backend for backend in (OllamaBackend(), OpenAIBackend(), LlamaCppBackend())}
+
+def backendFor(name):
+    return BACKENDS.get(name) or BACKENDS["ollama"]
+
+# Fewest streamed chunks from which generation speed is measured on the client, for servers that report no timings
+CLIENT_RATE_CHUNKS = 16
+
+class PooledResponse(object):
+    # Wraps an http.client response; closing it returns the connection to the pool
+    # when the body was read completely and the server allows keep-alive.
+    def __init__(self, pool, key, conn, response):
+        self._pool = pool
+        self._key = key
+        self._conn = conn
+        self.response = response
+        self.status = response.status
+        self.reused = False
+        self.connectTime = 0.0
+        self._aborted = False
+
+    def __iter__(self):
+        return iter(self.response)
+
+    def read(self, *args):
+        return self.response.read(*args)
+
+    def drain(self):
+        # Consume the rest of the body (e.g. the final chunk after a "done" line) so the connection can be reused
+        try:
+            self.response.read()
+        except Exception:
+            pass
+
+    def settimeout(self, seconds):
+        # Timeout for each following read, e.g. a shorter one between tokens than before the first
+        conn = self._conn
+        if conn is not None and conn.sock is not None:
+            conn.sock.settimeout(seconds)
+
+    def abort(self):
+        # May be called from another thread to stop a stream; the connection is not reused
+        self._aborted = True
+        conn = self._conn
+        if conn is not None and conn.sock is not None:
+            try:
+                conn.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def close(self):
+        conn, self._conn = self._conn, None
+        if conn is None:
+            return
+        if self.response.isclosed() and not self.response.will_close and not self._aborted:
+            self._pool._release(self._key, conn)
+        else:
+            self.response.close()
+            conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class PendingRequest(object):
+    # A connection from before the request is sent until its response headers arrive (model loading and
+    # prompt evaluation happen meanwhile). abort() may be called from another thread and closes the socket,
+    # so the server notices and stops.
+    def __init__(self, conn):
+        self.conn = conn
+        self.aborted = False
+
+    def abort(self):
+        self.aborted = True
+        sock = self.conn.sock
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+class ConnectionPool(object):
+    # Thread-safe pool of keep-alive http.client connections keyed by (scheme, host, port).
+    def __init__(self, max_idle_per_host=4, idle_timeout=30.0):
+        self.max_idle_per_host = max_idle_per_host
+        self.idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        self._idle = {}
+        self.created = 0
+        self.reused = 0
+        self.stale = 0
+
+    @staticmethod
+    def _isStale(conn):
+        # An idle keep-alive socket that is readable has either been closed by the server or has junk on it
+        sock = conn.sock
+        if sock is None:
+            return True
+        try:
+            readable, _w, _x = select.select([sock], [], [], 0)
+            return bool(readable)
+        except (OSError, ValueError):
+            return True
+
+    def _acquire(self, key, timeout, connect_timeout):
+        now = time.monotonic()
+        with self._lock:
+            idle = self._idle.get(key, [])
+            while idle:
+                conn, released = idle.pop()
+                if now - released > self.idle_timeout or self._isStale(conn):
+                    conn.close()
+                    self.stale += 1
+                    continue
+                self.reused += 1
+                conn.timeout = timeout
+                conn.sock.settimeout(timeout)
+                return conn, True
+            self.created += 1
+        scheme, host, port = key
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port, timeout=connect_timeout), False
+        return http.client.HTTPConnection(host, port, timeout=connect_timeout), False
+
+    def _release(self, key, conn):
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle_per_host:
+                idle.append((conn, time.monotonic()))
+                return
+        conn.close()
+
+    def request(self, method, url, body=None, headers=None, timeout=30, connect_timeout=None, job=None):
+        # A job that is cancelled while waiting for the response headers closes the connection at once
+        parts = urllib.parse.urlsplit(url)
+        key = (parts.scheme or "http", parts.hostname, parts.port)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        for attempt in range(2):
+            conn, reused = self._acquire(key, timeout, connect_timeout or timeout)
+            pending = PendingRequest(conn)
+            if job:
+                job.attach(pending)
+            try:
+                connect_time = 0.0
+                if not reused:
+                    started = time.monotonic()
+                    conn.connect()
+                    connect_time = time.monotonic() - started
+                    conn.sock.settimeout(timeout)
+                if pending.aborted:
+                    raise TranslationCancelled()
+                conn.request(method, path, body=body, headers=headers or {})
+                response = conn.getresponse()
+            except (ConnectionError, http.client.HTTPException) as e:
+                conn.close()
+                if pending.aborted:
+                    raise TranslationCancelled() from e
+                # The server may have dropped a kept-alive socket between our health check and the request
+                if reused and attempt == 0:
+                    with self._lock:
+                        self.stale += 1
+                    continue
+                raise
+            except Exception as e:
+                conn.close()
+                if pending.aborted and not isinstance(e, TranslationCancelled):
+                    raise TranslationCancelled() from e
+                raise
+            finally:
+                if job:
+                    job.detach(pending)
+            pooled = PooledResponse(self, key, conn, response)
+            pooled.reused = reused
+            pooled.connectTime = connect_time
+            return pooled
+
+    def stats(self):
+        with self._lock:
+            idle = sum(len(conns) for conns in self._idle.values())
+            return {"created": self.created, "reused": self.reused, "stale": self.stale, "idle": idle}
+
+    def closeAll(self):
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn, _released in conns:
+                conn.close()
+
+class Endpoint(object):
+    # One server, the backend that talks to it and what the pool knows about it
+    def __init__(self, url, backend):
+        self.url = url
+        self.backend = backend
+        self.key = urllib.parse.urlsplit(backend.baseUrl(url)).netloc
+        self.healthy = True
+        self.latency = None
+        self.inFlight = 0
+        self.models = None
+        self.failures = 0
+        self.lastError = None
+        # Circuit breaker: consecutive failures, trips in a row and when the server may be tried again
+        self.consecutive = 0
+        self.trips = 0
+        self.openUntil = 0.0
+        # model -> [time to first token, seconds between tokens, last update] moving averages
+        self.timings = {}
+
+    def hasModel(self, model):
+        if self.models is None:
+            return True
+        return model in self.models or (":" not in model and model + ":latest" in self.models)
+
+class BackendPool(object):
+    # Routes each request to the least loaded healthy server that has the model. Servers are probed
+    # in the background (only when more than one is configured) and latency is a moving average of
+    # time to first token.
+    # A server that fails threshold times in a row is skipped for cooldown seconds (doubling while it
+    # keeps failing, up to 4x); after that a single request is let through to test it.
+    ALPHA = 0.3
+    # Read timeouts are these multiples of the model's usual time to first token / between tokens,
+    # but never below the minimums; estimates older than STALE seconds are not trusted (the model
+    # may have been unloaded since)
+    FIRST_TOKEN_FACTOR = 4
+    FIRST_TOKEN_MIN = 10.0
+    INTER_TOKEN_FACTOR = 10
+    INTER_TOKEN_MIN = 5.0
+    STALE = 300.0
+
+    def __init__(self, connections):
+        self.connections = connections
+        self._lock = threading.Lock()
+        self.endpoints = []
+        self.interval = 15
+        self.threshold = 3
+        self.cooldown = 15.0
+        self._announced = False
+        self._stop = None
+
+    def configure(self, urls, interval, threshold=3, cooldown=15, backend=None):
+        backend = backend or BACKENDS["ollama"]
+        with self._lock:
+            existing = {endpoint.url: endpoint for endpoint in self.endpoints if endpoint.backend is backend}
+            self.endpoints = [existing.get(url) or Endpoint(url, backend) for url in urls]
+            self.interval = max(1, interval)
+            self.threshold = max(1, int(threshold))
+            self.cooldown = max(1.0, float(cooldown))
+        self.stop()
+        if len(self.endpoints) > 1:
+            self._stop = threading.Event()
+            threading.Thread(target=self._probeLoop, args=(self._stop,), name="OllamaTranslatorProbe", daemon=True).start()
+
+    def choose(self, model, exclude=()):
+        # Returns None when every server has been excluded or is cut off by its breaker
+        now = time.monotonic()
+        with self._lock:
+            candidates = [endpoint for endpoint in self.endpoints if endpoint.url not in exclude and endpoint.openUntil <= now]
+            if not candidates:
+                return None
+            candidates = [endpoint for endpoint in candidates if endpoint.healthy] or candidates
+            candidates = [endpoint for endpoint in candidates if endpoint.hasModel(model)] or candidates
+            chosen = min(candidates, key=lambda endpoint: (endpoint.inFlight + 1) * (endpoint.latency or 0.1))
+            if chosen.consecutive >= self.threshold:
+                # Half open: this request tests the server, the others keep waiting
+                chosen.openUntil = now + self.cooldown
+            return chosen
+
+    @contextlib.contextmanager
+    def use(self, endpoint):
+        with self._lock:
+            endpoint.inFlight += 1
+        try:
+            yield endpoint
+        finally:
+            with self._lock:
+                endpoint.inFlight -= 1
+
+    def observe(self, endpoint, seconds, model=None, gap=None):
+        # A successful generation: seconds to its first token and the mean gap between tokens.
+        # Samples that are not positive can only be measurement errors; they would pull the
+        # latency estimate and with it the read timeouts down to their floors, so they are dropped.
+        if gap is not None and gap <= 0:
+            gap = None
+        with self._lock:
+            if seconds is None or seconds <= 0:
+                self._close(endpoint)
+                return
+            if endpoint.latency is None:
+                endpoint.latency = seconds
+            else:
+                endpoint.latency += self.ALPHA * (seconds - endpoint.latency)
+            if model:
+                timing = endpoint.timings.get(model)
+                if timing is None:
+                    endpoint.timings[model] = [seconds, gap, time.monotonic()]
+                else:
+                    timing[0] += self.ALPHA * (seconds - timing[0])
+                    if gap is not None:
+                        timing[1] = gap if timing[1] is None else timing[1] + self.ALPHA * (gap - timing[1])
+                    timing[2] = time.monotonic()
+            self._close(endpoint)
+
+    def _close(self, endpoint):
+        endpoint.healthy = True
+        endpoint.consecutive = 0
+        endpoint.trips = 0
+        endpoint.openUntil = 0.0
+        self._announced = False
+
+    def markFailed(self, endpoint, error, down=True):
+        # down is False when the server answered (an HTTP error, a stall mid-stream): that is retried
+        # but does not count towards opening the breaker
+        with self._lock:
+            endpoint.healthy = False
+            endpoint.failures += 1
+            endpoint.lastError = str(error)
+            if not down:
+                return
+            endpoint.consecutive += 1
+            if endpoint.consecutive >= self.threshold:
+                endpoint.trips += 1
+                endpoint.openUntil = time.monotonic() + self.cooldown * min(4, 2 ** (endpoint.trips - 1))
+                if endpoint.trips == 1:
+                    log.warning(f"Ollama Translator: {endpoint.url} failed {endpoint.consecutive} times in a row, pausing requests to it.")
+
+    def timeouts(self, endpoint, model, first_max, inter_max, retry=False):
+        # (first token, between tokens) read timeouts; the maximums before the model has a fresh estimate.
+        # A retry also waits the maximum for its first token, so a slow model load or a long prompt is
+        # not mistaken for an outage.
+        with self._lock:
+            timing = endpoint.timings.get(model)
+            if timing is None or time.monotonic() - timing[2] > self.STALE:
+                return first_max, inter_max
+            first = first_max if retry else min(first_max, max(self.FIRST_TOKEN_MIN, timing[0] * self.FIRST_TOKEN_FACTOR))
+            if timing[1] is None:
+                return first, inter_max
+            return first, min(inter_max, max(self.INTER_TOKEN_MIN, timing[1] * self.INTER_TOKEN_FACTOR))
+
+    def outage(self):
+        # Seconds until a server may be tried again
+        with self._lock:
+            wait = min((endpoint.openUntil for endpoint in self.endpoints), default=0.0) - time.monotonic()
+            return max(0.0, wait)
+
+    def announceOutage(self):
+        # True only the first time an outage is reported; reset when a server answers again
+        with self._lock:
+            first = not self._announced
+            self._announced = True
+            return first
+
+    def probe(self, endpoint):
+        started = time.monotonic()
+        try:
+            with self.connections.request("GET", endpoint.backend.modelsUrl(endpoint.url), timeout=3) as response:
+                data = json.loads(response.read().decode("utf-8"))
+            models = set(endpoint.backend.parseModels(data))
+            with self._lock:
+                endpoint.models = models
+                self._close(endpoint)
+                if endpoint.latency is None:
+                    endpoint.latency = time.monotonic() - started
+        except Exception as e:
+            if endpoint.healthy:
+                log.warning(f"Ollama Translator: Server {endpoint.url} is not responding: {e}")
+            self.markFailed(endpoint, e)
+
+    def _probeLoop(self, stop):
+        while True:
+            for endpoint in list(self.endpoints):
+                if stop.is_set():
+                    return
+                self.probe(endpoint)
+            if stop.wait(self.interval):
+                return
+
+    def stop(self):
+        if self._stop:
+            self._stop.set()
+            self._stop = None
+
+    def stats(self):
+        with self._lock:
+            return [
+                {"url": e.url, "healthy": e.healthy, "latency": e.latency, "in_flight": e.inFlight, "failures": e.failures,
+                 "open": e.openUntil > time.monotonic()}
+                for e in self.endpoints
+            ]
+
+class ModelWarmer(object):
+    # Loads the configured model ahead of the first translation and optionally keeps it loaded.
+    # state is one of "cold", "loading" or "loaded"; backends that can't load a model on request
+    # count as loaded once asked. onStateChanged(state), if set, is called from the thread that changed it.
+    def __init__(self, connections):
+        self.connections = connections
+        self.backend = BACKENDS["ollama"]
+        self._state = "cold"
+        self.onStateChanged = None
+        self._lock = threading.Lock()
+        self._timer = None
+        self._loading = set()
+
+    @property
+    def state(self):
+        return self._state
+
+    @state.setter
+    def state(self, state):
+        changed = state != self._state
+        self._state = state
+        callback = self.onStateChanged
+        if changed and callback:
+            callback(state)
+
+    def preload(self, url, model, keep_alive, options=None, onLoaded=None, refresh=False):
+        # onLoaded(model) is called from the loading thread once the model is in memory. With refresh the
+        # request is sent even when the model is loaded, which restarts its keep_alive timer.
+        with self._lock:
+            if (url, model) in self._loading:
+                return
+            self._loading.add((url, model))
+        threading.Thread(target=self._preload, args=(url, model, keep_alive, options, onLoaded, refresh), daemon=True).start()
+
+    def _preload(self, url, model, keep_alive, options=None, onLoaded=None, refresh=False):
+        try:
+            request = self.backend.preloadRequest(url, model, keep_alive, options)
+            loaded = request is None or self.isLoaded(url, model)
+            if request and (refresh or not loaded):
+                if not loaded:
+                    self.state = "loading"
+                start = time.monotonic()
+                load_url, data = request
+                with self.connections.request("POST", load_url, body=json.dumps(data).encode("utf-8"),
+                                              headers={"Content-Type": "application/json"}, timeout=300) as response:
+                    response.read()
+                    if response.status >= 400:
+                        raise TranslationError(readErrorMessage(response))
+                if loaded:
+                    log.debug(f"Ollama Translator: Kept model {model} loaded for another {keep_alive}")
+                else:
+                    log.info(f"Ollama Translator: Model {model} loaded in {time.monotonic() - start:.1f}s")
+            self.state = "loaded"
+            if onLoaded:
+                onLoaded(model)
+        except Exception as e:
+            self.state = "cold"
+            log.warning(f"Ollama Translator: Failed to preload model {model}: {e}")
+        finally:
+            with self._lock:
+                self._loading.discard((url, model))
+
+    def checkState(self, url, model):
+        # Re-reads whether the model is still in memory, since the server unloads it on its own once
+        # keep_alive runs out; a load in progress is left alone
+        if self.backend.loadedUrl(url) is None:
+            return
+        with self._lock:
+            if (url, model) in self._loading:
+                return
+        loaded = self.isLoaded(url, model)
+        with self._lock:
+            if (url, model) not in self._loading:
+                self.state = "loaded" if loaded else "cold"
+
+    def isLoaded(self, url, model):
+        # /api/ps lists the models currently held in memory
+        backend = self.backend
+        try:
+            with self.connections.request("GET", backend.loadedUrl(url), timeout=2) as response:
+                data = json.loads(response.read().decode("utf-8"))
+        except Exception:
+            return False
+        names = backend.parseLoaded(data)
+        return model in names or (":" not in model and model + ":latest" in names)
+
+    def startKeepWarm(self, interval, preload):
+        # preload is called on every tick and reads the current settings, so changes are picked up
+        self.stopKeepWarm()
+
+        def tick():
+            preload()
+            with self._lock:
+                if self._timer is not None:
+                    self._timer = threading.Timer(interval, tick)
+                    self._timer.daemon = True
+                    self._timer.start()
+
+        with self._lock:
+            self._timer = threading.Timer(interval, tick)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def stopKeepWarm(self):
+        with self._lock:
+            timer, self._timer = self._timer, None
+        if timer:
+            timer.cancel()
+
+class ModelCatalog(object):
+    # Caches the model list per server for ttl seconds and fetches it off the GUI thread
+    def __init__(self, connections, ttl=300):
+        self.connections = connections
+        self.backend = BACKENDS["ollama"]
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._models = {}
+        self._pending = set()
+
+    def get(self, url, backend=None):
+        # Returns the cached list, or None if there is no fresh entry
+        with self._lock:
+            entry = self._models.get((backend or self.backend).modelsUrl(url))
+        if entry and time.monotonic() - entry[1] < self.ttl:
+            return entry[0]
+        return None
+
+    def fetch(self, url, onResult=None, force=False, backend=None):
+        # onResult(url, models) is called on the GUI thread; backend defaults to the configured one
+        backend = backend or self.backend
+        if not force:
+            models = self.get(url, backend)
+            if models is not None:
+                if onResult:
+                    wx.CallAfter(onResult, url, models)
+                return
+        models_url = backend.modelsUrl(url)
+        with self._lock:
+            if models_url in self._pending:
+                return
+            self._pending.add(models_url)
+        threading.Thread(target=self._fetch, args=(url, models_url, backend, onResult), daemon=True).start()
+
+    def _fetch(self, url, models_url, backend, onResult):
+        models = None
+        try:
+            with self.connections.request("GET", models_url, timeout=5) as response:
+                data = json.loads(response.read().decode("utf-8"))
+            models = backend.parseModels(data)
+            with self._lock:
+                self._models[models_url] = (models, time.monotonic())
+        except Exception as e:
+            log.error(f"Ollama Translator: Failed to fetch models: {e}")
+        finally:
+            with self._lock:
+                self._pending.discard(models_url)
+        if onResult and models is not None:
+            wx.CallAfter(onResult, url, models)
+
+class ModelRouter(object):
+    # Picks a model per request. tiers are [{"model": ..., "max_chars": ...}]: a text goes to the first
+    # (smallest) tier whose max_chars it fits, everything longer to the default model. A tier is passed
+    # over while its model is not loaded but the default model is (it is loaded in the background for
+    # later requests; until the first /api/ps answer every tier counts as not loaded, and backends
+    # that can't list loaded models count every tier as loaded), or when
+    # measurements show the default model would answer this text sooner: time to first token plus
+    # the expected output at the measured tokens per second.
+    ALPHA = 0.3
+    PS_TTL = 10.0
+
+    def __init__(self, connections):
+        self.connections = connections
+        self._lock = threading.Lock()
+        self._speed = {}
+        self._warming = {}
+        self._loaded = None
+        self._checked = 0.0
+        self._refreshing = False
+        self.tiers = []
+        self.urls = []
+        self.preload = None
+        self.backend = BACKENDS["ollama"]
+
+    def configure(self, tiers, urls, preload=None, backend=None):
+        # preload(model) is called for a tier model that is passed over because it is not loaded
+        tiers = [t for t in tiers if isinstance(t, dict) and t.get("model") and t.get("max_chars")]
+        with self._lock:
+            self.tiers = sorted(tiers, key=lambda t: t["max_chars"])
+            self.urls = list(urls)
+            self.preload = preload
+            if backend and backend is not self.backend:
+                self.backend = backend
+                self._loaded = None
+                self._checked = 0.0
+
+    def choose(self, text, default, chars_per_token=3):
+        if not self.tiers:
+            return default
+        self._refresh()
+        tokens = estimateTokens(text, chars_per_token)
+        cold = []
+        chosen = default
+        with self._lock:
+            for tier in self.tiers:
+                model = tier["model"]
+                if len(text) > tier["max_chars"] or model == default:
+                    continue
+                if self.backend.listsLoaded and (self._loaded is None or not self._isLoaded(model) and self._isLoaded(default)):
+                    if time.monotonic() - self._warming.get(model, -self.PS_TTL) >= self.PS_TTL:
+                        self._warming[model] = time.monotonic()
+                        cold.append(model)
+                    continue
+                fast, slow = self._expected(model, tokens), self._expected(default, tokens)
+                if fast is not None and slow is not None and slow < fast:
+                    continue
+                chosen = model
+                break
+            preload = self.preload
+        if preload:
+            for model in cold:
+                preload(model)
+        return chosen
+
+    def observe(self, model, metrics):
+        # Successful generation: client time to first token and server tokens per second
+        ttft, rate = metrics.get("ttft"), metrics.get("tokens_per_sec")
+        if ttft is None or not rate:
+            return
+        with self._lock:
+            speed = self._speed.get(model)
+            if speed is None:
+                self._speed[model] = [ttft, rate]
+            else:
+                speed[0] += self.ALPHA * (ttft - speed[0])
+                speed[1] += self.ALPHA * (rate - speed[1])
+            if self._loaded is not None:
+                self._loaded.add(model)
+
+    def markLoaded(self, model):
+        with self._lock:
+            if self._loaded is not None:
+                self._loaded.add(model)
+
+    def _expected(self, model, tokens):
+        speed = self._speed.get(model)
+        if speed is None:
+            return None
+        return speed[0] + tokens / speed[1]
+
+    def _isLoaded(self, model):
+        return model in self._loaded or (":" not in model and model + ":latest" in self._loaded)
+
+    def _refresh(self):
+        # /api/ps is read off the calling thread at most every PS_TTL seconds; until then the last answer is used
+        with self._lock:
+            if not self.backend.listsLoaded or self._refreshing or time.monotonic() - self._checked < self.PS_TTL:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._fetchLoaded, daemon=True).start()
+
+    def _fetchLoaded(self):
+        loaded = set()
+        answered = False
+        backend = self.backend
+        for url in self.urls:
+            try:
+                with self.connections.request("GET", backend.loadedUrl(url), timeout=2) as response:
+                    data = json.loads(response.read().decode("utf-8"))
+                loaded |= backend.parseLoaded(data)
+                answered = True
+            except Exception as e:
+                log.debug(f"Ollama Translator: Could not read loaded models from {url}: {e}")
+        with self._lock:
+            if answered:
+                self._loaded = loaded
+            self._checked = time.monotonic()
+            self._refreshing = False
+
+    def stats(self):
+        with self._lock:
+            return {model: {"ttft": speed[0], "tokens_per_sec": speed[1]} for model, speed in self._speed.items()}
+
+def percentile(values, fraction):
+    # Nearest-rank percentile of an unsorted list
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+def mean(values):
+    return sum(values) / len(values) if values else None
+
+class StartupProfile(object):
+    # Seconds spent in each startup phase, in the order they ran. Phases may run on different threads:
+    # the plugin's load and deferred initialization are reported as separate log lines.
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._phases = []
+        self._reported = 0
+
+    def add(self, name, seconds):
+        with self._lock:
+            self._phases.append((name, seconds))
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def phases(self):
+        with self._lock:
+            return list(self._phases)
+
+    def report(self, title):
+        # Writes the phases since the last report to the log and returns their total in seconds
+        with self._lock:
+            phases = self._phases[self._reported:]
+            self._reported = len(self._phases)
+        total = sum(seconds for _name, seconds in phases)
+        log.info(f"Ollama Translator: {title} in {total * 1000:.1f} ms (" +
+            ", ".join(f"{name} {seconds * 1000:.1f} ms" for name, seconds in phases) + ")")
+        return total
+
+class Telemetry(object):
+    # Bounded ring buffer of per-request timings. Client timings are in seconds; server metrics
+    # come from the final streamed Ollama line and are converted from nanoseconds to seconds.
+    FIELDS = [
+        "timestamp", "status", "model", "source", "target", "endpoint", "chars", "output_chars", "queue_wait", "connect", "reused",
+        "ttft", "total", "total_duration", "load_duration", "prompt_eval_count", "prompt_eval_duration",
+        "eval_count", "eval_duration", "tokens_per_sec", "inter_token", "num_ctx", "done_reason", "attempts", "items", "follow_on", "error"
+    ]
+    SERVER_DURATIONS = ["total_duration", "load_duration", "prompt_eval_duration", "eval_duration"]
+
+    def __init__(self, size=500):
+        self._lock = threading.Lock()
+        self._records = collections.deque(maxlen=size)
+        self._extractions = collections.deque(maxlen=size)
+
+    def record(self, **fields):
+        fields["timestamp"] = time.time()
+        with self._lock:
+            self._records.append(fields)
+
+    @classmethod
+    def serverMetrics(cls, final_line):
+        metrics = {}
+        for key in cls.SERVER_DURATIONS:
+            if key in final_line:
+                metrics[key] = final_line[key] / 1e9
+        for key in ("prompt_eval_count", "eval_count", "done_reason"):
+            if key in final_line:
+                metrics[key] = final_line[key]
+        if metrics.get("eval_count") and metrics.get("eval_duration"):
+            metrics["tokens_per_sec"] = metrics["eval_count"] / metrics["eval_duration"]
+        return metrics
+
+    def recordExtraction(self, seconds, chars):
+        # Time spent on the main thread reading text for a gesture
+        with self._lock:
+            self._extractions.append((seconds, chars))
+
+    def records(self):
+        with self._lock:
+            return list(self._records)
+
+    def summary(self):
+        records = self.records()
+        with self._lock:
+            extractions = [seconds for seconds, _chars in self._extractions]
+        network = [r for r in records if r.get("status") == "ok"]
+        cached = [r for r in records if r.get("status") in ("cache", "memory")]
+        latencies = [r["total"] for r in network if r.get("total") is not None]
+        rates = [r["tokens_per_sec"] for r in network if r.get("tokens_per_sec")]
+        looked_up = len(network) + len(cached)
+        return {
+            "requests": len(records),
+            "errors": len([r for r in records if r.get("status") == "error"]),
+            "p50": percentile(latencies, 0.5),
+            "p95": percentile(latencies, 0.95),
+            "ttft_p50": percentile([r["ttft"] for r in network if r.get("ttft") is not None], 0.5),
+            "tokens_per_sec": sum(rates) / len(rates) if rates else None,
+            "cache_hit_rate": len(cached) / looked_up if looked_up else None,
+            "skipped": len([r for r in records if r.get("status") == "skipped"]),
+            "truncated": len([r for r in network if r.get("done_reason") == "length"]),
+            "retried": len([r for r in records if (r.get("attempts") or 0) > 1]),
+            "prompt_eval_first": mean([r["prompt_eval_count"] for r in network if not r.get("follow_on") and r.get("prompt_eval_count")]),
+            "prompt_eval_follow_on": mean([r["prompt_eval_count"] for r in network if r.get("follow_on") and r.get("prompt_eval_count")]),
+            "ttft_follow_on_p50": percentile([r["ttft"] for r in network if r.get("follow_on") and r.get("ttft") is not None], 0.5),
+            "extract_p50": percentile(extractions, 0.5),
+            "extract_max": max(extractions) if extractions else None,
+            "by_model": self.byModel(network)
+        }
+
+    @staticmethod
+    def byModel(records):
+        # Request count and median latency per model, to see where the router sends text
+        latencies = collections.defaultdict(list)
+        for r in records:
+            latencies[r.get("model")].append(r.get("total"))
+        return {
+            model: {"requests": len(values), "p50": percentile([v for v in values if v is not None], 0.5)}
+            for model, values in latencies.items()
+        }
+
+    def export(self, path):
+        # The format follows the file extension: .csv, anything else is JSON
+        records = self.records()
+        if path.lower().endswith(".csv"):
+            import csv
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                writer = csv.DictWriter(f, fieldnames=self.FIELDS, extrasaction="ignore")
+                writer.writeheader()
+                writer.writerows(records)
+        else:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(records, f, indent=2, ensure_ascii=False)
+
+class TranslationCache(object):
+    # Two tiers: a bounded in-memory LRU in front of a JSON store in the NVDA config directory.
+    # Entries are stored as [translation, last_used_timestamp].
+    SAVE_DELAY = 5.0
+
+    def __init__(self, path, memory_entries=256, max_entries=5000, max_age_days=30):
+        self.path = path
+        self._lock = threading.RLock()
+        self._memory = collections.OrderedDict()
+        self._disk = None
+        self._dirty = False
+        self._saveTimer = None
+        self._saveLock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.configure(memory_entries, max_entries, max_age_days)
+
+    def configure(self, memory_entries, max_entries, max_age_days):
+        with self._lock:
+            self.memory_entries = max(1, int(memory_entries))
+            self.max_entries = max(1, int(max_entries))
+            self.max_age = max(0, float(max_age_days)) * 86400
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    @staticmethod
+    def makeKey(model, source, target, template, text):
+        raw = json.dumps([model, source, target, template, normalizeText(text)], ensure_ascii=False)
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def _loadDisk(self):
+        # Called with the lock held; the disk tier is read lazily on the first memory miss
+        if self._disk is not None:
+            return
+        disk = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                disk = data
+        except (FileNotFoundError, json.JSONDecodeError, ValueError):
+            pass
+        except Exception as e:
+            log.error(f"Ollama Translator: Error loading translation cache: {e}")
+        self._disk = disk
+
+    def _expired(self, entry, now):
+        return self.max_age and now - entry[1] > self.max_age
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            self._loadDisk()
+            entry = self._memory.get(key)
+            if entry is None:
+                entry = self._disk.get(key)
+            if entry is None or self._expired(entry, now):
+                self.misses += 1
+                return None
+            # The refreshed timestamp is written with the next change; a hit alone does not rewrite the file
+            entry = [entry[0], now]
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+            self._disk[key] = entry
+            self.hits += 1
+        return entry[0]
+
+    def put(self, key, translation):
+        entry = [translation, time.time()]
+        with self._lock:
+            self._loadDisk()
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+            self._disk[key] = entry
+            self._dirty = True
+        self._scheduleSave()
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._disk = {}
+            self.hits = 0
+            self.misses = 0
+            self._dirty = True
+        self.save()
+
+    def size(self):
+        with self._lock:
+            self._loadDisk()
+            return len(self._disk)
+
+    def loadedSize(self):
+        # Entry count without reading the file or waiting for the lock; None until the disk tier is loaded
+        disk = self._disk
+        return None if disk is None else len(disk)
+
+    def _evict(self):
+        # Drop expired entries, then the least recently used ones beyond max_entries
+        now = time.time()
+        expired = [k for k, v in self._disk.items() if self._expired(v, now)]
+        for k in expired:
+            del self._disk[k]
+            self._memory.pop(k, None)
+        overflow = len(self._disk) - self.max_entries
+        if overflow > 0:
+            for k, v in sorted(self._disk.items(), key=lambda item: item[1][1])[:overflow]:
+                del self._disk[k]
+                self._memory.pop(k, None)
+
+    def _scheduleSave(self):
+        # Coalesce writes so a burst of translations results in a single disk write
+        with self._lock:
+            if self._saveTimer is not None:
+                return
+            self._saveTimer = threading.Timer(self.SAVE_DELAY, self.save)
+            self._saveTimer.daemon = True
+            self._saveTimer.start()
+
+    def save(self):
+        # Only eviction and the snapshot happen under the lock; serializing and writing happen outside it, and
+        # _saveLock keeps the writes in snapshot order
+        with self._saveLock:
+            with self._lock:
+                if self._saveTimer is not None:
+                    self._saveTimer.cancel()
+                    self._saveTimer = None
+                if not self._dirty or self._disk is None:
+                    return
+                self._evict()
+                data = dict(self._disk)
+                self._dirty = False
+            try:
+                tmp_path = self.path + ".tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(data, f, ensure_ascii=False)
+                os.replace(tmp_path, self.path)
+            except Exception as e:
+                with self._lock:
+                    self._dirty = True
+                log.error(f"Ollama Translator: Error saving translation cache: {e}")
+
+class TranslationMemory(object):
+    # Sentence-level translation memory. Exact sentence matches are reused without asking the model;
+    # near duplicates (the same notification with another date, count or name) are found through a
+    # MinHash index with LSH bands and offered to the model as examples.
+    # Entries are stored as [scope, source, translation, last_used_timestamp].
+    SAVE_DELAY = 5.0
+    BANDS = 6
+    ROWS = 2
+    MAX_HINTS = 3
+
+    def __init__(self, path, max_entries=10000):
+        self.path = path
+        self._lock = threading.RLock()
+        self._entries = None
+        self._signatures = {}
+        self._buckets = collections.defaultdict(set)
+        self._dirty = False
+        self._saveTimer = None
+        # Serializes writes, which happen outside _lock
+        self._saveLock = threading.Lock()
+        self._loading = False
+        self._loaded = threading.Event()
+        self.hits = 0
+        self.misses = 0
+        self.fuzzy = 0
+        self.max_entries = max(1, int(max_entries))
+
+    def configure(self, max_entries):
+        with self._lock:
+            self.max_entries = max(1, int(max_entries))
+            if self._entries is not None:
+                self._evict()
+
+    @staticmethod
+    def makeScope(model, source, target, template):
+        raw = json.dumps([model, source, target, template], ensure_ascii=False)
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+    @staticmethod
+    def makeKey(scope, sentence):
+        return hashlib.sha1((scope + normalizeText(sentence)).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def shingles(sentence):
+        # Words and word pairs, with digits masked so "3 new messages" and "12 new messages" share them
+        words = re.sub(r"\d+", "0", normalizeText(sentence).lower()).split()
+        return set(words) | set(zip(words, words[1:]))
+
+    @classmethod
+    def similarity(cls, a, b):
+        if not a or not b:
+            return 0.0
+        return len(a & b) / len(a | b)
+
+    def _signature(self, shingles):
+        hashes = [hash(shingle) for shingle in shingles]
+        return tuple(min((hash((seed, h)) for h in hashes), default=0) for seed in range(self.BANDS * self.ROWS))
+
+    def _bands(self, scope, signature):
+        return [(scope, band, signature[band * self.ROWS:(band + 1) * self.ROWS]) for band in range(self.BANDS)]
+
+    def _index(self, key, entry, signatures=None, buckets=None):
+        signatures = self._signatures if signatures is None else signatures
+        buckets = self._buckets if buckets is None else buckets
+        signature = self._signature(self.shingles(entry[1]))
+        signatures[key] = signature
+        for band in self._bands(entry[0], signature):
+            buckets[band].add(key)
+
+    def _unindex(self, key, entry):
+        signature = self._signatures.pop(key, None)
+        if signature is None:
+            return
+        for band in self._bands(entry[0], signature):
+            bucket = self._buckets.get(band)
+            if bucket:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band]
+
+    def _read(self):
+        # Reads the file and builds its index without touching the shared state
+        entries = collections.OrderedDict()
+        signatures = {}
+        buckets = collections.defaultdict(set)
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                for key, entry in sorted(data.items(), key=lambda item: item[1][3]):
+                    entries[key] = entry
+                    self._index(key, entry, signatures, buckets)
+        except (FileNotFoundError, json.JSONDecodeError, ValueError):
+            pass
+        except Exception as e:
+            log.error(f"Ollama Translator: Error loading translation memory: {e}")
+        return entries, signatures, buckets
+
+    def _install(self, loaded):
+        # Called with the lock held
+        if self._entries is None:
+            self._entries, self._signatures, self._buckets = loaded
+            self._evict()
+        self._loaded.set()
+
+    def load(self):
+        # Reads and indexes the file ahead of the first translation (ensureReady starts it on its own
+        # thread); the lock is only held to install the result, so lookups meanwhile just wait for it
+        with self._lock:
+            if self._entries is not None or self._loading:
+                return
+            self._loading = True
+        try:
+            loaded = self._read()
+            with self._lock:
+                self._install(loaded)
+        finally:
+            self._loading = False
+            self._loaded.set()
+
+    def _waitLoaded(self):
+        # Called without the lock, before a lookup: let a load in progress finish instead of loading twice
+        if self._loading:
+            self._loaded.wait()
+
+    def _load(self):
+        # Called with the lock held; without a background load the file is read and indexed on first use
+        if self._entries is None:
+            self._install(self._read())
+
+    def get(self, scope, sentence):
+        # A hit only refreshes the entry's place in the LRU order in memory; it is written with the next change
+        key = self.makeKey(scope, sentence)
+        self._waitLoaded()
+        with self._lock:
+            self._load()
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            entry[3] = time.time()
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return entry[2]
+
+    def similar(self, scope, sentences, threshold):
+        # Best earlier translations of sentences resembling the given ones, as (source, translation) pairs
+        found = {}
+        self._waitLoaded()
+        with self._lock:
+            self._load()
+            for sentence in sentences:
+                shingles = self.shingles(sentence)
+                candidates = set()
+                for band in self._bands(scope, self._signature(shingles)):
+                    candidates.update(self._buckets.get(band, ()))
+                for key in candidates:
+                    entry = self._entries[key]
+                    score = self.similarity(shingles, self.shingles(entry[1]))
+                    if score >= threshold and score > found.get(key, (0,))[0]:
+                        found[key] = (score, entry[1], entry[2])
+            best = sorted(found.values(), reverse=True)[:self.MAX_HINTS]
+            if best:
+                self.fuzzy += 1
+        return [(source, translation) for _score, source, translation in best]
+
+    def put(self, scope, sentence, translation):
+        key = self.makeKey(scope, sentence)
+        self._waitLoaded()
+        with self._lock:
+            self._load()
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._unindex(key, old)
+            entry = [scope, normalizeText(sentence), translation, time.time()]
+            self._entries[key] = entry
+            self._index(key, entry)
+            self._evict()
+            self._dirty = True
+        self._scheduleSave()
+
+    def learn(self, scope, source, translation):
+        # Store sentence pairs when the translation splits into as many sentences as the source;
+        # otherwise the alignment is unknown and only single sentences are stored
+        sources = [piece.strip() for piece in splitSentences(source) if piece.strip()]
+        targets = [piece.strip() for piece in splitSentences(translation) if piece.strip()]
+        if len(sources) == 1:
+            targets = [translation.strip()]
+        if len(sources) != len(targets):
+            return
+        for sentence, translated in zip(sources, targets):
+            self.put(scope, sentence, translated)
+
+    def clear(self):
+        with self._lock:
+            self._entries = collections.OrderedDict()
+            self._signatures.clear()
+            self._buckets.clear()
+            self.hits = 0
+            self.misses = 0
+            self.fuzzy = 0
+            self._dirty = True
+        self.save()
+
+    def size(self):
+        self._waitLoaded()
+        with self._lock:
+            self._load()
+            return len(self._entries)
+
+    def hitRate(self):
+        looked_up = self.hits + self.misses
+        return self.hits / looked_up if looked_up else None
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries:
+            key, entry = self._entries.popitem(last=False)
+            self._unindex(key, entry)
+
+    def _scheduleSave(self):
+        with self._lock:
+            if self._saveTimer is not None:
+                return
+            self._saveTimer = threading.Timer(self.SAVE_DELAY, self.save)
+            self._saveTimer.daemon = True
+            self._saveTimer.start()
+
+    def save(self):
+        # Only the snapshot is taken under the lock; serializing and writing happen outside it, and
+        # _saveLock keeps the writes in snapshot order
+        with self._saveLock:
+            with self._lock:
+                if self._saveTimer is not None:
+                    self._saveTimer.cancel()
+                    self._saveTimer = None
+                if not self._dirty or self._entries is None:
+                    return
+                data = dict(self._entries)
+                self._dirty = False
+            try:
+                tmp_path = self.path + ".tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(data, f, ensure_ascii=False)
+                os.replace(tmp_path, self.path)
+            except Exception as e:
+                with self._lock:
+                    self._dirty = True
+                log.error(f"Ollama Translator: Error saving translation memory: {e}")
+
 class SettingsPanel(gui.settingsDialogs.SettingsPanel):
     title = _("title")
 
     def makeSettings(self, settingsSizer):
+        GlobalPlugin.ensureReady()
         sHelper = gui.guiHelper.BoxSizerHelper(self, sizer=settingsSizer)
         
+        # Server type, which decides the API the server is spoken to with
+        self.backendNames = list(BACKENDS)
+        self.backend = sHelper.addLabeledControl(_("backend"), wx.Choice, choices=[_("backend_" + name) for name in self.backendNames])
+        self.backend.SetSelection(self.backendNames.index(backendFor(GlobalPlugin.config.get("backend", DEFAULT_CONFIG["backend"])).name))
+        self.backend.Bind(wx.EVT_CHOICE, lambda event: self.requestModels())
+
         # Ollama URL
         self.ollamaUrl = sHelper.addLabeledControl(_("ollama_url"), wx.TextCtrl)
         self.ollamaUrl.Value = GlobalPlugin.config.get("ollama_url", DEFAULT_CONFIG["ollama_url"])
         
-        # Model (Dropdown)
-        models = self.fetch_models(self.ollamaUrl.Value)
-        self.model = sHelper.addLabeledControl(_("model"), wx.Choice, choices=models)
+        # Model (Dropdown), filled from the cached model list and refreshed in the background
         current_model = GlobalPlugin.config.get("model", DEFAULT_CONFIG["model"])
-        if current_model in models:
-            self.model.SetStringSelection(current_model)
-        elif models:
-            self.model.SetSelection(0)
-        else:
-            self.model.Append(current_model)
-            self.model.SetStringSelection(current_model)
+        self.model = sHelper.addLabeledControl(_("model"), wx.Choice, choices=[])
+        self.setModelChoices(GlobalPlugin.models.get(self.ollamaUrl.Value, self.selectedBackend()) or [], current_model)
+        self.refreshModelsBtn = sHelper.addItem(wx.Button(self, label=_("refresh_models")))
+        self.refreshModelsBtn.Bind(wx.EVT_BUTTON, lambda event: self.requestModels(force=True))
+        self._urlTimer = None
+        self.ollamaUrl.Bind(wx.EVT_TEXT, self.onUrlChanged)
+        if GlobalPlugin.models.get(self.ollamaUrl.Value, self.selectedBackend()) is None:
+            self.requestModels()
         
         # Source Language
         source_choices = ["Auto"] + LANGUAGES
@@ -154,6 +3135,15 @@ class SettingsPanel(gui.settingsDialogs.SettingsPanel):
         else:
             self.targetLang.SetSelection(0)
 
+        # Further languages translated side by side with the target language
+        self.extraTargets = sHelper.addLabeledControl(_("extra_target_langs"), wx.CheckListBox, choices=LANGUAGES)
+        self.extraTargets.SetCheckedStrings([
+            language for language in GlobalPlugin.config.get("extra_target_langs", DEFAULT_CONFIG["extra_target_langs"])
+            if language in LANGUAGES])
+
+        self.detectLanguage = sHelper.addItem(wx.CheckBox(self, label=_("detect_language")))
+        self.detectLanguage.SetValue(GlobalPlugin.config.get("detect_language", DEFAULT_CONFIG["detect_language"]))
+
         # Shortcuts
         self.shortcut = sHelper.addLabeledControl(_("shortcut"), wx.TextCtrl)
         self.shortcut.Value = GlobalPlugin.config.get("shortcut", DEFAULT_CONFIG["shortcut"])
@@ -164,30 +3154,140 @@ class SettingsPanel(gui.settingsDialogs.SettingsPanel):
         self.shortcutEnd = sHelper.addLabeledControl(_("shortcut_end"), wx.TextCtrl)
         self.shortcutEnd.Value = GlobalPlugin.config.get("shortcut_end", DEFAULT_CONFIG["shortcut_end"])
 
-    def fetch_models(self, base_url):
-        # Construct tags URL from generate URL (assuming standard Ollama structure)
-        # base_url is like http://localhost:11434/api/generate
-        # we want http://localhost:11434/api/tags
-        try:
-            if "/api/generate" in base_url:
-                tags_url = base_url.replace("/api/generate", "/api/tags")
-            else:
-                # Fallback assumption
-                tags_url = "http://localhost:11434/api/tags"
-            
-            with urllib.request.urlopen(tags_url, timeout=2) as response:
-                data = json.loads(response.read().decode('utf-8'))
-                # data['models'] is a list of dicts: [{'name': 'llama3:latest', ...}, ...]
-                return [m['name'] for m in data.get('models', [])]
-        except Exception as e:
-            log.error(f"Ollama Translator: Failed to fetch models: {e}")
-            return []
+        self.shortcutStats = sHelper.addLabeledControl(_("shortcut_stats"), wx.TextCtrl)
+        self.shortcutStats.Value = GlobalPlugin.config.get("shortcut_stats", DEFAULT_CONFIG["shortcut_stats"])
+
+        self.shortcutAuto = sHelper.addLabeledControl(_("shortcut_auto"), wx.TextCtrl)
+        self.shortcutAuto.Value = GlobalPlugin.config.get("shortcut_auto", DEFAULT_CONFIG["shortcut_auto"])
+
+        self.autoTranslate = sHelper.addItem(wx.CheckBox(self, label=_("auto_translate")))
+        self.autoTranslate.SetValue(GlobalPlugin.config.get("auto_translate", DEFAULT_CONFIG["auto_translate"]))
+
+        self.shortcutClipboard = sHelper.addLabeledControl(_("shortcut_clipboard"), wx.TextCtrl)
+        self.shortcutClipboard.Value = GlobalPlugin.config.get("shortcut_clipboard", DEFAULT_CONFIG["shortcut_clipboard"])
+
+        self.shortcutClipboardWatch = sHelper.addLabeledControl(_("shortcut_clipboard_watch"), wx.TextCtrl)
+        self.shortcutClipboardWatch.Value = GlobalPlugin.config.get("shortcut_clipboard_watch", DEFAULT_CONFIG["shortcut_clipboard_watch"])
+
+        self.clipboardWatch = sHelper.addItem(wx.CheckBox(self, label=_("clipboard_watch")))
+        self.clipboardWatch.SetValue(GlobalPlugin.config.get("clipboard_watch", DEFAULT_CONFIG["clipboard_watch"]))
+        self.clipboardSpeak = sHelper.addItem(wx.CheckBox(self, label=_("clipboard_speak")))
+        self.clipboardSpeak.SetValue(GlobalPlugin.config.get("clipboard_speak", DEFAULT_CONFIG["clipboard_speak"]))
+
+        self.keepWarm = sHelper.addItem(wx.CheckBox(self, label=_("keep_warm")))
+        self.keepWarm.SetValue(GlobalPlugin.config.get("keep_warm", DEFAULT_CONFIG["keep_warm"]))
+        self.modelState = sHelper.addItem(wx.StaticText(self, label=_("model_state").format(_("state_" + GlobalPlugin.warmer.state))))
+        # Follow the warmer while the panel is open, starting with a fresh look at what the server holds
+        GlobalPlugin.warmer.onStateChanged = lambda state: wx.CallAfter(self.onModelState, state)
+        url, model, _keep_alive = GlobalPlugin.modelParams()
+        threading.Thread(target=GlobalPlugin.warmer.checkState, args=(parseEndpoints(url)[0], model),
+                         name="OllamaTranslatorModelState", daemon=True).start()
+
+        self.streamSpeech = sHelper.addItem(wx.CheckBox(self, label=_("stream_speech")))
+        self.streamSpeech.SetValue(GlobalPlugin.config.get("stream_speech", DEFAULT_CONFIG["stream_speech"]))
+
+        self.prefetchEnabled = sHelper.addItem(wx.CheckBox(self, label=_("prefetch_enabled")))
+        self.prefetchEnabled.SetValue(GlobalPlugin.config.get("prefetch_enabled", DEFAULT_CONFIG["prefetch_enabled"]))
+        self.prefetchParagraphs = sHelper.addLabeledControl(_("prefetch_paragraphs"), wx.SpinCtrl, min=1, max=10,
+            initial=GlobalPlugin.config.get("prefetch_paragraphs", DEFAULT_CONFIG["prefetch_paragraphs"]))
+
+        # Translation cache
+        self.cacheEnabled = sHelper.addItem(wx.CheckBox(self, label=_("cache_enabled")))
+        self.cacheEnabled.SetValue(GlobalPlugin.config.get("cache_enabled", DEFAULT_CONFIG["cache_enabled"]))
+        self.memoryEnabled = sHelper.addItem(wx.CheckBox(self, label=_("memory_enabled")))
+        self.memoryEnabled.SetValue(GlobalPlugin.config.get("memory_enabled", DEFAULT_CONFIG["memory_enabled"]))
+        self.cacheStats = sHelper.addItem(wx.StaticText(self, label=self.cacheStatsLabel()))
+        self.clearCacheBtn = sHelper.addItem(wx.Button(self, label=_("cache_clear")))
+        self.clearCacheBtn.Bind(wx.EVT_BUTTON, self.onClearCache)
+
+    def cacheStatsLabel(self):
+        # Runs on the GUI thread, so the disk cache is never read here; it is counted in the background instead
+        cache = GlobalPlugin.cache
+        if not cache:
+            return _("cache_stats").format(0, 0, 0)
+        size = cache.loadedSize()
+        if size is None:
+            threading.Thread(target=self.countCache, name="OllamaTranslatorCacheStats", daemon=True).start()
+            size = "\u2026"
+        label = _("cache_stats").format(size, cache.hits, cache.misses)
+        memory = GlobalPlugin.memory
+        if memory and memory.hits + memory.misses:
+            label += "\n" + _("memory_stats").format(memory.hits, memory.hits + memory.misses, memory.fuzzy)
+        return label
+
+    def countCache(self):
+        GlobalPlugin.cache.size()
+        wx.CallAfter(self.onCacheCounted)
+
+    def onCacheCounted(self):
+        # Called on the GUI thread; the panel may have been closed meanwhile
+        if self:
+            self.cacheStats.SetLabel(self.cacheStatsLabel())
+
+    def onModelState(self, state):
+        # Called on the GUI thread; the panel may have been closed meanwhile
+        if self:
+            self.modelState.SetLabel(_("model_state").format(_("state_" + state)))
+
+    def onClearCache(self, event):
+        if GlobalPlugin.cache:
+            GlobalPlugin.cache.clear()
+        if GlobalPlugin.memory:
+            GlobalPlugin.memory.clear()
+        self.cacheStats.SetLabel(self.cacheStatsLabel())
+        ui.message(_("cache_cleared"))
+
+    def setModelChoices(self, models, selection):
+        choices = list(models)
+        if selection and selection not in choices:
+            choices.insert(0, selection)
+        self.model.Set(choices)
+        if selection in choices:
+            self.model.SetStringSelection(selection)
+        elif choices:
+            self.model.SetSelection(0)
+
+    def selectedBackend(self):
+        return BACKENDS[self.backendNames[self.backend.GetSelection()]]
+
+    def requestModels(self, force=False):
+        backend = self.selectedBackend()
+        GlobalPlugin.models.fetch(
+            self.ollamaUrl.Value, lambda url, models: self.onModelsFetched(url, models, backend), force=force, backend=backend)
+
+    def onModelsFetched(self, url, models, backend=None):
+        # Called on the GUI thread; the panel may have been closed or the URL or server type changed meanwhile
+        if not self or url != self.ollamaUrl.Value or backend not in (None, self.selectedBackend()):
+            return
+        self.setModelChoices(models, self.model.GetStringSelection())
+
+    def onUrlChanged(self, event):
+        # Refetch once typing pauses instead of on every keystroke
+        event.Skip()
+        if self._urlTimer:
+            self._urlTimer.Stop()
+        self._urlTimer = wx.CallLater(800, self.requestModels)
 
     def onSave(self):
+        GlobalPlugin.ensureReady()
+        old_backend = (GlobalPlugin.config.get("backend"), GlobalPlugin.config.get("ollama_url"), GlobalPlugin.config.get("model"))
+        GlobalPlugin.config["backend"] = self.selectedBackend().name
         GlobalPlugin.config["ollama_url"] = self.ollamaUrl.Value
         GlobalPlugin.config["model"] = self.model.GetStringSelection()
+        GlobalPlugin.config["keep_warm"] = self.keepWarm.GetValue()
         GlobalPlugin.config["source_lang"] = self.sourceLang.GetStringSelection()
         GlobalPlugin.config["target_lang"] = self.targetLang.GetStringSelection()
+        GlobalPlugin.config["extra_target_langs"] = [
+            language for language in self.extraTargets.GetCheckedStrings()
+            if language != GlobalPlugin.config["target_lang"]]
+        GlobalPlugin.config["detect_language"] = self.detectLanguage.GetValue()
+        GlobalPlugin.config["stream_speech"] = self.streamSpeech.GetValue()
+        GlobalPlugin.config["prefetch_enabled"] = self.prefetchEnabled.GetValue()
+        GlobalPlugin.config["prefetch_paragraphs"] = self.prefetchParagraphs.GetValue()
+        if not GlobalPlugin.config["prefetch_enabled"]:
+            GlobalPlugin.prefetcher.cancel()
+        GlobalPlugin.config["cache_enabled"] = self.cacheEnabled.GetValue()
+        GlobalPlugin.config["memory_enabled"] = self.memoryEnabled.GetValue()
         
         old_shortcut = GlobalPlugin.config.get("shortcut")
         new_shortcut = self.shortcut.Value
@@ -200,8 +3300,43 @@ class SettingsPanel(gui.settingsDialogs.SettingsPanel):
         old_end = GlobalPlugin.config.get("shortcut_end")
         new_end = self.shortcutEnd.Value
         GlobalPlugin.config["shortcut_end"] = new_end
+
+        old_stats = GlobalPlugin.config.get("shortcut_stats")
+        new_stats = self.shortcutStats.Value
+        GlobalPlugin.config["shortcut_stats"] = new_stats
+
+        old_auto = GlobalPlugin.config.get("shortcut_auto")
+        new_auto = self.shortcutAuto.Value
+        GlobalPlugin.config["shortcut_auto"] = new_auto
+        GlobalPlugin.config["auto_translate"] = self.autoTranslate.GetValue()
+
+        old_clipboard = GlobalPlugin.config.get("shortcut_clipboard")
+        new_clipboard = self.shortcutClipboard.Value
+        GlobalPlugin.config["shortcut_clipboard"] = new_clipboard
+
+        old_clipboard_watch = GlobalPlugin.config.get("shortcut_clipboard_watch")
+        new_clipboard_watch = self.shortcutClipboardWatch.Value
+        GlobalPlugin.config["shortcut_clipboard_watch"] = new_clipboard_watch
+        GlobalPlugin.config["clipboard_watch"] = self.clipboardWatch.GetValue()
+        GlobalPlugin.config["clipboard_speak"] = self.clipboardSpeak.GetValue()
         
         GlobalPlugin.saveSettings()
+        GlobalPlugin.configureCache()
+        GlobalPlugin.configureScheduler()
+        GlobalPlugin.configureBackends()
+        if GlobalPlugin.engine:
+            GlobalPlugin.engine.configure(GlobalPlugin.config.get("max_parallel_segments", DEFAULT_CONFIG["max_parallel_segments"]))
+        if old_backend != (GlobalPlugin.config["backend"], GlobalPlugin.config["ollama_url"], GlobalPlugin.config["model"]):
+            GlobalPlugin.warmer.state = "cold"
+            GlobalPlugin.preloadModel()
+        GlobalPlugin.configureKeepWarm()
+        if GlobalPlugin.speechTranslator:
+            # Model or language changes make earlier speech and clipboard translations stale
+            GlobalPlugin.speechTranslator.clear()
+        if GlobalPlugin.clipboard:
+            GlobalPlugin.clipboard.clear()
+        GlobalPlugin.configureSpeech()
+        GlobalPlugin.configureClipboard()
         
         # Update gestures if changed
         if old_shortcut != new_shortcut:
@@ -210,40 +3345,136 @@ class SettingsPanel(gui.settingsDialogs.SettingsPanel):
             GlobalPlugin.updateGesture(old_start, new_start, "markStart")
         if old_end != new_end:
             GlobalPlugin.updateGesture(old_end, new_end, "markEndAndTranslate")
+        if old_stats != new_stats:
+            GlobalPlugin.updateGesture(old_stats, new_stats, "speakStats")
+        if old_auto != new_auto:
+            GlobalPlugin.updateGesture(old_auto, new_auto, "toggleAutoTranslate")
+        if old_clipboard != new_clipboard:
+            GlobalPlugin.updateGesture(old_clipboard, new_clipboard, "translateClipboard")
+        if old_clipboard_watch != new_clipboard_watch:
+            GlobalPlugin.updateGesture(old_clipboard_watch, new_clipboard_watch, "toggleClipboardWatch")
 
 class GlobalPlugin(globalPluginHandler.GlobalPlugin):
     config = DEFAULT_CONFIG.copy()
+    connections = ConnectionPool()
+    warmer = ModelWarmer(connections)
+    backends = BackendPool(connections)
+    telemetry = Telemetry()
+    models = ModelCatalog(connections)
+    router = ModelRouter(connections)
+    prefetcher = Prefetcher()
+    sessions = DocumentSessions()
+    speechTranslator = None
+    clipboard = None
+    contextSizes = {}
+    _contextLock = threading.Lock()
     _instance = None
+    cache = None
+    memory = None
+    engine = None
+    scheduler = None
     start_marker = None
+    startup = StartupProfile()
+    # Set once the caches, the engine and the network side are built (see ensureReady)
+    _ready = threading.Event()
+    _initLock = threading.Lock()
+    _terminated = False
 
     def __init__(self):
+        # Only what NVDA needs right away runs here, during NVDA's startup: the settings (they hold
+        # the shortcuts), the gestures and the settings panel. Everything else is built by ensureReady,
+        # on a background thread once NVDA is idle or by the first gesture that needs it.
         super(GlobalPlugin, self).__init__()
         GlobalPlugin._instance = self
+        GlobalPlugin._ready.clear()
+        GlobalPlugin._terminated = False
         log.info("Ollama Translator: Initializing GlobalPlugin...")
-        self.loadSettings()
-        
+        with self.startup.phase("settings"):
+            self.loadSettings()
+
+        # Bind initial gestures
+        with self.startup.phase("gestures"):
+            self.bindConfiguredGestures()
+
         # Register Settings Panel
-        try:
-            if hasattr(gui.settingsDialogs.NVDASettingsDialog, "categoryClasses"):
-                gui.settingsDialogs.NVDASettingsDialog.categoryClasses.append(SettingsPanel)
-            elif hasattr(gui.settingsDialogs.NVDASettingsDialog, "categoryToPanels"):
-                gui.settingsDialogs.NVDASettingsDialog.categoryToPanels.setdefault(_("title"), []).append(SettingsPanel)
-            log.info(_("settings_registered"))
-        except Exception as e:
-            log.error(f"Ollama Translator: Failed to register settings panel: {e}")
+        with self.startup.phase("settings panel"):
+            try:
+                if hasattr(gui.settingsDialogs.NVDASettingsDialog, "categoryClasses"):
+                    gui.settingsDialogs.NVDASettingsDialog.categoryClasses.append(SettingsPanel)
+                elif hasattr(gui.settingsDialogs.NVDASettingsDialog, "categoryToPanels"):
+                    gui.settingsDialogs.NVDASettingsDialog.categoryToPanels.setdefault(_("title"), []).append(SettingsPanel)
+                log.info(_("settings_registered"))
+            except Exception as e:
+                log.error(f"Ollama Translator: Failed to register settings panel: {e}")
 
-        # Add to Tools Menu via CallAfter to ensure GUI is ready
+        # Add to Tools Menu via CallAfter to ensure GUI is ready; the rest is started from there too,
+        # so it runs once NVDA has finished starting up
         wx.CallAfter(self.createMenu)
+        wx.CallAfter(self.startInitialization)
+        self.startup.report("Loaded")
 
-        # Bind initial gestures
-        self.bindConfiguredGestures()
+    def startInitialization(self):
+        threading.Thread(target=self.ensureReady, name="OllamaTranslatorInit", daemon=True).start()
+
+    @classmethod
+    def ensureReady(cls):
+        # Builds the caches, the engine, the scheduler and the network side once; called by everything
+        # that needs them. A caller that comes before the background thread does the work itself.
+        if cls._ready.is_set():
+            return
+        with cls._initLock:
+            if cls._ready.is_set() or cls._terminated:
+                return
+            cls._initialize()
+            cls._ready.set()
+        cls.startup.report("Initialized on " + threading.current_thread().name)
+
+    @classmethod
+    def _initialize(cls):
+        plugin = cls._instance
+        with cls.startup.phase("cache"):
+            cls.cache = TranslationCache(CACHE_FILE)
+        with cls.startup.phase("memory"):
+            cls.memory = TranslationMemory(MEMORY_FILE)
+            cls.configureCache()
+            if cls.config.get("memory_enabled", DEFAULT_CONFIG["memory_enabled"]):
+                # Indexing a large memory takes a while; a gesture that triggered this must not wait for it
+                threading.Thread(target=cls.memory.load, name="OllamaTranslatorMemory", daemon=True).start()
+        with cls.startup.phase("engine"):
+            cls.engine = TranslationEngine(cls.config.get("max_parallel_segments", DEFAULT_CONFIG["max_parallel_segments"]))
+            cls.scheduler = TranslationScheduler()
+            cls.configureScheduler()
+        with cls.startup.phase("backends"):
+            cls.configureBackends()
+        with cls.startup.phase("speech"):
+            cls.speechTranslator = SpeechTranslator(
+                plugin.requestTranslation,
+                lambda func, args: cls.scheduler.submit(func, args, PRIORITY_INTERACTIVE))
+            cls.configureSpeech()
+        with cls.startup.phase("clipboard"):
+            cls.clipboard = ClipboardWatcher(
+                plugin.prepareTranslation,
+                lambda func, args: cls.scheduler.submit(func, args, PRIORITY_BACKGROUND),
+                plugin.onClipboardReady)
+            cls.configureClipboard()
+
+        # Load the model in the background so the first translation doesn't pay for it,
+        # and fetch the model list so the settings panel opens with it already cached
+        with cls.startup.phase("model"):
+            cls.preloadModel()
+            cls.models.fetch(cls.config.get("ollama_url", DEFAULT_CONFIG["ollama_url"]))
+            cls.configureKeepWarm()
 
     def bindConfiguredGestures(self):
         # Helper to bind all configured gestures
         for key, script in [
             ("shortcut", "translate"),
             ("shortcut_start", "markStart"),
-            ("shortcut_end", "markEndAndTranslate")
+            ("shortcut_end", "markEndAndTranslate"),
+            ("shortcut_stats", "speakStats"),
+            ("shortcut_auto", "toggleAutoTranslate"),
+            ("shortcut_clipboard", "translateClipboard"),
+            ("shortcut_clipboard_watch", "toggleClipboardWatch")
         ]:
             shortcut = self.config.get(key, DEFAULT_CONFIG[key])
             if shortcut:
@@ -253,6 +3484,10 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
                     log.error(f"Ollama Translator: Failed to bind {key}: {e}")
 
     def createMenu(self):
+        with self.startup.phase("menu"):
+            self.addMenu()
+
+    def addMenu(self):
         try:
             self.toolsMenu = gui.mainFrame.sysTrayIcon.toolsMenu
             self.ollamaMenu = wx.Menu()
@@ -265,6 +3500,15 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
             self.settingsItem = self.ollamaMenu.Append(wx.ID_ANY, _("settings_menu"), _("settings_desc"))
             gui.mainFrame.sysTrayIcon.Bind(wx.EVT_MENU, self.onSettings, id=self.settingsItem.GetId())
             
+            # Clipboard Watching Item
+            self.clipboardItem = self.ollamaMenu.AppendCheckItem(wx.ID_ANY, _("clipboard_watch"))
+            self.clipboardItem.Check(self.config.get("clipboard_watch", DEFAULT_CONFIG["clipboard_watch"]))
+            gui.mainFrame.sysTrayIcon.Bind(wx.EVT_MENU, self.onToggleClipboard, id=self.clipboardItem.GetId())
+
+            # Export Statistics Item
+            self.exportStatsItem = self.ollamaMenu.Append(wx.ID_ANY, _("export_stats"), _("export_stats_desc"))
+            gui.mainFrame.sysTrayIcon.Bind(wx.EVT_MENU, self.onExportStats, id=self.exportStatsItem.GetId())
+            
             # Documentation Item
             self.docItem = self.ollamaMenu.Append(wx.ID_ANY, _("documentation"), _("doc_desc"))
             gui.mainFrame.sysTrayIcon.Bind(wx.EVT_MENU, self.onDocumentation, id=self.docItem.GetId())
@@ -276,6 +3520,9 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
         except Exception as e:
             log.error(f"Ollama Translator: Failed to add to Tools menu: {e}")
 
+    def onToggleClipboard(self, event):
+        self.script_toggleClipboardWatch(None)
+
     def onSettings(self, event):
         # Open NVDA Settings Dialog focused on our panel
         try:
@@ -291,6 +3538,26 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
             except:
                 pass
 
+    def onExportStats(self, event):
+        gui.mainFrame.prePopup()
+        dlg = wx.FileDialog(
+            gui.mainFrame, _("export_stats"),
+            defaultDir=globalVars.appArgs.configPath, defaultFile="ollamaTranslatorStats.json",
+            wildcard="JSON (*.json)|*.json|CSV (*.csv)|*.csv",
+            style=wx.FD_SAVE | wx.FD_OVERWRITE_PROMPT
+        )
+        try:
+            if dlg.ShowModal() == wx.ID_OK:
+                path = dlg.GetPath()
+                self.telemetry.export(path)
+                ui.message(_("stats_exported").format(path))
+        except Exception as e:
+            log.error(f"Ollama Translator: Failed to export statistics: {e}")
+            ui.message(_("error").format(e))
+        finally:
+            dlg.Destroy()
+            gui.mainFrame.postPopup()
+
     def onDocumentation(self, event):
         try:
             # Determine language
@@ -350,6 +3617,26 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 
     def terminate(self):
         super(GlobalPlugin, self).terminate()
+        with GlobalPlugin._initLock:
+            # An initialization that has not started yet is skipped
+            GlobalPlugin._terminated = True
+        if GlobalPlugin.speechTranslator:
+            GlobalPlugin.speechTranslator.uninstall()
+        if GlobalPlugin.clipboard:
+            GlobalPlugin.clipboard.stop()
+        GlobalPlugin.warmer.stopKeepWarm()
+        GlobalPlugin.prefetcher.cancel()
+        GlobalPlugin.backends.stop()
+        if GlobalPlugin.scheduler:
+            GlobalPlugin.scheduler.shutdown()
+        if GlobalPlugin.cache:
+            GlobalPlugin.cache.save()
+        if GlobalPlugin.memory:
+            GlobalPlugin.memory.save()
+        if GlobalPlugin.engine:
+            GlobalPlugin.engine.shutdown()
+        log.info(f"Ollama Translator: Connection pool stats: {GlobalPlugin.connections.stats()}")
+        GlobalPlugin.connections.closeAll()
         try:
             if hasattr(gui.settingsDialogs.NVDASettingsDialog, "categoryClasses"):
                 if SettingsPanel in gui.settingsDialogs.NVDASettingsDialog.categoryClasses:
@@ -369,6 +3656,7 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
             log.error(f"Ollama Translator: Failed to remove from Tools menu: {e}")
 
     def onShowDialog(self, event):
+        self.ensureReady()
         gui.mainFrame.prePopup()
         d = TranslationDialog(gui.mainFrame)
         d.Show()
@@ -385,6 +3673,153 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
         except Exception as e:
             log.error(f"Ollama Translator: Error loading settings: {e}")
 
+    @classmethod
+    def configureCache(cls):
+        if cls.cache:
+            cls.cache.configure(
+                cls.config.get("cache_memory_entries", DEFAULT_CONFIG["cache_memory_entries"]),
+                cls.config.get("cache_max_entries", DEFAULT_CONFIG["cache_max_entries"]),
+                cls.config.get("cache_max_age_days", DEFAULT_CONFIG["cache_max_age_days"])
+            )
+        if cls.memory:
+            cls.memory.configure(cls.config.get("memory_max_entries", DEFAULT_CONFIG["memory_max_entries"]))
+        cls.sessions.configure(
+            cls.config.get("max_sessions", DEFAULT_CONFIG["max_sessions"]),
+            cls.config.get("session_ttl", DEFAULT_CONFIG["session_ttl"]),
+            cls.config.get("session_max_chars", DEFAULT_CONFIG["session_max_chars"])
+        )
+
+    @classmethod
+    def configureScheduler(cls):
+        if cls.scheduler:
+            cls.scheduler.configure(
+                cls.config.get("worker_threads", DEFAULT_CONFIG["worker_threads"]),
+                cls.config.get("queue_size", DEFAULT_CONFIG["queue_size"]),
+                cls.config.get("max_in_flight", DEFAULT_CONFIG["max_in_flight"]),
+                cls.config.get("prefetch_in_flight", DEFAULT_CONFIG["prefetch_in_flight"])
+            )
+
+    @classmethod
+    def configureBackends(cls):
+        backend = backendFor(cls.config.get("backend", DEFAULT_CONFIG["backend"]))
+        cls.warmer.backend = backend
+        cls.models.backend = backend
+        cls.backends.configure(
+            parseEndpoints(cls.config.get("ollama_url", DEFAULT_CONFIG["ollama_url"])),
+            cls.config.get("health_interval", DEFAULT_CONFIG["health_interval"]),
+            cls.config.get("breaker_threshold", DEFAULT_CONFIG["breaker_threshold"]),
+            cls.config.get("breaker_cooldown", DEFAULT_CONFIG["breaker_cooldown"]),
+            backend
+        )
+        cls.router.configure(
+            cls.config.get("model_tiers", DEFAULT_CONFIG["model_tiers"]),
+            parseEndpoints(cls.config.get("ollama_url", DEFAULT_CONFIG["ollama_url"])),
+            cls.preloadTier,
+            backend
+        )
+
+    @classmethod
+    def modelParams(cls):
+        return (
+            cls.config.get("ollama_url", DEFAULT_CONFIG["ollama_url"]),
+            cls.config.get("model", DEFAULT_CONFIG["model"]),
+            cls.config.get("keep_alive", DEFAULT_CONFIG["keep_alive"])
+        )
+
+    @classmethod
+    def preloadModel(cls, refresh=False):
+        # refresh also re-sends the request for loaded models so their keep_alive starts over (keep warm)
+        url, model, keep_alive = cls.modelParams()
+        # Load with the context window translations will ask for, or Ollama would load the model twice
+        options = {k: v for k, v in cls.generationOptions(model, "", "").items() if k == "num_ctx"}
+        for endpoint in parseEndpoints(url):
+            cls.warmer.preload(endpoint, model, keep_alive, options, refresh=refresh)
+        for tier in cls.config.get("model_tiers", DEFAULT_CONFIG["model_tiers"]):
+            if isinstance(tier, dict) and tier.get("model") and tier["model"] != model:
+                cls.preloadTier(tier["model"], refresh)
+
+    @classmethod
+    def preloadTier(cls, model, refresh=False):
+        # A routed model that is not loaded yet; the request itself goes to the default model meanwhile
+        url, _model, keep_alive = cls.modelParams()
+        options = {k: v for k, v in cls.generationOptions(model, "", "").items() if k == "num_ctx"}
+        for endpoint in parseEndpoints(url):
+            cls.warmer.preload(endpoint, model, keep_alive, options, cls.router.markLoaded, refresh)
+
+    @classmethod
+    def generationOptions(cls, model, prompt, text, target=None, expand=False):
+        # Options sized to one request: a context window that holds the prompt and the expected output,
+        # a cap on generated tokens so a looping model stops early, and deterministic sampling.
+        # The window never shrinks for a model, since Ollama reloads the model whenever it changes.
+        # expand raises the cap for a second try after an answer was cut off by it.
+        options = dict(cls.config.get("generation_options", DEFAULT_CONFIG["generation_options"]))
+        adaptive = cls.config.get("adaptive_options", DEFAULT_CONFIG["adaptive_options"])
+        chars_per_token = max(1, cls.config.get("chars_per_token", DEFAULT_CONFIG["chars_per_token"]))
+        if adaptive:
+            predict = max(
+                cls.config.get("predict_min", DEFAULT_CONFIG["predict_min"]),
+                int(estimateOutputTokens(text, target, chars_per_token) * cls.config.get("predict_ratio", DEFAULT_CONFIG["predict_ratio"]))
+            )
+            if expand:
+                predict = int(predict * PREDICT_EXPAND)
+            num_ctx = fitContext(
+                estimateTokens(prompt, chars_per_token) + predict,
+                cls.config.get("context_min", DEFAULT_CONFIG["context_min"]),
+                cls.config.get("context_max", DEFAULT_CONFIG["context_max"])
+            )
+            with cls._contextLock:
+                num_ctx = cls.contextSizes[model] = max(num_ctx, cls.contextSizes.get(model, 0))
+            options.update(num_ctx=num_ctx, num_predict=predict)
+        # Per-model overrides, by full name ("llama3:8b") or without the tag ("llama3")
+        overrides = cls.config.get("model_options", DEFAULT_CONFIG["model_options"])
+        override = overrides.get(model) or overrides.get(model.split(":")[0]) or {}
+        options.update(override)
+        if expand and options.get("num_predict", -1) > 0 and ("num_predict" in override or not adaptive):
+            # A fixed cap from the settings is raised the same way
+            options["num_predict"] = int(options["num_predict"] * PREDICT_EXPAND)
+        return options
+
+    @classmethod
+    def configureSpeech(cls):
+        if not cls.speechTranslator:
+            return
+        cls.speechTranslator.configure(
+            cls.config.get("auto_budget", DEFAULT_CONFIG["auto_budget"]),
+            cls.config.get("auto_queue", DEFAULT_CONFIG["auto_queue"]),
+            cls.config.get("auto_recent_entries", DEFAULT_CONFIG["auto_recent_entries"])
+        )
+        if cls.config.get("auto_translate", DEFAULT_CONFIG["auto_translate"]):
+            cls.speechTranslator.install()
+        else:
+            cls.speechTranslator.uninstall()
+
+    @classmethod
+    def configureClipboard(cls):
+        if not cls.clipboard:
+            return
+        cls.clipboard.configure(
+            cls.config.get("clipboard_interval", DEFAULT_CONFIG["clipboard_interval"]),
+            cls.config.get("clipboard_debounce", DEFAULT_CONFIG["clipboard_debounce"]),
+            cls.config.get("clipboard_max_chars", DEFAULT_CONFIG["clipboard_max_chars"])
+        )
+        enabled = cls.config.get("clipboard_watch", DEFAULT_CONFIG["clipboard_watch"])
+        if enabled:
+            cls.clipboard.start()
+        else:
+            cls.clipboard.stop()
+        item = getattr(cls._instance, "clipboardItem", None)
+        if item:
+            # May run on the initialization thread
+            wx.CallAfter(item.Check, enabled)
+
+    @classmethod
+    def configureKeepWarm(cls):
+        if cls.config.get("keep_warm", DEFAULT_CONFIG["keep_warm"]):
+            cls.warmer.startKeepWarm(
+                cls.config.get("keep_warm_interval", DEFAULT_CONFIG["keep_warm_interval"]), lambda: cls.preloadModel(refresh=True))
+        else:
+            cls.warmer.stopKeepWarm()
+
     @classmethod
     def saveSettings(cls):
         try:
@@ -411,6 +3846,7 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
             ui.message("Failed to set start marker.")
 
     def script_markEndAndTranslate(self, gesture):
+        self.ensureReady()
         if not self.start_marker:
             ui.message(_("no_start_marker"))
             return
@@ -467,29 +3903,19 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
             else:
                 range_info.setEndPoint(end_marker, "endToEnd")
             
-            # Extract text safely using chunks
-            text = ""
-            try:
-                for chunk in range_info.getTextInChunks(textInfos.UNIT_PARAGRAPH):
-                    text += chunk
-                    if len(text) > 5000:
-                        text = text[:5000]
-                        break
-            except Exception as e:
-                # Fallback to simple .text if chunks fail
-                log.warning(f"Ollama Translator: getTextInChunks failed, falling back to .text: {e}")
-                text = range_info.text
+            # Paragraph chunks are kept by the engine as segment boundaries; longer ranges are cut at max_text_chars
+            max_chars = self.config.get("max_text_chars", DEFAULT_CONFIG["max_text_chars"])
+            paragraphs, truncated = self.readText(range_info, max_chars)
+            if truncated:
+                log.info(f"Ollama Translator: Marked text truncated to {max_chars} characters.")
 
-            if not text or not text.strip():
+            if not any(p.strip() for p in paragraphs):
                 ui.message(_("no_text"))
                 return
-            
-            # Limit text length just in case fallback was used
-            if len(text) > 5000:
-                text = text[:5000]
 
             ui.message(_("translating"))
-            threading.Thread(target=self.translateText, args=(text,)).start()
+            self.submitTranslation(paragraphs, session=self.documentSession(obj))
+            self.schedulePrefetch(obj, range_info)
             
             # Reset marker
             self.start_marker = None
@@ -499,115 +3925,355 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
             log.error(f"Ollama Translator: Failed to process end marker: {e}")
             ui.message(_("error").format(e))
 
+    def script_speakStats(self, gesture):
+        self.ensureReady()
+        summary = self.telemetry.summary()
+        if not summary["requests"]:
+            ui.message(_("stats_empty"))
+            return
+
+        def fmt(value, pattern="{:.2f}"):
+            return _("not_available") if value is None else pattern.format(value)
+
+        ui.message(_("stats_summary").format(
+            summary["requests"], summary["errors"],
+            fmt(summary["p50"]), fmt(summary["p95"]), fmt(summary["ttft_p50"]),
+            fmt(summary["tokens_per_sec"], "{:.1f}"), fmt(summary["cache_hit_rate"], "{:.0%}")
+        ) + " " + _("memory_hit_rate").format(fmt(self.memory.hitRate() if self.memory else None, "{:.0%}"))
+            + " " + _("skipped_summary").format(summary["skipped"])
+            + "".join(" " + _("model_summary").format(model, stats["requests"], fmt(stats["p50"]))
+                      for model, stats in summary["by_model"].items() if len(summary["by_model"]) > 1)
+            + self.speechSummary())
+
+    def speechSummary(self):
+        stats = self.speechTranslator.stats() if self.speechTranslator else {}
+        if not stats.get("utterances"):
+            return ""
+        return " " + _("auto_summary").format(
+            stats["utterances"], stats.get("reused", 0), stats.get("in_time", 0), stats.get("missed", 0),
+            stats.get("dropped", 0), stats["peak_depth"])
+
+    def script_toggleAutoTranslate(self, gesture):
+        self.ensureReady()
+        # The announcement itself is never translated
+        enabled = not self.config.get("auto_translate", DEFAULT_CONFIG["auto_translate"])
+        self.config["auto_translate"] = enabled
+        if enabled:
+            ui.message(_("auto_on"))
+        self.configureSpeech()
+        if not enabled:
+            ui.message(_("auto_off"))
+        self.saveSettings()
+
+    def script_toggleClipboardWatch(self, gesture):
+        self.ensureReady()
+        enabled = not self.config.get("clipboard_watch", DEFAULT_CONFIG["clipboard_watch"])
+        self.config["clipboard_watch"] = enabled
+        self.configureClipboard()
+        self.saveSettings()
+        ui.message(_("clipboard_on") if enabled else _("clipboard_off"))
+
+    def script_translateClipboard(self, gesture):
+        self.ensureReady()
+        # Usually answered at once when the clipboard watcher already translated the text
+        text = self.clipboard.read(self.config.get("clipboard_max_chars", DEFAULT_CONFIG["clipboard_max_chars"]))
+        if not text or not text.strip():
+            ui.message(_("clipboard_empty"))
+            return
+        translation = self.clipboard.ready(text)
+        if translation is not None:
+            self.deliverTranslation(translation)
+            return
+        try:
+            self.scheduler.submit(self.translateClipboardText, (text,), PRIORITY_INTERACTIVE, "gesture")
+        except QueueFullError:
+            ui.message(_("busy"))
+
+    def translateClipboardText(self, text):
+        # The watcher may be translating this very text; wait for it rather than generate it twice
+        if self.clipboard.waitFor(text, currentJob()):
+            translation = self.clipboard.ready(text)
+            if translation is not None:
+                self.deliverTranslation(translation)
+                return
+        self.clipboard.claim(text)
+        self.translateText(text)
+
+    def prepareTranslation(self, text):
+        # Translate text into the cache the way translateText would split it, without delivering it
+        segments = splitSegments([text], self.config.get("segment_chars", DEFAULT_CONFIG["segment_chars"]))
+        model = self.routeModel("".join(segments)) if len(segments) > 1 else None
+        return "".join(self.requestTranslation(segment, model=model) + segment[len(segment.rstrip()):]
+                       if segment.strip() else segment for segment in segments).strip()
+
+    def onClipboardReady(self, text, translation):
+        if self.config.get("clipboard_speak", DEFAULT_CONFIG["clipboard_speak"]):
+            wx.CallAfter(ui.message, translation)
+
     def script_translate(self, gesture):
+        self.ensureReady()
         log.info("Ollama Translator: Translation triggered.")
         obj = api.getFocusObject()
         treeInterceptor = obj.treeInterceptor
         if treeInterceptor and hasattr(treeInterceptor, "TextInfo") and not treeInterceptor.passThrough:
             obj = treeInterceptor
 
+        # Each candidate range is read once, lazily, and only up to the character limit
+        max_chars = self.config.get("max_text_chars", DEFAULT_CONFIG["max_text_chars"])
+        paragraphs, truncated = [], False
+
         # 1. Try to get selected text (User's primary workflow)
         info = None
         try:
             info = obj.makeTextInfo(textInfos.POSITION_SELECTION)
         except (RuntimeError, NotImplementedError):
             info = None
+        if info and not info.isCollapsed:
+            paragraphs, truncated = self.readText(info, max_chars)
 
         # 2. If no selection, try to get text from the focus object (Fallback)
-        if not info or info.isCollapsed:
+        if not "".join(paragraphs):
             try:
                 info = obj.makeTextInfo(textInfos.POSITION_ALL)
+                paragraphs, truncated = self.readText(info, max_chars)
             except (RuntimeError, NotImplementedError):
                 info = None
 
         # 3. If still no text, try navigator object
-        if not info or not info.text:
+        if not "".join(paragraphs):
             obj = api.getNavigatorObject()
             try:
                 info = obj.makeTextInfo(textInfos.POSITION_ALL)
+                paragraphs, truncated = self.readText(info, max_chars)
             except (RuntimeError, NotImplementedError):
                 info = None
 
-        if not info or not info.text:
+        if not info or not "".join(paragraphs):
             ui.message(_("no_text"))
             return
 
-        text = info.text
         # Limit text length to avoid accidental huge translations if falling back to ALL
-        if len(text) > 5000:
-            ui.message("Text too long to translate (limit 5000 chars). Please select a smaller chunk.")
+        if truncated:
+            ui.message(_("text_too_long").format(max_chars))
             return
 
         ui.message(_("translating"))
-        threading.Thread(target=self.translateText, args=(text,)).start()
+        self.submitTranslation(paragraphs, session=self.documentSession(obj))
+        self.schedulePrefetch(obj, info)
 
-    def translateText(self, text, callback=None):
-        url = self.config.get("ollama_url", DEFAULT_CONFIG["ollama_url"])
-        model = self.config.get("model", DEFAULT_CONFIG["model"])
-        source = self.config.get("source_lang", DEFAULT_CONFIG["source_lang"])
-        target = self.config.get("target_lang", DEFAULT_CONFIG["target_lang"])
+    def readText(self, info, max_chars):
+        # extractText with its main thread time recorded in the statistics
+        start = time.monotonic()
+        paragraphs, truncated = extractText(info, max_chars)
+        self.telemetry.recordExtraction(time.monotonic() - start, sum(len(p) for p in paragraphs))
+        return paragraphs, truncated
 
-        prompt = f"Translate the following text from {source} to {target}. Only output the translation, nothing else. Text: {text}"
-        
-        data = {
-            "model": model,
-            "prompt": prompt,
-            "stream": True
-        }
+    def schedulePrefetch(self, obj, info):
+        # Queue the paragraphs after info for background translation. Text is read here, on the
+        # main thread, like the scripts do; only the translation runs in the background.
+        if not self.config.get("prefetch_enabled", DEFAULT_CONFIG["prefetch_enabled"]):
+            return
+        if not (self.config.get("cache_enabled", DEFAULT_CONFIG["cache_enabled"]) or
+                self.config.get("memory_enabled", DEFAULT_CONFIG["memory_enabled"])):
+            # Without the cache or the translation memory nothing could reuse the results
+            return
+        depth = self.config.get("prefetch_paragraphs", DEFAULT_CONFIG["prefetch_paragraphs"])
+        budget = self.config.get("prefetch_max_chars", DEFAULT_CONFIG["prefetch_max_chars"])
+        texts = []
+        try:
+            cursor = info.copy()
+            cursor.collapse(end=True)
+            paragraph = cursor.copy()
+            paragraph.expand(textInfos.UNIT_PARAGRAPH)
+            if paragraph.compareEndPoints(info, "startToEnd") < 0 and not cursor.move(textInfos.UNIT_PARAGRAPH, 1):
+                return
+            length = 0
+            # Bound the walk too, so a run of blank lines doesn't keep the main thread busy
+            for _step in range(depth * 3):
+                paragraph = cursor.copy()
+                paragraph.expand(textInfos.UNIT_PARAGRAPH)
+                text = paragraph.text
+                if text.strip():
+                    if length + len(text) > budget:
+                        break
+                    texts.append(text)
+                    length += len(text)
+                    if len(texts) >= depth:
+                        break
+                if not cursor.move(textInfos.UNIT_PARAGRAPH, 1):
+                    break
+        except Exception as e:
+            log.debug(f"Ollama Translator: Could not read ahead for prefetch: {e}")
+        if not texts:
+            return
+        try:
+            session = self.documentSession(obj)
+            self.prefetcher.schedule(obj, texts, lambda text: self.requestTranslation(text, session=session),
+                lambda func, args: self.scheduler.submit(func, args, PRIORITY_BACKGROUND))
+        except QueueFullError:
+            log.debug("Ollama Translator: Queue is full, skipping prefetch.")
 
+    @staticmethod
+    def documentSession(obj):
+        # Keyed on what stays the same while a document is open: NVDA creates new objects for the same
+        # document, and id() values are reused once an object is collected. The window handle tells apart
+        # documents with the same title; the URL (or title) tells apart pages shown in the same window.
+        # None, meaning no conversation, when neither is known.
         try:
-            req = urllib.request.Request(url, data=json.dumps(data).encode('utf-8'), headers={'Content-Type': 'application/json'})
-            # Set timeout to 30 seconds
-            with urllib.request.urlopen(req, timeout=30) as response:
-                full_translation = ""
-                count = 0
-                
-                # Notify start
-                if callback:
+            document = getattr(obj, "treeInterceptor", None) or obj
+            root = getattr(document, "rootNVDAObject", None) or document
+            handle = getattr(root, "windowHandle", None)
+            identity = getattr(document, "documentConstantIdentifier", None) or getattr(root, "name", None)
+        except Exception:
+            return None
+        if not handle and not identity:
+            return None
+        return "document-%s-%s" % (handle or 0, identity or "")
+
+    def event_gainFocus(self, obj, nextHandler):
+        # Speculative work belongs to the document being read; drop it when focus leaves it
+        document = self.prefetcher.document
+        if document is not None and obj is not document and getattr(obj, "treeInterceptor", None) is not document:
+            self.prefetcher.cancel()
+        nextHandler()
+
+    def submitTranslation(self, text, callback=None, priority=PRIORITY_INTERACTIVE, supersede="gesture", session=None, onText=None):
+        self.ensureReady()
+        # Queue translateText on the scheduler; a new gesture supersedes the previous one
+        try:
+            return self.scheduler.submit(self.translateText, (text, callback, session, onText), priority, supersede)
+        except QueueFullError:
+            log.warning("Ollama Translator: Translation queue is full.")
+            ui.message(_("busy"))
+            return None
+
+    def translateText(self, text, callback=None, session=None, onText=None):
+        # session names the document the text comes from, so its segments share a document session.
+        # onText, if given, receives the translation in source order as it streams in (the dialog renders it);
+        # callback still gets status messages and the final text.
+        segment_chars = self.config.get("segment_chars", DEFAULT_CONFIG["segment_chars"])
+        segments = text if isinstance(text, list) else [text]
+        segments = splitSegments(segments, segment_chars)
+        text = "".join(segments)
+
+        job = currentJob()
+
+        def speak(sentence):
+            # Nothing more is said once a newer request superseded this one
+            if not (job and job.cancelled):
+                wx.CallAfter(ui.message, sentence)
+
+        targets = self.targetLanguages()
+
+        # Speak sentences as they stream in; the dialog renders the text itself
+        streamer = None
+        if not callback and len(targets) == 1 and self.config.get("stream_speech", DEFAULT_CONFIG["stream_speech"]):
+            streamer = SentenceStreamer(speak)
+        if len(targets) > 1:
+            onText = None
+        feed = streamer.feed if streamer else onText
+
+        try:
+            queued = job.submitted if job else time.monotonic()
+            if len(targets) > 1:
+                translation = self.translateTargets(segments, targets, callback, session, queued)
+            elif len(segments) <= 1:
+                translation = self.requestTranslation(text, callback, onText=feed, queuedAt=queued, session=session)
+                if streamer:
+                    streamer.finish(translation)
+            else:
+                if callback and not onText:
                     wx.CallAfter(callback, _("progress_started"))
-                
-                for line in response:
-                    if line:
-                        try:
-                            json_line = json.loads(line.decode('utf-8'))
-                            chunk = json_line.get("response", "")
-                            full_translation += chunk
-                            count += len(chunk)
-                            
-                            # Update progress periodically (e.g. every 50 chars or so to avoid spamming UI)
-                            # For screen readers, too many updates are bad. Let's update only if callback is present (dialog open)
-                            # and maybe not too often.
-                            if callback and count % 50 == 0:
-                                wx.CallAfter(callback, _("progress_update").format(count))
-                                
-                            if json_line.get("done", False):
+                first = next((i for i, seg in enumerate(segments) if seg.strip()), 0)
+                spoken = [0]
+                streamed = [False]
+                # The whole document goes to one model, chosen by its full length
+                model = self.routeModel(text)
+
+                def feedFirst(chunk):
+                    streamed[0] = True
+                    feed(chunk)
+
+                def translateSegment(index, segment):
+                    if feed and index == first:
+                        result = self.requestTranslation(segment, onText=feedFirst, queuedAt=queued, session=session, model=model)
+                        if streamer:
+                            streamer.finish(result)
+                        return result
+                    return self.requestTranslation(segment, queuedAt=queued, session=session, model=model)
+
+                def onSegmentDone(index, done, total, results):
+                    if streamer:
+                        # Later segments are spoken whole, in order, once everything before them was spoken
+                        while spoken[0] < len(results) and results[spoken[0]] is not None:
+                            if spoken[0] != first:
+                                for sentence in splitSentences(results[spoken[0]]):
+                                    if sentence.strip():
+                                        speak(sentence.strip())
+                            spoken[0] += 1
+                    elif onText:
+                        # The first segment streamed in; the following ones are added whole, in order
+                        while spoken[0] < len(results) and results[spoken[0]] is not None:
+                            if spoken[0] > first:
+                                onText(results[spoken[0]])
+                            elif spoken[0] == first:
+                                result = results[first]
+                                onText(result[len(result.rstrip()):] if streamed[0] else result)
+                            spoken[0] += 1
+                    elif callback:
+                        # Show the contiguous translated prefix so the dialog fills in source order
+                        prefix = []
+                        for result in results:
+                            if result is None:
                                 break
-                        except json.JSONDecodeError:
-                            continue
+                            prefix.append(result)
+                        progress = _("progress_segments").format(done, total)
+                        wx.CallAfter(callback, "".join(prefix) + "\n\n" + progress if prefix else progress)
 
-                if full_translation.strip():
-                    if callback:
-                        wx.CallAfter(callback, full_translation.strip())
-                    else:
-                        wx.CallAfter(ui.browseableMessage, full_translation.strip(), _("title"))
-                else:
-                    msg = _("failed")
-                    if callback:
-                        wx.CallAfter(callback, msg)
-                    else:
-                        ui.message(msg)
+                translation, failures = self.engine.translate(segments, translateSegment, onSegmentDone)
+                if failures:
+                    log.warning(f"Ollama Translator: {len(failures)} of {len(segments)} segments failed: {failures[0][1]}")
+                    if len(failures) == len([seg for seg in segments if seg.strip()]):
+                        raise failures[0][1]
+                    ui.message(_("segments_failed").format(len(failures), len(segments)))
+            if job:
+                job.check()
+            self.deliverTranslation(translation.strip(), callback)
 
-        except (urllib.error.URLError, socket.timeout) as e:
+        except TranslationCancelled:
+            log.debug("Ollama Translator: Translation cancelled.")
+
+        except (OSError, http.client.HTTPException) as e:
             log.error(f"Translation timeout or network error: {e}")
             
             def ask_retry():
                 dlg = wx.MessageDialog(None, _("timeout_message"), _("timeout_title"), wx.YES_NO | wx.ICON_WARNING)
                 if dlg.ShowModal() == wx.ID_YES:
-                    threading.Thread(target=self.translateText, args=(text, callback)).start()
+                    if callback and onText:
+                        # Clears the partial translation before the new attempt streams in
+                        callback(_("translating"))
+                    if job:
+                        self.submitTranslation(text, callback, job.priority, job.supersede, session, onText)
+                    else:
+                        self.submitTranslation(text, callback, session=session, onText=onText)
                 dlg.Destroy()
             
             wx.CallAfter(ask_retry)
 
+        except ServerUnavailable as e:
+            # Fails at once while the breaker is open; spoken only once per outage
+            if callback:
+                wx.CallAfter(callback, str(e))
+            elif self.backends.announceOutage():
+                ui.message(str(e))
+
+        except TranslationError as e:
+            msg = str(e)
+            if callback:
+                wx.CallAfter(callback, msg)
+            else:
+                ui.message(msg)
+
         except Exception as e:
             log.error(f"Translation error: {e}")
             msg = _("error").format(e)
@@ -616,10 +4282,450 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
             else:
                 ui.message(msg)
 
+    def targetLanguages(self):
+        # The target language first, then the other languages to translate into at the same time
+        targets = [self.config.get("target_lang", DEFAULT_CONFIG["target_lang"])]
+        for language in self.config.get("extra_target_langs", DEFAULT_CONFIG["extra_target_langs"]):
+            if language in LANGUAGES and language not in targets:
+                targets.append(language)
+        return targets
+
+    def translateTargets(self, segments, targets, callback, session, queued):
+        # Every segment in every language goes to the segment engine at once, so the languages are
+        # generated side by side; the text was read once and the cache and connections are shared.
+        # A language is shown (dialog) or announced (gesture) as soon as all its segments are done.
+        if callback:
+            wx.CallAfter(callback, _("progress_started"))
+        model = self.routeModel("".join(segments))
+        count = len(segments)
+        outputs = [None] * (count * len(targets))
+        finished = set()
+
+        def translateItem(index, segment):
+            target = targets[index // count]
+            # Per-language document sessions, since a session holds one conversation
+            key = session if not session or target == targets[0] else "%s:%s" % (session, target)
+            return self.requestTranslation(segment, queuedAt=queued, session=key, model=model, target=target)
+
+        def combine():
+            parts = []
+            for number, target in enumerate(targets):
+                if number in finished:
+                    part = "".join(outputs[number * count:(number + 1) * count]).strip()
+                    parts.append(_("target_heading").format(target) + "\n" + part)
+            return "\n\n".join(parts)
+
+        def onItemDone(index, done, total, results):
+            number = index // count
+            if number in finished or any(r is None for r in results[number * count:(number + 1) * count]):
+                return
+            outputs[number * count:(number + 1) * count] = results[number * count:(number + 1) * count]
+            finished.add(number)
+            if callback:
+                progress = _("progress_segments").format(done, total)
+                wx.CallAfter(callback, combine() + "\n\n" + progress)
+            elif len(finished) < len(targets):
+                wx.CallAfter(ui.message, _("target_done").format(targets[number]))
+
+        _translation, failures = self.engine.translate(segments * len(targets), translateItem, onItemDone)
+        if failures:
+            log.warning(f"Ollama Translator: {len(failures)} of {len(outputs)} segments failed: {failures[0][1]}")
+            if len(failures) == len([seg for seg in segments if seg.strip()]) * len(targets):
+                raise failures[0][1]
+            ui.message(_("segments_failed").format(len(failures), len(outputs)))
+        # Failed segments kept their source text; every language is complete by now
+        finished.update(range(len(targets)))
+        return combine()
+
+    def requestTranslation(self, text, callback=None, onText=None, queuedAt=None, session=None, model=None, target=None):
+        # Translate a single segment. Raises on failure.
+        # onText, if given, receives each streamed chunk as it arrives; model, if given, overrides the router,
+        # and target the configured target language.
+        model = model or self.routeModel(text)
+        source = self.config.get("source_lang", DEFAULT_CONFIG["source_lang"])
+        primary = self.config.get("target_lang", DEFAULT_CONFIG["target_lang"])
+        target = target or primary
+
+        job = currentJob()
+        if job and job.priority < PRIORITY_BACKGROUND and target == primary:
+            # The same paragraph may already be generating speculatively; its result lands in the cache
+            self.prefetcher.waitFor(text, job)
+
+        start = time.monotonic()
+        metrics = {"model": model, "target": target, "chars": len(text), "queue_wait": start - queuedAt if queuedAt else 0.0}
+        if session:
+            metrics["session"] = session
+
+        skip = False
+        if self.config.get("detect_language", DEFAULT_CONFIG["detect_language"]):
+            # Skip the model for text it would only echo back, and tell it the source language when known
+            skip = isNonLinguistic(text)
+            if not skip:
+                # A guess from the script alone only names the language; skipping needs its words as well
+                detected, certain = identifyLanguage(text)
+                if source == "Auto":
+                    source = detected or source
+                skip = certain and detected == target
+        metrics["source"] = source
+        if skip:
+            log.debug("Ollama Translator: Nothing to translate.")
+            self.telemetry.record(status="skipped", output_chars=len(text.strip()), total=time.monotonic() - start, **metrics)
+            return text.strip()
+
+        cache_key = None
+        if self.cache and self.config.get("cache_enabled", DEFAULT_CONFIG["cache_enabled"]):
+            cache_key = TranslationCache.makeKey(model, source, target, PROMPT_TEMPLATE, text)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                log.debug("Ollama Translator: Cache hit.")
+                self.telemetry.record(status="cache", output_chars=len(cached), total=time.monotonic() - start, **metrics)
+                return cached
+
+        lines = text.splitlines(True)
+        if self.config.get("batch_enabled", DEFAULT_CONFIG["batch_enabled"]) and \
+                isShortList(lines, self.config.get("batch_item_chars", DEFAULT_CONFIG["batch_item_chars"])):
+            translation = self.translatePacked(lines, metrics, callback)
+        elif self.memory and self.config.get("memory_enabled", DEFAULT_CONFIG["memory_enabled"]):
+            translation = self.translateWithMemory(text, metrics, callback, onText)
+        else:
+            translation = self.generate(text, metrics, callback, onText)
+        if cache_key and not metrics.get("truncated"):
+            self.cache.put(cache_key, translation)
+        return translation
+
+    def routeModel(self, text):
+        return self.router.choose(
+            text, self.config.get("model", DEFAULT_CONFIG["model"]),
+            self.config.get("chars_per_token", DEFAULT_CONFIG["chars_per_token"])
+        )
+
+    def translateWithMemory(self, text, metrics, callback=None, onText=None):
+        # Reuse remembered sentences and send only the runs of new sentences to the model,
+        # with similar remembered sentences as examples
+        start = time.monotonic()
+        scope = TranslationMemory.makeScope(metrics["model"], metrics["source"], metrics["target"], PROMPT_TEMPLATE)
+        groups = []
+        for piece in splitSentences(text):
+            known = self.memory.get(scope, piece) if piece.strip() else ""
+            if known is None and groups and groups[-1][1] is None:
+                groups[-1][0].append(piece)
+            else:
+                groups.append(([piece], known))
+        if all(known is not None for _pieces, known in groups):
+            log.debug("Ollama Translator: Translation memory hit.")
+            self.telemetry.record(status="memory", total=time.monotonic() - start, **metrics)
+
+        threshold = self.config.get("memory_hint_threshold", DEFAULT_CONFIG["memory_hint_threshold"])
+        parts = []
+        for pieces, known in groups:
+            source_text = "".join(pieces)
+            core = source_text.strip()
+            if not core:
+                parts.append(source_text)
+                continue
+            lead = source_text[:source_text.index(core)]
+            trail = source_text[len(source_text.rstrip()):]
+            if known is None:
+                hints = self.memory.similar(scope, [piece for piece in pieces if piece.strip()], threshold)
+                if onText and lead:
+                    onText(lead)
+                part_metrics = dict(metrics, chars=len(core))
+                known = self.generate(core, part_metrics, callback, onText, hints)
+                if onText and trail:
+                    onText(trail)
+                if part_metrics.get("truncated"):
+                    metrics["truncated"] = True
+                else:
+                    self.memory.learn(scope, core, known)
+            elif onText:
+                onText(lead + known + trail)
+            parts.append(lead + known + trail)
+        return "".join(parts).strip()
+
+    def translatePacked(self, lines, metrics, callback=None):
+        # Translate short lines several per request as a JSON object, reusing remembered items.
+        # A batch whose reply is not the expected JSON is retried one item per request.
+        memory = self.memory if self.config.get("memory_enabled", DEFAULT_CONFIG["memory_enabled"]) else None
+        scope = TranslationMemory.makeScope(metrics["model"], metrics["source"], metrics["target"], PROMPT_TEMPLATE)
+        results = {"": ""}
+        missing = []
+        for line in lines:
+            item = line.strip()
+            if item in results or item in missing:
+                continue
+            known = memory.get(scope, item) if memory else None
+            if known is None:
+                missing.append(item)
+            else:
+                results[item] = known
+        job = currentJob()
+        for batch in packBatches(missing, self.config.get("batch_max_items", DEFAULT_CONFIG["batch_max_items"]),
+                self.config.get("batch_max_chars", DEFAULT_CONFIG["batch_max_chars"])):
+            if job:
+                job.check()
+            translated = self.generatePacked(batch, metrics, callback) if len(batch) > 1 else None
+            for index, item in enumerate(batch):
+                if translated is None:
+                    item_metrics = dict(metrics, chars=len(item))
+                    translation = self.generate(item, item_metrics, callback)
+                    if item_metrics.get("truncated"):
+                        metrics["truncated"] = True
+                        results[item] = translation
+                        continue
+                else:
+                    translation = translated[index]
+                results[item] = translation
+                if memory:
+                    memory.put(scope, item, translation)
+        parts = []
+        for line in lines:
+            item = line.strip()
+            lead = line[:len(line) - len(line.lstrip())]
+            parts.append(lead + results[item] + line[len(line.rstrip()):] if item else line)
+        return "".join(parts).strip()
+
+    def generatePacked(self, batch, metrics, callback=None):
+        # Returns the translations in batch order, or None when the model broke the structure
+        payload = json.dumps({str(i + 1): item for i, item in enumerate(batch)}, ensure_ascii=False)
+        batch_metrics = dict(metrics, chars=len(payload), items=len(batch))
+        try:
+            reply = self.generate(payload, batch_metrics, callback, template=PACKED_PROMPT_TEMPLATE, format="json")
+            data = json.loads(reply)
+        except (TranslationError, ValueError) as e:
+            log.warning(f"Ollama Translator: Packed translation failed, translating items one by one: {e}")
+            return None
+        if batch_metrics.get("truncated"):
+            log.warning("Ollama Translator: Packed translation was cut off, translating items one by one.")
+            return None
+        if isinstance(data, list) and len(data) == len(batch):
+            data = {str(i + 1): value for i, value in enumerate(data)}
+        if not isinstance(data, dict) or set(data) != set(str(i + 1) for i in range(len(batch))) or \
+                not all(isinstance(value, str) and value.strip() for value in data.values()):
+            log.warning("Ollama Translator: Packed translation came back malformed, translating items one by one.")
+            return None
+        return [data[str(i + 1)].strip() for i in range(len(batch))]
+
+    def generate(self, text, metrics, callback=None, onText=None, hints=(), template=PROMPT_TEMPLATE, format=None):
+        # Translate text with one generation request, failing over to another server on connection errors
+        source = metrics["source"]
+        target = metrics["target"]
+        model = metrics["model"]
+        start = time.monotonic()
+
+        session = metrics.get("session")
+        if session and template is PROMPT_TEMPLATE and self.config.get("document_sessions", DEFAULT_CONFIG["document_sessions"]):
+            # The instruction is a fixed system prompt and earlier segments of the document are
+            # conversation turns, so the server only evaluates what is new
+            scope = (model, source, target)
+            turns = self.sessions.begin(session, scope)
+            owner = turns is not None
+            turns = turns or []
+            metrics["follow_on"] = bool(turns)
+            messages = [{"role": "system", "content": SYSTEM_PROMPT_TEMPLATE.format(source=source, target=target)}]
+            for previous, translated in turns + list(hints):
+                messages.append({"role": "user", "content": previous})
+                messages.append({"role": "assistant", "content": translated})
+            messages.append({"role": "user", "content": text})
+            data = {"model": model, "messages": messages}
+        else:
+            session = owner = None
+            prompt = template.format(source=source, target=target, text=text)
+            if hints:
+                prompt = HINT_TEMPLATE.format("\n".join(f"{s} => {t}" for s, t in hints)) + prompt
+            data = {"model": model, "prompt": prompt}
+        data.update({
+            "stream": True,
+            "keep_alive": self.config.get("keep_alive", DEFAULT_CONFIG["keep_alive"])
+        })
+        if format:
+            data["format"] = format
+        prompt_text = data.get("prompt") or "".join(m["content"] for m in data["messages"])
+
+        translation = None
+        try:
+            job = currentJob()
+            tried = set()
+            emitted = [0]
+            retries = 0
+            failed = None
+            expand = False
+            max_retries = self.config.get("max_retries", DEFAULT_CONFIG["max_retries"])
+            backoff = self.config.get("retry_backoff", DEFAULT_CONFIG["retry_backoff"])
+            deadline = start + self.config.get("request_deadline", DEFAULT_CONFIG["request_deadline"])
+            while True:
+                endpoint = self.backends.choose(model, tried)
+                if endpoint is None and failed and not self.backends.outage():
+                    # Every server failed this round: start another after a jittered exponential backoff
+                    retries += 1
+                    delay = random.uniform(0, backoff * 2 ** (retries - 1))
+                    if retries > max_retries or time.monotonic() + delay >= deadline:
+                        self.telemetry.record(status="error", total=time.monotonic() - start, error=str(failed), **metrics)
+                        raise failed
+                    log.warning(f"Ollama Translator: {failed}, retrying in {delay:.1f}s ({retries}/{max_retries}).")
+                    try:
+                        if job:
+                            job.wait(delay)
+                        else:
+                            time.sleep(delay)
+                    except TranslationCancelled:
+                        self.telemetry.record(status="cancelled", total=time.monotonic() - start, **metrics)
+                        raise
+                    tried.clear()
+                    endpoint = self.backends.choose(model, tried)
+                if endpoint is None:
+                    # Every server is paused by its circuit breaker: fail at once instead of waiting for a timeout
+                    self.telemetry.record(status="error", total=time.monotonic() - start, error="unavailable", **metrics)
+                    raise ServerUnavailable(_("server_unavailable").format(int(math.ceil(self.backends.outage()))))
+                if failed and tried:
+                    log.warning(f"Ollama Translator: {failed}, retrying on {endpoint.url}.")
+                metrics["endpoint"] = endpoint.url
+                metrics["attempts"] = metrics.get("attempts", 0) + 1
+                # Recomputed per attempt: the context window may have grown for other requests meanwhile
+                data["options"] = self.generationOptions(model, prompt_text, text, target, expand)
+                metrics["num_ctx"] = data["options"].get("num_ctx")
+                first_timeout, inter_timeout = self.backends.timeouts(
+                    endpoint, model,
+                    self.config.get("first_token_timeout", DEFAULT_CONFIG["first_token_timeout"]),
+                    self.config.get("inter_token_timeout", DEFAULT_CONFIG["inter_token_timeout"]),
+                    retry=failed is not None
+                )
+                remaining = max(0.1, deadline - time.monotonic())
+                timeouts = (
+                    min(self.config.get("connect_timeout", DEFAULT_CONFIG["connect_timeout"]), remaining),
+                    min(first_timeout, remaining),
+                    min(inter_timeout, remaining)
+                )
+                received = [0]
+
+                def forward(chunk):
+                    # After a failover the new stream starts over; skip what was already passed on
+                    received[0] += len(chunk)
+                    if not onText:
+                        return
+                    overlap = emitted[0] - (received[0] - len(chunk))
+                    if overlap >= len(chunk):
+                        return
+                    if overlap > 0:
+                        chunk = chunk[overlap:]
+                    emitted[0] += len(chunk)
+                    onText(chunk)
+
+                try:
+                    with self.scheduler.slot(endpoint.key, job), self.backends.use(endpoint):
+                        attempt = time.monotonic()
+                        url, body = endpoint.backend.request(endpoint.url, data)
+                        full_translation = self._streamGeneration(endpoint.backend, url, body, metrics, start, job, callback, forward, timeouts)
+                    # Latency of this attempt alone; metrics["ttft"] counts from the first attempt
+                    first_at = metrics.pop("first_chunk_at", None)
+                    if first_at is not None:
+                        self.backends.observe(endpoint, first_at - attempt, model, metrics.get("inter_token"))
+                    if metrics.get("done_reason") == "length" and not expand and not isRepetitive(full_translation):
+                        # Cut off by num_predict rather than finished: ask once more with a larger budget.
+                        # The model starts the same way, so streamed text carries on where it stopped.
+                        log.info(f"Ollama Translator: Generation stopped at num_predict={data['options'].get('num_predict')} "
+                                 f"for {len(text)} chars of input, retrying with a larger budget.")
+                        expand = True
+                        continue
+                    break
+                except Exception as e:
+                    metrics.pop("first_chunk_at", None)
+                    if job and job.cancelled:
+                        self.telemetry.record(status="cancelled", total=time.monotonic() - start, **metrics)
+                        raise TranslationCancelled()
+                    if isinstance(e, (OSError, http.client.HTTPException, ServerError)):
+                        # Connection errors, timeouts and 5xx are retried on another server or in a later round
+                        self.backends.markFailed(endpoint, e, down=not received[0] and not isinstance(e, ServerError))
+                        tried.add(endpoint.url)
+                        failed = e
+                        continue
+                    self.telemetry.record(status="error", total=time.monotonic() - start, error=str(e), **metrics)
+                    raise
+
+            self.warmer.state = "loaded"
+            self.router.observe(model, metrics)
+            translation = full_translation.strip()
+            if metrics.get("done_reason") == "length":
+                # Delivered, but kept out of the cache, the translation memory and the document session
+                metrics["truncated"] = True
+                log.warning(f"Ollama Translator: Generation stopped at num_predict={data['options'].get('num_predict')} for {len(text)} chars of input.")
+            self.telemetry.record(status="ok", output_chars=len(translation), total=time.monotonic() - start, **metrics)
+            if not translation:
+                raise TranslationError(_("failed"))
+            return translation
+        finally:
+            if owner:
+                complete = translation and not metrics.get("truncated")
+                self.sessions.end(session, scope, list(hints) + [(text, translation)] if complete else ())
+
+    def _streamGeneration(self, backend, url, data, metrics, start, job=None, callback=None, onText=None, timeouts=(3, 30, 30)):
+        # Run one streamed generation request and return the concatenated response text; backend parses the stream.
+        # timeouts are (connect, first token, between tokens) in seconds.
+        connect_timeout, first_timeout, inter_timeout = timeouts
+        with self.connections.request("POST", url, body=json.dumps(data).encode('utf-8'), headers={'Content-Type': 'application/json'},
+                                      timeout=first_timeout, connect_timeout=connect_timeout, job=job) as response:
+            if job:
+                job.attach(response)
+            try:
+                metrics["connect"] = response.connectTime
+                metrics["reused"] = response.reused
+                if response.status >= 500:
+                    raise ServerError(_("error").format(readErrorMessage(response)))
+                if response.status >= 400:
+                    raise TranslationError(_("error").format(readErrorMessage(response)))
+                full_translation = ""
+                chunks = 0
+                first_at = None
+
+                for line in response:
+                    if job:
+                        job.check()
+                    if line.strip():
+                        try:
+                            chunk, done = backend.parseLine(line, metrics)
+                            if chunk and "ttft" not in metrics:
+                                metrics["ttft"] = time.monotonic() - start
+                            if chunk:
+                                chunks += 1
+                                last_at = time.monotonic()
+                                if first_at is None:
+                                    first_at = metrics["first_chunk_at"] = last_at
+                                    response.settimeout(inter_timeout)
+                            full_translation += chunk
+                            if onText:
+                                onText(chunk)
+
+                            if done:
+                                response.drain()
+                                break
+                        except json.JSONDecodeError:
+                            continue
+                if job:
+                    job.check()
+                if chunks > 1:
+                    metrics["inter_token"] = (last_at - first_at) / (chunks - 1)
+                    if not metrics.get("tokens_per_sec") and chunks >= CLIENT_RATE_CHUNKS:
+                        # Servers that report no timings: generation speed as seen by the client, once there
+                        # are enough chunks that network buffering doesn't dominate
+                        metrics["tokens_per_sec"] = (chunks - 1) / (last_at - first_at)
+                return full_translation
+            finally:
+                if job:
+                    job.detach(response)
+
+    def deliverTranslation(self, translation, callback=None):
+        if callback:
+            wx.CallAfter(callback, translation)
+        else:
+            wx.CallAfter(ui.browseableMessage, translation, _("title"))
+
     __gestures = {
         "kb:NVDA+shift+t": "translate",
         "kb:NVDA+shift+k": "markStart",
-        "kb:NVDA+shift+l": "markEndAndTranslate"
+        "kb:NVDA+shift+l": "markEndAndTranslate",
+        "kb:NVDA+shift+j": "speakStats",
+        "kb:NVDA+shift+y": "toggleAutoTranslate",
+        "kb:NVDA+shift+c": "translateClipboard",
+        "kb:NVDA+shift+w": "toggleClipboardWatch"
     }
 
 class TranslationDialog(wx.Dialog):
@@ -643,6 +4749,10 @@ class TranslationDialog(wx.Dialog):
         self.translateBtn = wx.Button(self, label=_("translate"))
         self.translateBtn.Bind(wx.EVT_BUTTON, self.onTranslate)
         btnSizer.Add(self.translateBtn, 0, wx.ALL, 5)
+
+        self.stopBtn = wx.Button(self, label=_("stop"))
+        self.stopBtn.Bind(wx.EVT_BUTTON, self.onStop)
+        btnSizer.Add(self.stopBtn, 0, wx.ALL, 5)
         
         self.closeBtn = wx.Button(self, wx.ID_CLOSE, label=_("close"))
         self.closeBtn.Bind(wx.EVT_BUTTON, self.onClose)
@@ -652,16 +4762,36 @@ class TranslationDialog(wx.Dialog):
         
         self.SetSizer(mainSizer)
         self.Center()
+        self.renderer = None
 
     def onTranslate(self, event):
         text = self.sourceText.GetValue()
         if not text:
             return
-        
-        self.targetText.SetValue(_("translating"))
-        # Use the global plugin instance to translate
+
+        # A fresh renderer per translation, so late chunks of a replaced one are dropped
+        if self.renderer:
+            self.renderer.stop()
+        self.renderer = TextRenderer(self.targetText, GlobalPlugin.config.get("render_interval", DEFAULT_CONFIG["render_interval"]))
+        self.renderer.show(_("translating"))
+        # Use the global plugin instance to translate; translating again replaces the running request
         if GlobalPlugin._instance:
-            threading.Thread(target=GlobalPlugin._instance.translateText, args=(text, self.targetText.SetValue)).start()
+            GlobalPlugin._instance.submitTranslation(text, self.renderer.show, PRIORITY_DIALOG, ("dialog", id(self)),
+                                                     "dialog-%d" % id(self), onText=self.renderer.feed)
+
+    def onStop(self, event):
+        # Keeps the part translated so far
+        if GlobalPlugin._instance and GlobalPlugin.scheduler:
+            GlobalPlugin.scheduler.cancel(("dialog", id(self)))
+        if self.renderer:
+            self.renderer.stop()
 
     def onClose(self, event):
+        if GlobalPlugin._instance and GlobalPlugin.scheduler:
+            GlobalPlugin.scheduler.cancel(("dialog", id(self)))
+        GlobalPlugin.sessions.clear("dialog-%d" % id(self))
         self.Destroy()
+
+# Import time of this module; the NVDA modules it imports are usually loaded already
+GlobalPlugin.startup.add("imports", _importsDone - _importStarted)
+GlobalPlugin.startup.add("module", time.perf_counter() - _importsDone)